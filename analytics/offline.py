@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Offline analytics over the Parquet message archive (loading/archive.py).
+
+Full-history recomputations run as vectorized PyArrow queries over the
+archive, so they take seconds and never touch PostgreSQL. Filters on channel
+and date prune partitions before any file is read.
+
+Commands:
+    engagement   engagement tiers per channel, for any percentile rule
+    keywords     keyword mentions (default: the API's medical keyword list)
+    daily        messages and views per channel and day
+    sql          ad-hoc SQL over a `messages` view (requires `duckdb`)
+
+Usage:
+    python analytics/offline.py engagement --low 0.2 --high 0.8
+    python analytics/offline.py keywords --keywords paracetamol insulin --since 2024-01-01
+    python analytics/offline.py daily --channel CheMed123 --output daily.parquet
+    python analytics/offline.py sql "SELECT channel, count(*) FROM messages GROUP BY 1"
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from loading.archive import ARCHIVE_DIR
+from utils.helpers import MEDICAL_KEYWORDS
+
+PARTITIONING = ds.partitioning(pa.schema([("channel", pa.string()), ("date", pa.string())]), flavor="hive")
+
+def read_messages(archive_dir: str = ARCHIVE_DIR, channels: Optional[Sequence[str]] = None,
+                  since: Optional[str] = None, until: Optional[str] = None,
+                  columns: Optional[List[str]] = None) -> pa.Table:
+    """Archived messages, optionally for some channels and dates (YYYY-MM-DD, `until` exclusive)."""
+    dataset = ds.dataset(archive_dir, format="parquet", partitioning=PARTITIONING)
+    conditions = []
+    if channels:
+        conditions.append(ds.field("channel").isin(list(channels)))
+    if since:
+        conditions.append(ds.field("date") >= since)
+    if until:
+        conditions.append(ds.field("date") < until)
+    condition = None
+    for expression in conditions:
+        condition = expression if condition is None else condition & expression
+    return dataset.to_table(columns=columns, filter=condition)
+
+def engagement_summary(table: pa.Table, low: float = 0.25, high: float = 0.75) -> List[Dict]:
+    """Per-channel engagement tiers: views above the `high` percentile are High, below `low` Low.
+
+    Same rule as the dbt engagement_level macro (linear percentiles, missing
+    views count as zero), with the percentiles as parameters.
+    """
+    views = pc.fill_null(table["views"], 0)
+    rows = []
+    for channel in sorted(pc.unique(table["channel"]).to_pylist()):
+        channel_views = pc.filter(views, pc.equal(table["channel"], channel))
+        views_low, views_high = pc.quantile(channel_views, q=[low, high], interpolation="linear").to_pylist()
+        high_count = pc.sum(pc.greater(channel_views, views_high)).as_py() or 0
+        low_count = pc.sum(pc.less(channel_views, views_low)).as_py() or 0
+        rows.append({
+            "channel": channel,
+            "messages": len(channel_views),
+            "views_low": round(views_low, 1),
+            "views_high": round(views_high, 1),
+            "high": high_count,
+            "medium": len(channel_views) - high_count - low_count,
+            "low": low_count,
+        })
+    return rows
+
+def keyword_mentions(table: pa.Table, keywords: Sequence[str]) -> List[Dict]:
+    """Messages mentioning each keyword (case-insensitive substring, like the API), most mentioned first.
+
+    Keywords are scanned in parallel threads (PyArrow kernels release the GIL).
+    """
+    text = pc.utf8_lower(pc.fill_null(table["text"], "")).combine_chunks()
+    views = pc.fill_null(table["views"], 0)
+
+    def mentions_of(keyword):
+        mentions = pc.match_substring(text, keyword.lower())
+        count = pc.sum(mentions).as_py() or 0
+        if not count:
+            return None
+        return {
+            "keyword": keyword,
+            "mentions": count,
+            "channels": ", ".join(sorted(pc.unique(pc.filter(table["channel"], mentions)).to_pylist())),
+            "avg_views": round(pc.mean(pc.filter(views, mentions)).as_py(), 1),
+        }
+
+    with ThreadPoolExecutor(max_workers=pa.cpu_count()) as executor:
+        rows = [row for row in executor.map(mentions_of, keywords) if row is not None]
+    return sorted(rows, key=lambda row: row["mentions"], reverse=True)
+
+def daily_activity(table: pa.Table) -> List[Dict]:
+    """Messages, total and average views per channel and day."""
+    grouped = table.group_by(["channel", "date"]).aggregate([
+        ("id", "count"), ("views", "sum"), ("views", "mean"),
+    ])
+    rows = [
+        {
+            "channel": row["channel"],
+            "date": row["date"],
+            "messages": row["id_count"],
+            "total_views": row["views_sum"],
+            "avg_views": round(row["views_mean"], 1) if row["views_mean"] is not None else None,
+        }
+        for row in grouped.to_pylist()
+    ]
+    return sorted(rows, key=lambda row: (row["channel"], row["date"]))
+
+def run_sql(query: str, archive_dir: str = ARCHIVE_DIR) -> pa.Table:
+    """Run SQL with DuckDB over a `messages` view of the archive (partition columns included)."""
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("SQL queries require the 'duckdb' package (pip install duckdb)")
+    connection = duckdb.connect()
+    files = os.path.join(archive_dir, "*", "*", "*.parquet").replace("'", "''")
+    connection.execute(
+        f"CREATE VIEW messages AS SELECT * FROM read_parquet('{files}', hive_partitioning = true)"
+    )
+    return connection.execute(query).arrow()
+
+def print_rows(rows: List[Dict], limit: int = 50):
+    if not rows:
+        print("ℹ️  No results")
+        return
+    columns = list(rows[0])
+    widths = {
+        column: max(len(column), *(len(str(row[column])) for row in rows[:limit]))
+        for column in columns
+    }
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows[:limit]:
+        print("  ".join(str(row[column]).ljust(widths[column]) for column in columns))
+    if len(rows) > limit:
+        print(f"... {len(rows) - limit} more rows (use --output to save all)")
+
+def write_rows(rows: List[Dict], path: str):
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pylist(rows)
+    if path.endswith(".parquet"):
+        pq.write_table(table, path)
+    else:
+        pacsv.write_csv(table, path)
+    print(f"💾 {len(rows)} rows written to {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--channel", nargs="*", help="Only these channels")
+    parser.add_argument("--since", help="First message date, YYYY-MM-DD")
+    parser.add_argument("--until", help="Only messages before this date, YYYY-MM-DD")
+    parser.add_argument("--output", help="Save the result as .csv or .parquet")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    engagement = subparsers.add_parser("engagement", help="Engagement tiers per channel")
+    engagement.add_argument("--low", type=float, default=0.25, help="Percentile below which views are Low")
+    engagement.add_argument("--high", type=float, default=0.75, help="Percentile above which views are High")
+
+    keywords = subparsers.add_parser("keywords", help="Keyword mentions")
+    keywords.add_argument("--keywords", nargs="+", default=MEDICAL_KEYWORDS)
+
+    subparsers.add_parser("daily", help="Messages and views per channel and day")
+
+    sql = subparsers.add_parser("sql", help="Ad-hoc SQL over the `messages` view (DuckDB)")
+    sql.add_argument("query")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.archive_dir):
+        sys.exit(f"❌ No archive at {args.archive_dir}; run `python loading/archive.py` first")
+
+    started = time.perf_counter()
+    if args.command == "sql":
+        rows = run_sql(args.query, args.archive_dir).to_pylist()
+        scanned = None
+    else:
+        columns = {
+            "engagement": ["channel", "views"],
+            "keywords": ["channel", "text", "views"],
+            "daily": ["channel", "date", "id", "views"],
+        }[args.command]
+        table = read_messages(args.archive_dir, args.channel, args.since, args.until, columns)
+        scanned = table.num_rows
+        if args.command == "engagement":
+            rows = engagement_summary(table, args.low, args.high)
+        elif args.command == "keywords":
+            rows = keyword_mentions(table, args.keywords)
+        else:
+            rows = daily_activity(table)
+    elapsed = time.perf_counter() - started
+
+    print_rows(rows)
+    if args.output:
+        write_rows(rows, args.output)
+    scanned_note = f"{scanned} messages scanned, " if scanned is not None else ""
+    print(f"⏱️  {scanned_note}{elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
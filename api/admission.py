@@ -0,0 +1,170 @@
+"""
+Admission control for the API.
+
+Expensive reports and cheap lookups share one database pool. Without a limit,
+a burst of heavy requests takes every connection and cheap requests queue
+behind them until the pool times out. `AdmissionMiddleware` gives each
+endpoint class its own concurrency budget and a bounded wait queue:
+
+- a request runs immediately if its class has a free slot;
+- otherwise it waits up to ADMISSION_MAX_WAIT seconds, if the queue has room;
+- otherwise (or when the wait expires) it gets `503` with `Retry-After`.
+
+Endpoints are classified by route template (see `ENDPOINT_CLASSES` in
+`api/main.py`); unlisted routes are light, and exempt routes skip admission.
+Bulk requests (exports, batches) can run for minutes, so they have their own
+budget and never hold the slots of interactive heavy reports.
+Queue depth, in-flight requests and rejections are exported on `/metrics`.
+"""
+
+import math
+from typing import Dict, Iterable, Optional
+
+import anyio
+from starlette.routing import Match
+
+from api.responses import ORJSONResponse
+from api.schemas import ErrorResponse
+from utils.config import (
+    ADMISSION_BULK_CONCURRENCY, ADMISSION_BULK_QUEUE,
+    ADMISSION_HEAVY_CONCURRENCY, ADMISSION_HEAVY_QUEUE,
+    ADMISSION_LIGHT_CONCURRENCY, ADMISSION_LIGHT_QUEUE, ADMISSION_MAX_WAIT
+)
+
+BULK = "bulk"
+HEAVY = "heavy"
+LIGHT = "light"
+EXEMPT = None
+
+class AdmissionClass:
+    """Concurrency budget with a bounded, time-limited wait queue."""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> anyio.Semaphore:
+        # Created on first use, inside the running event loop
+        if self._semaphore is None:
+            self._semaphore = anyio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.max_wait))
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot; returns the rejection reason instead if none is granted."""
+        semaphore = self.semaphore
+        try:
+            semaphore.acquire_nowait()
+            self.in_flight += 1
+            return None
+        except anyio.WouldBlock:
+            pass
+
+        if self.waiting >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            return "queue_full"
+
+        self.waiting += 1
+        try:
+            with anyio.move_on_after(self.max_wait):
+                await semaphore.acquire()
+                self.in_flight += 1
+                return None
+        finally:
+            self.waiting -= 1
+        self.rejected["timeout"] += 1
+        return "timeout"
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "rejected_queue_full": self.rejected["queue_full"],
+            "rejected_timeout": self.rejected["timeout"],
+        }
+
+admission_classes: Dict[str, AdmissionClass] = {
+    BULK: AdmissionClass(BULK, ADMISSION_BULK_CONCURRENCY, ADMISSION_BULK_QUEUE, ADMISSION_MAX_WAIT),
+    HEAVY: AdmissionClass(HEAVY, ADMISSION_HEAVY_CONCURRENCY, ADMISSION_HEAVY_QUEUE, ADMISSION_MAX_WAIT),
+    LIGHT: AdmissionClass(LIGHT, ADMISSION_LIGHT_CONCURRENCY, ADMISSION_LIGHT_QUEUE, ADMISSION_MAX_WAIT),
+}
+
+def admission_stats() -> Dict[str, Dict[str, int]]:
+    """Current usage per admission class, for health checks and metrics."""
+    return {name: admission.stats() for name, admission in admission_classes.items()}
+
+class AdmissionMiddleware:
+    """ASGI middleware applying per-class admission control to HTTP requests.
+
+    `routes` is the application's (live) route list, used to resolve the
+    route template of each request; `classes` maps templates to BULK, HEAVY,
+    LIGHT or EXEMPT. The slot is held until the response, streamed or not, is sent.
+    """
+
+    def __init__(self, app, routes: Iterable, classes: Dict[str, Optional[str]], default: str = LIGHT):
+        self.app = app
+        self.routes = routes
+        self.classes = classes
+        self.default = default
+
+    def _match(self, scope):
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route
+        return None
+
+    def classify(self, scope):
+        """(matched route, admission class name) of an HTTP request; unmatched routes are exempt."""
+        route = self._match(scope)
+        if route is None:
+            return None, EXEMPT
+        return route, self.classes.get(route.path, self.default)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route, class_name = self.classify(scope)
+        if class_name is EXEMPT:
+            await self.app(scope, receive, send)
+            return
+
+        admission = admission_classes[class_name]
+        rejection = await admission.acquire()
+        if rejection is not None:
+            # Lets MetricsMiddleware label the 503 with the route template
+            scope["route"] = route
+            response = ORJSONResponse(
+                status_code=503,
+                content=ErrorResponse(
+                    success=False,
+                    message=f"Server busy ({class_name} requests: {rejection.replace('_', ' ')}), retry later",
+                    error_code="OVERLOADED"
+                ).model_dump(),
+                headers={"Retry-After": str(admission.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release()
@@ -0,0 +1,212 @@
+"""
+Batch report execution for `POST /api/batch`.
+
+A dashboard page needs many reports at once (e.g. activity for 50 channels).
+Instead of one HTTP request and session per report, the batch endpoint takes
+them all and answers in request order:
+
+- identical requests are run once;
+- channel activity and top products reports are served from the shared
+  response cache when possible (same keys as the single-report endpoints);
+- channel activity requests sharing parameters are computed together by
+  `MessageCRUD.get_channel_activities`, one set of queries for all channels;
+- the remaining work units run concurrently in DB worker threads, at most
+  BATCH_CONCURRENCY at a time, each with its own session. Each unit takes an
+  admission slot in the class of its single-report endpoint first, so a batch
+  holds no more database connections than the same reports sent one by one.
+
+Each item in the response is the envelope the single-report endpoint would
+have returned, or an error envelope for that item alone.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import anyio
+from pydantic import ValidationError
+
+from api.admission import HEAVY, LIGHT, admission_classes
+from api.cache import response_cache
+from api.crud import (
+    MessageCRUD, DetectionCRUD, DETECTION_COLUMNS, DETECTION_MESSAGE_COLUMNS, parse_fields
+)
+from api.database import SessionLocal, run_in_db_thread
+from api.responses import dumps
+from api.schemas import (
+    APIResponse, ErrorResponse, BatchReportRequest,
+    ChannelActivityParams, TopProductsParams, DetectionListParams
+)
+from utils.config import BATCH_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# Admission class of each report type's single-report endpoint (ENDPOINT_CLASSES in api/main.py)
+REPORT_CLASSES = {
+    "channel_activity": HEAVY,
+    "top_products": HEAVY,
+    "channel_detections": LIGHT,
+}
+
+class _Report:
+    """A validated batch item: its cache key and how to compute it."""
+
+    def __init__(self, kind: str, key: str, channel: Optional[str] = None,
+                 params: Any = None, cacheable: bool = True):
+        self.kind = kind
+        self.key = key
+        self.channel = channel
+        self.params = params
+        self.cacheable = cacheable
+
+def _error(message: str, error_code: str) -> bytes:
+    return dumps(ErrorResponse(success=False, message=message, error_code=error_code))
+
+def _resolve(item: BatchReportRequest) -> _Report:
+    """Validate an item with its endpoint's parameter schema; raises ValueError."""
+    if item.type in ("channel_activity", "channel_detections") and not item.channel:
+        raise ValueError(f"'{item.type}' requires a channel")
+
+    if item.type == "channel_activity":
+        params = ChannelActivityParams(**item.params)
+        key = response_cache.cache_key("channel-activity", {"channel": item.channel, **params.model_dump()})
+        return _Report(item.type, key, item.channel, params)
+
+    if item.type == "top_products":
+        params = TopProductsParams(**item.params)
+        return _Report(item.type, response_cache.cache_key("top-products", params.model_dump()), params=params)
+
+    # Detections are not in the response cache (enrichment does not bump the data version)
+    params = DetectionListParams(**item.params)
+    _detection_fields(params)
+    key = response_cache.cache_key("channel-detections", {"channel": item.channel, **params.model_dump()})
+    return _Report(item.type, key, item.channel, params, cacheable=False)
+
+def _detection_fields(params: DetectionListParams) -> Optional[List[str]]:
+    """The validated `fields` projection, as parsed by the single-report endpoint; raises ValueError."""
+    columns = DETECTION_COLUMNS + (DETECTION_MESSAGE_COLUMNS if params.include_message else ())
+    return parse_fields(params.fields, columns)
+
+def _current_version() -> int:
+    with SessionLocal() as db:
+        version, _ = response_cache.tracker.current(db)
+    return version
+
+def _channel_activity_unit(reports: List[_Report], version: int) -> Dict[str, bytes]:
+    with SessionLocal() as db:
+        activities = MessageCRUD.get_channel_activities(
+            db, [report.channel for report in reports], reports[0].params
+        )
+
+    results = {}
+    for report in reports:
+        activity = activities[report.channel]
+        if activity is None:
+            results[report.key] = _error(f"Channel '{report.channel}' not found", "NOT_FOUND")
+            continue
+        body = dumps(APIResponse(
+            success=True,
+            message=f"Retrieved activity for channel {report.channel}",
+            data=activity
+        ))
+        response_cache.store(report.key, version, body)
+        results[report.key] = body
+    return results
+
+def _top_products_unit(report: _Report, version: int) -> Dict[str, bytes]:
+    with SessionLocal() as db:
+        top_products = MessageCRUD.get_top_products(db, report.params)
+    body = dumps(APIResponse(
+        success=True,
+        message=f"Retrieved top {len(top_products)} products",
+        data=top_products,
+        total_count=len(top_products)
+    ))
+    response_cache.store(report.key, version, body)
+    return {report.key: body}
+
+def _detections_unit(report: _Report) -> Dict[str, bytes]:
+    with SessionLocal() as db:
+        detections = DetectionCRUD.get_detections_by_channel(
+            db, report.channel, report.params.limit, report.params.include_message,
+            _detection_fields(report.params)
+        )
+    return {report.key: dumps(APIResponse(
+        success=True,
+        message=f"Retrieved {len(detections)} detections for {report.channel}",
+        data=detections,
+        total_count=len(detections)
+    ))}
+
+def _plan(reports: List[_Report], version: int) -> List[Tuple[List[str], str, Callable[[], Dict[str, bytes]]]]:
+    """Group uncached reports into work units of (keys, admission class, blocking function)."""
+    units = []
+    activity_groups = defaultdict(list)
+    for report in reports:
+        if report.kind == "channel_activity":
+            activity_groups[report.params.model_dump_json()].append(report)
+        elif report.kind == "top_products":
+            units.append(([report.key], REPORT_CLASSES[report.kind],
+                          lambda report=report: _top_products_unit(report, version)))
+        else:
+            units.append(([report.key], REPORT_CLASSES[report.kind],
+                          lambda report=report: _detections_unit(report)))
+
+    for group in activity_groups.values():
+        units.append((
+            [report.key for report in group],
+            REPORT_CLASSES["channel_activity"],
+            lambda group=group: _channel_activity_unit(group, version)
+        ))
+    return units
+
+async def run_batch(items: List[BatchReportRequest]) -> List[bytes]:
+    """Run every report in `items`; returns one encoded envelope per item, in order."""
+    keys = []
+    results: Dict[str, bytes] = {}
+    unique: Dict[str, _Report] = {}
+    for index, item in enumerate(items):
+        try:
+            report = _resolve(item)
+        except (ValidationError, ValueError) as e:
+            key = f"invalid:{index}"
+            results[key] = _error(str(e), "BAD_REQUEST")
+        else:
+            key = report.key
+            unique.setdefault(key, report)
+        keys.append(key)
+
+    version = await run_in_db_thread(_current_version)
+    pending = []
+    for key, report in unique.items():
+        cached = response_cache.lookup(key, version) if report.cacheable else None
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending.append(report)
+
+    limiter = anyio.CapacityLimiter(BATCH_CONCURRENCY)
+
+    async def run_unit(unit_keys, class_name, func):
+        async with limiter:
+            admission = admission_classes[class_name]
+            rejection = await admission.acquire()
+            if rejection is not None:
+                message = f"Server busy ({class_name} requests: {rejection.replace('_', ' ')}), retry later"
+                for key in unit_keys:
+                    results[key] = _error(message, "OVERLOADED")
+                return
+            try:
+                results.update(await run_in_db_thread(func))
+            except Exception as e:
+                logger.error(f"Error running batch reports {unit_keys}: {str(e)}")
+                for key in unit_keys:
+                    results[key] = _error("Internal server error", "INTERNAL_ERROR")
+            finally:
+                admission.release()
+
+    async with anyio.create_task_group() as task_group:
+        for unit_keys, class_name, func in _plan(pending, version):
+            task_group.start_soon(run_unit, unit_keys, class_name, func)
+
+    return [results[key] for key in keys]
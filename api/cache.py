@@ -0,0 +1,199 @@
+"""
+Response cache for the analytics endpoints.
+
+Analytics data only changes when the pipeline loads new data, so responses are
+cached per endpoint and normalized parameters and tagged with the data version
+(see `utils/data_version.py`). A version bump invalidates every entry at once;
+the TTL only bounds how long an entry may live regardless.
+
+Report windows are relative to the current day (`days` back from now), so the
+key also carries the day the window is anchored to: entries, ETags and
+Last-Modified move on at midnight even when no new data was loaded.
+
+Responses carry ETag/Last-Modified headers derived from the cache key and data
+version, so polling clients get a 304 without the response being rebuilt.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from api.responses import dumps
+from utils.config import API_CACHE_TTL, API_CACHE_MAX_ENTRIES, DATA_VERSION_CHECK_INTERVAL
+from utils.data_version import get_data_version
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend(ABC):
+    """Interface for response cache storage."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """The value stored for `key`, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        """Store `value` for `ttl` seconds."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries: int = API_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class DataVersionTracker:
+    """Reads the pipeline data version, at most once per check interval."""
+
+    def __init__(self, check_interval: float = DATA_VERSION_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._version = 0
+        self._updated_at = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def current(self, db: Session):
+        """Return (version, updated_at), refreshing from the database when stale."""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._version, self._updated_at
+
+        try:
+            version, updated_at = get_data_version(db)
+        except Exception as e:
+            # Table not created yet (nothing loaded) or transient DB error:
+            # keep serving with the last known version
+            db.rollback()
+            logger.warning(f"Could not read data version: {str(e)}")
+            version, updated_at = self._version, self._updated_at
+
+        with self._lock:
+            self._version, self._updated_at, self._checked_at = version, updated_at, now
+        return version, updated_at
+
+def _normalize_params(params: Dict[str, Any]) -> str:
+    """Canonical string for a parameter set: sorted keys, unset values dropped."""
+    cleaned = {key: value for key, value in params.items() if value is not None}
+    return json.dumps(cleaned, sort_keys=True, default=str, separators=(",", ":"))
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class ResponseCache:
+    """Caches rendered JSON responses keyed by endpoint, params and data version."""
+
+    def __init__(self, backend: Optional[CacheBackend] = None,
+                 tracker: Optional[DataVersionTracker] = None,
+                 ttl: int = API_CACHE_TTL):
+        self.backend = backend or LRUCache()
+        self.tracker = tracker or DataVersionTracker()
+        self.ttl = ttl
+
+    def set_backend(self, backend: CacheBackend) -> None:
+        """Swap the storage backend (e.g. for a shared cache across workers)."""
+        self.backend = backend
+
+    @staticmethod
+    def cache_key(endpoint: str, params: Dict[str, Any], as_of: Optional[date] = None) -> str:
+        """Key for an endpoint's params, with the day its report window is anchored to (default today)."""
+        return f"{endpoint}?{_normalize_params({**params, 'as_of': as_of or date.today()})}"
+
+    def lookup(self, key: str, version: int) -> Optional[bytes]:
+        """Rendered body cached for `key` at this data version, if any."""
+        cached = self.backend.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        return None
+
+    def store(self, key: str, version: int, body: bytes) -> None:
+        self.backend.set(key, (version, body), self.ttl)
+
+    def respond(self, request: Request, db: Session, endpoint: str,
+                params: Dict[str, Any], compute: Callable[[], Any]) -> Response:
+        """Serve `compute()` for this endpoint/params from cache when the data is unchanged."""
+        as_of = date.today()
+        key = self.cache_key(endpoint, params, as_of)
+        version, updated_at = self.tracker.current(db)
+        if updated_at is not None:
+            # The report window moves at midnight even when the data does not
+            updated_at = max(updated_at, datetime.combine(as_of, datetime.min.time()).astimezone())
+
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        etag = f'"{version}-{digest}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if updated_at is not None:
+            last_modified = updated_at.astimezone(timezone.utc).replace(microsecond=0)
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        if self._not_modified(request, etag, updated_at):
+            return Response(status_code=304, headers=headers)
+
+        cached = self.lookup(key, version)
+        if cached is not None:
+            headers["X-Cache"] = "HIT"
+            return Response(content=cached, media_type="application/json", headers=headers)
+
+        body = dumps(compute())
+        self.store(key, version, body)
+        headers["X-Cache"] = "MISS"
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    def _not_modified(request: Request, etag: str, updated_at) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, etag)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and updated_at is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return updated_at.replace(microsecond=0) <= since
+        return False
+
+response_cache = ResponseCache()
@@ -0,0 +1,151 @@
+"""
+Response compression negotiated from `Accept-Encoding`.
+
+The client's highest-q supported coding is used; brotli (when the `brotli`
+package is installed) wins ties with gzip. Bodies smaller than COMPRESSION_MIN_SIZE are sent
+as-is, as are already-compressed formats (Parquet) and responses that set their
+own `Content-Encoding`. Streamed responses are buffered only until they reach
+the threshold and are then compressed chunk by chunk, each chunk flushed so
+clients keep receiving data incrementally.
+"""
+
+import zlib
+from typing import Optional
+
+from utils.config import COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # optional dependency: fall back to gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header, or None.
+
+    The supported coding with the highest q-value wins (brotli on a tie);
+    `*` covers codings not listed, and q=0 refuses one.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    qualities = {name: accepted.get(name, accepted.get("*", 0.0)) for name in supported}
+    best = max(supported, key=lambda name: qualities[name])
+    return best if qualities[best] > 0 else None
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible HTTP responses."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        buffered = []
+        buffered_size = 0
+        compressor = None
+        passthrough = False
+
+        async def send_start(compress: bool, content_length: Optional[int] = None):
+            message_headers = []
+            for name, value in start_message["headers"]:
+                if compress and name.lower() == b"content-length":
+                    continue
+                if compress and name.lower() == b"etag" and not value.startswith(b"W/"):
+                    # The compressed body is a different representation
+                    value = b"W/" + value
+                message_headers.append((name, value))
+            if compress:
+                message_headers.append((b"content-encoding", encoding.encode()))
+                if content_length is not None:
+                    message_headers.append((b"content-length", str(content_length).encode()))
+            message_headers.append((b"vary", b"Accept-Encoding"))
+            await send({**start_message, "headers": message_headers})
+
+        async def send_wrapper(message):
+            nonlocal start_message, buffered_size, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                response_headers = {
+                    name.lower(): value for name, value in message.get("headers", [])
+                }
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in response_headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or message["status"] in (204, 304)
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                await send({
+                    "type": "http.response.body",
+                    "body": compressor.compress(body, final=not more_body),
+                    "more_body": more_body
+                })
+                return
+
+            buffered.append(body)
+            buffered_size += len(body)
+            if buffered_size < self.minimum_size:
+                if more_body:
+                    return
+                # Whole body is below the threshold: send it uncompressed
+                await send_start(compress=False)
+                await send({"type": "http.response.body", "body": b"".join(buffered), "more_body": False})
+                return
+
+            compressor = _Compressor(encoding)
+            payload = compressor.compress(b"".join(buffered), final=not more_body)
+            buffered.clear()
+            await send_start(compress=True, content_length=None if more_body else len(payload))
+            await send({"type": "http.response.body", "body": payload, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,35 +1,143 @@
-import json
 import re
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
+import orjson
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text, desc, asc, and_, or_
-from collections import Counter
+from sqlalchemy import func, text, desc, asc, and_, or_, tuple_
+from collections import Counter, defaultdict
 
 from api.models import (
     TelegramMessage, StagingTelegramMessage, DimChannel, 
-    FactMessage, YoloDetection
+    FactMessage, YoloDetection, DailyChannelMetric, ImageDetectionFact
 )
+from api.metrics import track_db_operations
 from api.schemas import (
-    MessageSearchParams, TopProductsParams, ChannelActivityParams,
-    TopProduct, ChannelActivity, SearchResult
+    MessageSearchParams, MessageExportParams, TopProductsParams, ChannelActivityParams,
+    TopProduct, ChannelActivity, SearchResult, MessageResponse, ChannelResponse,
+    DetectionResponse, DetectionWithMessage
 )
+from utils.helpers import MEDICAL_KEYWORDS
 
+# Columns selected for message rows, labelled to match MessageResponse
+MESSAGE_COLUMNS = (
+    FactMessage.message_id.label("id"),
+    FactMessage.message_date,
+    StagingTelegramMessage.message_text,
+    FactMessage.views,
+    FactMessage.has_media,
+    FactMessage.channel,
+    FactMessage.message_length,
+    FactMessage.engagement_level,
+    FactMessage.loaded_at
+)
+
+DETECTION_COLUMNS = (
+    YoloDetection.id,
+    YoloDetection.file_path,
+    YoloDetection.relative_path,
+    YoloDetection.filename,
+    YoloDetection.channel,
+    YoloDetection.message_id,
+    YoloDetection.detected_objects,
+    YoloDetection.object_count,
+    YoloDetection.confidence_score,
+    YoloDetection.created_at
+)
+
+DETECTION_MESSAGE_COLUMNS = (
+    FactMessage.message_date,
+    FactMessage.views,
+    FactMessage.engagement_level
+)
+
+def format_export_cursor(message_date: datetime, channel: str, message_id: int) -> str:
+    """Export cursor resuming after the row with these keys (see `parse_export_cursor`)."""
+    return f"{message_date.isoformat()},{channel},{message_id}"
+
+def parse_export_cursor(cursor: str):
+    """Split an export cursor `<message_date ISO>,<channel>,<message id>`."""
+    try:
+        message_date, channel, message_id = cursor.rsplit(",", 2)
+        return datetime.fromisoformat(message_date), channel, int(message_id)
+    except ValueError:
+        raise ValueError(f"Invalid export cursor '{cursor}'")
+
+def parse_fields(value: Optional[str], columns) -> Optional[List[str]]:
+    """Split and validate a comma-separated `fields=` parameter against `columns`.
+
+    None means every field. Validated up front so streamed responses never
+    fail after they have started.
+    """
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(",") if field.strip()] or None
+    project_columns(columns, fields)
+    return fields
+
+def project_columns(columns, fields: Optional[List[str]]):
+    """The columns named in `fields` (all when None); unknown names raise ValueError."""
+    if fields is None:
+        return columns
+    by_name = {column.key: column for column in columns}
+    unknown = [field for field in fields if field not in by_name]
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(by_name)}"
+        )
+    return tuple(by_name[field] for field in dict.fromkeys(fields))
+
+def _message_from_row(row, projected: bool = False):
+    """Full rows become MessageResponse; projected rows stay plain dicts of the requested keys."""
+    if projected:
+        return dict(row._mapping)
+    return MessageResponse.model_construct(**row._mapping)
+
+def _parse_detected_objects(value) -> List[str]:
+    """detected_objects is JSONB in the table but mapped as text; accept both."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return orjson.loads(value)
+    return value
+
+def _detection_from_row(row, model=DetectionResponse, projected: bool = False):
+    """Build a detection response straight from a column row (no ORM hydration).
+
+    Projected rows are returned as plain dicts holding only the requested keys.
+    """
+    data = dict(row._mapping)
+    if "detected_objects" in data:
+        data["detected_objects"] = _parse_detected_objects(data["detected_objects"])
+    for key, default in (("relative_path", ""), ("filename", ""), ("object_count", 0)):
+        if key in data:
+            data[key] = data[key] or default
+    if projected:
+        return data
+    return model.model_construct(**data)
+
+@track_db_operations
 class MessageCRUD:
     """CRUD operations for messages."""
     
     @staticmethod
-    def search_messages(db: Session, params: MessageSearchParams) -> SearchResult:
-        """Search messages with filters and pagination."""
-        query = db.query(FactMessage)
+    def _search_query(db: Session, params):
+        """Filtered message query shared by paged and streamed search and export.
+
+        `params` is a MessageSearchParams or MessageExportParams; only the
+        columns in its `fields` (all for exports) are selected.
+        """
+        # Message text lives in the staging table (also needed for the text filter)
+        fields = getattr(params, "fields", None)
+        query = db.query(*project_columns(MESSAGE_COLUMNS, fields)).join(
+            StagingTelegramMessage, 
+            and_(
+                FactMessage.channel == StagingTelegramMessage.channel,
+                FactMessage.message_id == StagingTelegramMessage.id
+            )
+        )
         
         # Apply filters
         if params.query:
-            # Search in message text (join with staging table for text)
-            query = query.join(
-                StagingTelegramMessage, 
-                FactMessage.message_id == StagingTelegramMessage.id
-            )
             query = query.filter(
                 StagingTelegramMessage.message_text.ilike(f"%{params.query}%")
             )
@@ -49,34 +157,105 @@ class MessageCRUD:
         if params.min_views:
             query = query.filter(FactMessage.views >= params.min_views)
         
+        detected_object = getattr(params, "detected_object", None)
+        if detected_object:
+            query = query.filter(
+                db.query(ImageDetectionFact.message_id)
+                  .filter(
+                      ImageDetectionFact.channel == FactMessage.channel,
+                      ImageDetectionFact.message_id == FactMessage.message_id,
+                      ImageDetectionFact.detected_objects.contains([detected_object])
+                  )
+                  .exists()
+            )
+        
+        return query
+    
+    @staticmethod
+    def search_messages(db: Session, params: MessageSearchParams):
+        """Search messages with filters and pagination.
+
+        Returns a SearchResult, or a dict of the same shape whose messages hold
+        only the requested keys when `params.fields` is set.
+        """
+        query = MessageCRUD._search_query(db, params)
+        
         # Get total count
         total_count = query.count()
         
         # Apply pagination
         offset = (params.page - 1) * params.page_size
-        messages = query.order_by(desc(FactMessage.message_date))\
-                       .offset(offset)\
-                       .limit(params.page_size)\
-                       .all()
+        rows = query.order_by(desc(FactMessage.message_date))\
+                    .offset(offset)\
+                    .limit(params.page_size)\
+                    .all()
+        
+        if params.fields is not None:
+            return {
+                "total_count": total_count,
+                "page": params.page,
+                "page_size": params.page_size,
+                "messages": [_message_from_row(row, projected=True) for row in rows]
+            }
         
-        return SearchResult(
+        return SearchResult.model_construct(
             total_count=total_count,
             page=params.page,
             page_size=params.page_size,
-            messages=messages
+            messages=[_message_from_row(row) for row in rows]
+        )
+    
+    @staticmethod
+    def iter_search_messages(db: Session, params: MessageSearchParams,
+                             chunk_size: int = 100) -> Iterator[MessageResponse]:
+        """Yield one page of search results as rows arrive, without counting."""
+        offset = (params.page - 1) * params.page_size
+        query = MessageCRUD._search_query(db, params)\
+                           .order_by(desc(FactMessage.message_date))\
+                           .offset(offset)\
+                           .limit(params.page_size)
+        projected = params.fields is not None
+        for row in query.yield_per(chunk_size):
+            yield _message_from_row(row, projected)
+    
+    @staticmethod
+    def _export_query(db: Session, params: MessageExportParams):
+        """Search filters plus the keyset resume predicate, in export order."""
+        query = MessageCRUD._search_query(db, params)
+        
+        # Keyset resume: strictly after the cursor row in export order
+        if params.cursor:
+            cursor_date, cursor_channel, cursor_id = parse_export_cursor(params.cursor)
+            query = query.filter(
+                tuple_(FactMessage.message_date, FactMessage.channel, FactMessage.message_id)
+                > tuple_(cursor_date, cursor_channel, cursor_id)
+            )
+        
+        query = query.order_by(
+            asc(FactMessage.message_date), asc(FactMessage.channel), asc(FactMessage.message_id)
         )
+        if params.limit:
+            query = query.limit(params.limit)
+        return query
+    
+    @staticmethod
+    def iter_export_chunks(db: Session, params: MessageExportParams) -> Iterator[List[Dict[str, Any]]]:
+        """Yield all matching messages in keyset order, one server-side cursor batch at a time."""
+        query = MessageCRUD._export_query(db, params)
+        
+        # yield_per streams from a server-side cursor: memory stays at one batch
+        batch = []
+        for row in query.yield_per(params.chunk_size):
+            batch.append(dict(row._mapping))
+            if len(batch) >= params.chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
     
     @staticmethod
     def get_top_products(db: Session, params: TopProductsParams) -> List[TopProduct]:
         """Get top mentioned products/keywords."""
-        # Define medical/pharmaceutical keywords to search for
-        medical_keywords = [
-            "paracetamol", "ibuprofen", "aspirin", "amoxicillin", "omeprazole",
-            "metformin", "insulin", "vitamin", "antibiotic", "painkiller",
-            "medicine", "tablet", "capsule", "syrup", "injection", "vaccine",
-            "pharmacy", "prescription", "dosage", "treatment", "therapy"
-        ]
-        
         cutoff_date = datetime.now() - timedelta(days=params.days)
         
         # Get messages from the specified period
@@ -95,7 +274,7 @@ class MessageCRUD:
                 continue
                 
             text_lower = message.message_text.lower()
-            for keyword in medical_keywords:
+            for keyword in MEDICAL_KEYWORDS:
                 if keyword in text_lower:
                     if keyword not in keyword_stats:
                         keyword_stats[keyword] = {
@@ -138,23 +317,60 @@ class MessageCRUD:
     @staticmethod
     def get_channel_activity(db: Session, channel_name: str, params: ChannelActivityParams) -> ChannelActivity:
         """Get detailed channel activity analysis."""
-        cutoff_date = datetime.now() - timedelta(days=params.days)
+        activity = MessageCRUD.get_channel_activities(db, [channel_name], params)[channel_name]
+        if activity is None:
+            raise ValueError(f"Channel '{channel_name}' not found")
+        return activity
+    
+    @staticmethod
+    def get_channel_activities(db: Session, channel_names: List[str],
+                               params: ChannelActivityParams) -> Dict[str, Optional[ChannelActivity]]:
+        """Activity analysis for several channels from one set of queries.
         
-        # Get channel stats from dimension table
-        channel_dim = db.query(DimChannel)\
-                       .filter(DimChannel.channel == channel_name)\
-                       .first()
+        The channel lookup, message facts and keyword texts are each fetched
+        once for all channels; facts are filtered on the integer channel key
+        (`channel_key IN (...)`). Unknown channels map to None.
+        """
+        cutoff_date = datetime.now() - timedelta(days=params.days)
+        names = list(dict.fromkeys(channel_names))
         
-        if not channel_dim:
-            raise ValueError(f"Channel '{channel_name}' not found")
+        # Resolve channel keys from the dimension table
+        keys = dict(
+            db.query(DimChannel.channel_key, DimChannel.channel)
+              .filter(DimChannel.channel.in_(names))
+        )
+        known = set(keys.values())
         
         # Get message facts for the period
-        messages_query = db.query(FactMessage)\
-                          .filter(FactMessage.channel == channel_name)\
-                          .filter(FactMessage.message_date >= cutoff_date)
-        
-        messages = messages_query.all()
+        messages_by_channel = defaultdict(list)
+        texts_by_channel = defaultdict(list)
+        if known:
+            messages = db.query(
+                FactMessage.channel_key, FactMessage.message_date, FactMessage.views,
+                FactMessage.has_media, FactMessage.engagement_level
+            ).filter(FactMessage.channel_key.in_(keys))\
+             .filter(FactMessage.message_date >= cutoff_date)
+            for msg in messages:
+                messages_by_channel[keys[msg.channel_key]].append(msg)
+            
+            # Get message texts for keyword analysis
+            if params.include_keywords:
+                texts = db.query(StagingTelegramMessage.channel, StagingTelegramMessage.message_text)\
+                          .filter(StagingTelegramMessage.channel.in_(known))\
+                          .filter(StagingTelegramMessage.message_date >= cutoff_date)
+                for channel, message_text in texts:
+                    texts_by_channel[channel].append(message_text)
         
+        return {
+            name: MessageCRUD._build_channel_activity(
+                name, messages_by_channel[name], texts_by_channel[name], params
+            ) if name in known else None
+            for name in names
+        }
+    
+    @staticmethod
+    def _build_channel_activity(channel_name: str, messages, texts: List[str],
+                                params: ChannelActivityParams) -> ChannelActivity:
         # Calculate statistics
         total_messages = len(messages)
         avg_views = sum(msg.views or 0 for msg in messages) / total_messages if total_messages > 0 else 0
@@ -180,18 +396,12 @@ class MessageCRUD:
         # Top keywords (if requested)
         top_keywords = []
         if params.include_keywords:
-            # Get message texts for keyword analysis
-            text_messages = db.query(StagingTelegramMessage)\
-                             .filter(StagingTelegramMessage.channel == channel_name)\
-                             .filter(StagingTelegramMessage.message_date >= cutoff_date)\
-                             .all()
-            
             # Extract keywords (simple word frequency)
             word_freq = Counter()
-            for msg in text_messages:
-                if msg.message_text:
+            for message_text in texts:
+                if message_text:
                     # Simple word extraction (remove common words)
-                    words = re.findall(r'\b\w{4,}\b', msg.message_text.lower())
+                    words = re.findall(r'\b\w{4,}\b', message_text.lower())
                     for word in words:
                         if word not in ['that', 'this', 'with', 'from', 'they', 'have', 'will', 'been', 'were']:
                             word_freq[word] += 1
@@ -211,36 +421,195 @@ class MessageCRUD:
             top_keywords=top_keywords
         )
 
+    @staticmethod
+    def get_dashboard_data(db: Session, days: int) -> Dict[str, Any]:
+        """Get headline dashboard statistics for the last `days` days.
+        
+        Reads the pre-aggregated daily metrics in a single GROUPING SETS query:
+        the grand total, one row per engagement level and one per channel.
+        Days and channels are filtered and grouped by their integer keys; the
+        small channel dimension supplies the names.
+        """
+        cutoff_key = int((datetime.now() - timedelta(days=days)).strftime("%Y%m%d"))
+        total_channels = db.query(func.count()).select_from(DimChannel).scalar_subquery()
+        
+        rows = db.query(
+            func.grouping(DailyChannelMetric.channel_key).label("by_channel"),
+            func.grouping(DailyChannelMetric.engagement_level).label("by_level"),
+            DimChannel.channel,
+            DailyChannelMetric.engagement_level,
+            func.sum(DailyChannelMetric.message_count).label("message_count"),
+            func.sum(DailyChannelMetric.viewed_message_count).label("viewed_message_count"),
+            func.sum(DailyChannelMetric.total_views).label("total_views"),
+            total_channels.label("total_channels")
+        ).join(
+            DimChannel, DimChannel.channel_key == DailyChannelMetric.channel_key
+        ).filter(
+            DailyChannelMetric.date_key >= cutoff_key
+        ).group_by(
+            func.grouping_sets(
+                tuple_(),
+                tuple_(DailyChannelMetric.engagement_level),
+                tuple_(DailyChannelMetric.channel_key, DimChannel.channel)
+            )
+        ).all()
+        
+        total_messages = 0
+        total_channel_count = 0
+        engagement_dist = {}
+        channel_activity = []
+        for row in rows:
+            total_channel_count = row.total_channels
+            if row.by_channel and row.by_level:
+                total_messages = int(row.message_count or 0)
+            elif row.by_channel:
+                engagement_dist[row.engagement_level] = int(row.message_count)
+            else:
+                avg_views = row.total_views / row.viewed_message_count if row.viewed_message_count else 0
+                channel_activity.append({
+                    "channel": row.channel,
+                    "message_count": int(row.message_count),
+                    "avg_views": float(avg_views)
+                })
+        
+        # Top channels by activity
+        channel_activity.sort(key=lambda item: item["message_count"], reverse=True)
+        
+        return {
+            "period_days": days,
+            "total_messages": total_messages,
+            "total_channels": total_channel_count,
+            "engagement_distribution": engagement_dist,
+            "top_channels": channel_activity[:5]
+        }
+
+@track_db_operations
+class ChannelCRUD:
+    """CRUD operations for channels."""
+    
+    @staticmethod
+    def list_channels(db: Session) -> List[ChannelResponse]:
+        """Get all channels with their summary stats."""
+        rows = db.query(
+            DimChannel.channel,
+            DimChannel.total_messages,
+            DimChannel.first_message_date,
+            DimChannel.last_message_date
+        ).all()
+        return [ChannelResponse.model_construct(**row._mapping) for row in rows]
+
+@track_db_operations
 class DetectionCRUD:
     """CRUD operations for YOLO detections."""
     
     @staticmethod
-    def get_detections_by_channel(db: Session, channel: str, limit: int = 50) -> List[YoloDetection]:
+    def get_detections_by_channel(db: Session, channel: str, limit: int = 50,
+                                  include_message: bool = False,
+                                  fields: Optional[List[str]] = None) -> List[DetectionResponse]:
         """Get object detections for a specific channel."""
-        return db.query(YoloDetection)\
-                .filter(YoloDetection.relative_path.like(f"%{channel}%"))\
-                .order_by(desc(YoloDetection.created_at))\
-                .limit(limit)\
-                .all()
+        return list(DetectionCRUD.iter_detections_by_channel(db, channel, limit, include_message, fields))
+    
+    @staticmethod
+    def iter_detections_by_channel(db: Session, channel: str, limit: int = 50,
+                                   include_message: bool = False,
+                                   fields: Optional[List[str]] = None,
+                                   chunk_size: int = 100) -> Iterator[DetectionResponse]:
+        """Yield a channel's detections, optionally joined to their message facts.
+
+        With `fields`, only those columns are selected and rows are plain dicts.
+        """
+        if include_message:
+            columns = project_columns((*DETECTION_COLUMNS, *DETECTION_MESSAGE_COLUMNS), fields)
+            query = db.query(*columns)\
+                      .select_from(YoloDetection)\
+                      .outerjoin(
+                          FactMessage,
+                          and_(
+                              FactMessage.channel == YoloDetection.channel,
+                              FactMessage.message_id == YoloDetection.message_id
+                          )
+                      )
+            model = DetectionWithMessage
+        else:
+            query = db.query(*project_columns(DETECTION_COLUMNS, fields))
+            model = DetectionResponse
+        
+        query = query.filter(YoloDetection.channel == channel)\
+                     .order_by(desc(YoloDetection.created_at))\
+                     .limit(limit)
+        projected = fields is not None
+        for row in query.yield_per(chunk_size):
+            yield _detection_from_row(row, model, projected)
+    
+    @staticmethod
+    def get_object_engagement(db: Session, object_name: str, days: int) -> Dict[str, Any]:
+        """Engagement of messages whose images contain `object_name`.
+        
+        One GROUPING SETS query over fct_image_detections, filtered through its
+        GIN index on detected_objects: totals, one row per engagement level
+        and one per channel.
+        """
+        cutoff_date = datetime.now() - timedelta(days=days)
+        
+        rows = db.query(
+            func.grouping(ImageDetectionFact.channel).label("by_channel"),
+            func.grouping(ImageDetectionFact.engagement_level).label("by_level"),
+            ImageDetectionFact.channel,
+            ImageDetectionFact.engagement_level,
+            func.count().label("message_count"),
+            func.count(ImageDetectionFact.views).label("viewed_message_count"),
+            func.coalesce(func.sum(ImageDetectionFact.views), 0).label("total_views")
+        ).filter(
+            ImageDetectionFact.detected_objects.contains([object_name]),
+            ImageDetectionFact.message_date >= cutoff_date
+        ).group_by(
+            func.grouping_sets(
+                tuple_(),
+                tuple_(ImageDetectionFact.engagement_level),
+                tuple_(ImageDetectionFact.channel)
+            )
+        ).all()
+        
+        total_messages = 0
+        avg_views = 0.0
+        engagement_dist = {}
+        channels = []
+        for row in rows:
+            row_avg_views = float(row.total_views / row.viewed_message_count) if row.viewed_message_count else 0.0
+            if row.by_channel and row.by_level:
+                total_messages = int(row.message_count)
+                avg_views = row_avg_views
+            elif row.by_channel:
+                engagement_dist[row.engagement_level] = int(row.message_count)
+            else:
+                channels.append({
+                    "channel": row.channel,
+                    "message_count": int(row.message_count),
+                    "avg_views": row_avg_views
+                })
+        channels.sort(key=lambda item: item["message_count"], reverse=True)
+        
+        return {
+            "detected_object": object_name,
+            "period_days": days,
+            "message_count": total_messages,
+            "avg_views": avg_views,
+            "engagement_distribution": engagement_dist,
+            "channels": channels
+        }
     
     @staticmethod
     def get_detection_summary(db: Session) -> Dict[str, Any]:
         """Get summary of all detections."""
         total_detections = db.query(YoloDetection).count()
         
-        # Get most common objects
-        detections = db.query(YoloDetection).all()
+        # Get most common objects (only the objects column is fetched)
         all_objects = []
-        for detection in detections:
-            if detection.detected_objects:
-                # Assuming detected_objects is stored as JSON string
-                try:
-                    objects = json.loads(detection.detected_objects)
-                    all_objects.extend(objects)
-                except:
-                    # If it's already a list or simple string
-                    if isinstance(detection.detected_objects, list):
-                        all_objects.extend(detection.detected_objects)
+        for (detected_objects,) in db.query(YoloDetection.detected_objects).yield_per(1000):
+            try:
+                all_objects.extend(_parse_detected_objects(detected_objects))
+            except orjson.JSONDecodeError:
+                continue
         
         object_freq = Counter(all_objects)
         
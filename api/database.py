@@ -1,6 +1,8 @@
 import os
 import sys
-from sqlalchemy import create_engine
+from functools import partial
+from itertools import islice
+import anyio
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -11,19 +13,16 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 load_dotenv()
 
 # Import configuration
-from utils.config import PG_CONFIG
+from utils.config import DB_POOL_SIZE, DB_MAX_OVERFLOW
+from utils.db import get_engine, READ
 
-# Build database URL
-SQLALCHEMY_DATABASE_URL = (
-    f"postgresql://{PG_CONFIG['user']}:{PG_CONFIG['password']}@"
-    f"{PG_CONFIG['host']}:{PG_CONFIG['port']}/{PG_CONFIG['database']}"
-)
-
-# Create SQLAlchemy engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Shared pooled engines: `engine` is the primary, `read_engine` routes API
+# reads to the replica when PGREADHOST is set (otherwise it is the primary)
+engine = get_engine()
+read_engine = get_engine(READ)
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Create Base class for declarative models
 Base = declarative_base()
@@ -36,3 +35,45 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# One worker thread per pooled connection: blocking queries never occupy the
+# event loop, and threads never pile up waiting on an exhausted pool.
+DB_WORKER_THREADS = DB_POOL_SIZE + DB_MAX_OVERFLOW
+_db_thread_limiter = None
+
+def get_db_thread_limiter() -> anyio.CapacityLimiter:
+    """Capacity limiter shared by all database worker-thread calls."""
+    global _db_thread_limiter
+    if _db_thread_limiter is None:
+        _db_thread_limiter = anyio.CapacityLimiter(DB_WORKER_THREADS)
+    return _db_thread_limiter
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """Run a blocking database call (CRUD method, cached response) in a worker thread."""
+    return await anyio.to_thread.run_sync(
+        partial(func, *args, **kwargs),
+        limiter=get_db_thread_limiter()
+    )
+
+async def iterate_in_db_thread(make_iterator, *args, chunk_size: int = 100, **kwargs):
+    """Drive a blocking row iterator from worker threads with its own session.
+
+    `make_iterator(db, *args, **kwargs)` must return an iterator; it gets a
+    session that stays open until the iteration finishes (request-scoped
+    sessions may already be closed while a streamed response is being sent).
+    Items are pulled `chunk_size` at a time to keep thread hand-offs cheap.
+    """
+    db = await run_in_db_thread(SessionLocal)
+    iterator = None
+    try:
+        iterator = await run_in_db_thread(make_iterator, db, *args, **kwargs)
+        while True:
+            chunk = await run_in_db_thread(lambda: list(islice(iterator, chunk_size)))
+            if not chunk:
+                break
+            for item in chunk:
+                yield item
+    finally:
+        if iterator is not None and hasattr(iterator, "close"):
+            await run_in_db_thread(iterator.close)
+        await run_in_db_thread(db.close)
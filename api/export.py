@@ -0,0 +1,125 @@
+"""
+Bulk message export.
+
+Rows come from `MessageCRUD.iter_export_chunks` (a server-side cursor read in
+`yield_per` batches) and are encoded batch by batch, so memory stays flat no
+matter how many rows are exported. Supported formats: NDJSON, CSV and Parquet
+(Parquet requires `pyarrow`).
+
+Exports are ordered by (message_date, channel, id). To resume an interrupted
+export, pass `cursor=<message_date>,<channel>,<id>` built from the last row
+received. A completed export also reports the cursor after its last row (the
+next page when `limit` was set): NDJSON ends with a `{"cursor": ...}` record,
+CSV with a `# cursor=...` comment line (read with e.g. pandas' `comment="#"`)
+and Parquet files carry it as the `export_cursor` key-value metadata.
+"""
+
+import csv
+import io
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from api.crud import format_export_cursor
+from api.responses import dumps
+
+EXPORT_COLUMNS = [
+    "id", "message_date", "channel", "message_text", "views", "has_media",
+    "message_length", "engagement_level", "loaded_at"
+]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def check_format_available(fmt: str) -> None:
+    """Fail before streaming starts if the format's encoder is not installed."""
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Parquet export requires the 'pyarrow' package")
+
+def _last_cursor(rows: List[Dict[str, Any]], cursor: Optional[str]) -> Optional[str]:
+    if not rows:
+        return cursor
+    last = rows[-1]
+    return format_export_cursor(last["message_date"], last["channel"], last["id"])
+
+async def encode_ndjson(chunks: AsyncIterator[List[Dict[str, Any]]], cursor: Optional[str] = None):
+    async for rows in chunks:
+        cursor = _last_cursor(rows, cursor)
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+    yield dumps({"cursor": cursor}) + b"\n"
+
+async def encode_csv(chunks: AsyncIterator[List[Dict[str, Any]]], cursor: Optional[str] = None):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    async for rows in chunks:
+        cursor = _last_cursor(rows, cursor)
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # Written raw: a quoted field would hide the comment marker
+    if cursor is not None:
+        buffer.write(f"# cursor={cursor}{writer.writer.dialect.lineterminator}")
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each row group."""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+async def encode_parquet(chunks: AsyncIterator[List[Dict[str, Any]]], cursor: Optional[str] = None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("message_date", pa.timestamp("us")),
+        ("channel", pa.string()),
+        ("message_text", pa.string()),
+        ("views", pa.int64()),
+        ("has_media", pa.bool_()),
+        ("message_length", pa.int64()),
+        ("engagement_level", pa.string()),
+        ("loaded_at", pa.timestamp("us")),
+    ])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        # One row group per cursor batch
+        async for rows in chunks:
+            cursor = _last_cursor(rows, cursor)
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+        if cursor is not None:
+            writer.add_key_value_metadata({"export_cursor": cursor})
+    finally:
+        writer.close()
+    yield sink.drain()
+
+ENCODERS = {
+    "ndjson": encode_ndjson,
+    "csv": encode_csv,
+    "parquet": encode_parquet,
+}
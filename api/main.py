@@ -1,16 +1,29 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import logging
 from datetime import datetime
 
-from api.database import get_db
-from api.crud import MessageCRUD, DetectionCRUD
+from api.database import get_db, run_in_db_thread, iterate_in_db_thread
+from api.cache import response_cache
+from api.responses import ORJSONResponse, api_response, encoded_list_response, stream_api_response
+from api.batch import run_batch
+from api.export import ENCODERS, MEDIA_TYPES, check_format_available
+from api.compression import CompressionMiddleware
+from api.admission import AdmissionMiddleware, BULK, HEAVY, EXEMPT, admission_stats
+from api.metrics import MetricsMiddleware, install_instrumentation, render_metrics
+from utils.db import pool_stats
+from api.crud import (
+    MessageCRUD, ChannelCRUD, DetectionCRUD, parse_export_cursor, parse_fields,
+    MESSAGE_COLUMNS, DETECTION_COLUMNS, DETECTION_MESSAGE_COLUMNS
+)
 from api.schemas import (
     APIResponse, ErrorResponse, MessageResponse, ChannelResponse,
     TopProduct, ChannelActivity, SearchResult, DetectionResponse,
-    MessageSearchParams, TopProductsParams, ChannelActivityParams
+    MessageSearchParams, MessageExportParams, TopProductsParams, ChannelActivityParams,
+    BatchRequest
 )
 
 # Configure logging
@@ -23,9 +36,34 @@ app = FastAPI(
     description="API for analyzing medical data from Telegram channels",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
+# gzip/brotli for responses above COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
+# Admission classes by route template; other routes are light
+ENDPOINT_CLASSES = {
+    "/api/reports/top-products": HEAVY,
+    "/api/channels/{channel_name}/activity": HEAVY,
+    "/api/search/messages": HEAVY,
+    "/api/analytics/dashboard": HEAVY,
+    "/api/export/messages": BULK,
+    # Each report of a batch also takes a slot in its own class (api/batch.py)
+    "/api/batch": BULK,
+    "/health": EXEMPT,
+    "/metrics": EXEMPT,
+    "/docs": EXEMPT,
+    "/redoc": EXEMPT,
+    "/openapi.json": EXEMPT,
+}
+app.add_middleware(AdmissionMiddleware, routes=app.router.routes, classes=ENDPOINT_CLASSES)
+
+# Request, SQL and pool instrumentation (exposed on /metrics)
+install_instrumentation()
+app.add_middleware(MetricsMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -42,12 +80,25 @@ async def health_check():
     return APIResponse(
         success=True,
         message="API is healthy",
-        data={"status": "ok", "timestamp": datetime.now()}
+        data={
+            "status": "ok",
+            "timestamp": datetime.now(),
+            "db_pool": pool_stats(),
+            "admission": admission_stats()
+        }
     )
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 # Top products endpoint
 @app.get("/api/reports/top-products", response_model=APIResponse)
 async def get_top_products(
+    request: Request,
     limit: int = Query(10, ge=1, le=100, description="Number of top products"),
     channel: Optional[str] = Query(None, description="Filter by channel"),
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
@@ -68,13 +119,17 @@ async def get_top_products(
             min_mentions=min_mentions
         )
         
-        top_products = MessageCRUD.get_top_products(db, params)
+        def build():
+            top_products = MessageCRUD.get_top_products(db, params)
+            return APIResponse(
+                success=True,
+                message=f"Retrieved top {len(top_products)} products",
+                data=top_products,
+                total_count=len(top_products)
+            )
         
-        return APIResponse(
-            success=True,
-            message=f"Retrieved top {len(top_products)} products",
-            data=top_products,
-            total_count=len(top_products)
+        return await run_in_db_thread(
+            response_cache.respond, request, db, "top-products", params.model_dump(), build
         )
     
     except Exception as e:
@@ -84,6 +139,7 @@ async def get_top_products(
 # Channel activity endpoint
 @app.get("/api/channels/{channel_name}/activity", response_model=APIResponse)
 async def get_channel_activity(
+    request: Request,
     channel_name: str,
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     include_keywords: bool = Query(True, description="Include keyword analysis"),
@@ -103,12 +159,17 @@ async def get_channel_activity(
             keyword_limit=keyword_limit
         )
         
-        activity = MessageCRUD.get_channel_activity(db, channel_name, params)
+        def build():
+            activity = MessageCRUD.get_channel_activity(db, channel_name, params)
+            return APIResponse(
+                success=True,
+                message=f"Retrieved activity for channel {channel_name}",
+                data=activity
+            )
         
-        return APIResponse(
-            success=True,
-            message=f"Retrieved activity for channel {channel_name}",
-            data=activity
+        return await run_in_db_thread(
+            response_cache.respond, request, db, "channel-activity",
+            {"channel": channel_name, **params.model_dump()}, build
         )
     
     except ValueError as e:
@@ -128,6 +189,8 @@ async def search_messages(
     min_views: Optional[int] = Query(None, ge=0, description="Minimum views filter"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    stream: bool = Query(False, description="Stream the page as rows arrive (total_count omitted)"),
+    fields: Optional[str] = Query(None, description="Comma-separated message fields to return (default: all)"),
     db: Session = Depends(get_db)
 ):
     """
@@ -145,32 +208,96 @@ async def search_messages(
             has_media=has_media,
             min_views=min_views,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            fields=parse_fields(fields, MESSAGE_COLUMNS)
         )
         
-        results = MessageCRUD.search_messages(db, params)
+        if stream:
+            return stream_api_response(
+                iterate_in_db_thread(MessageCRUD.iter_search_messages, params),
+                message="Streaming messages matching query"
+            )
+        
+        results = await run_in_db_thread(MessageCRUD.search_messages, db, params)
+        total_count = results["total_count"] if isinstance(results, dict) else results.total_count
         
-        return APIResponse(
-            success=True,
-            message=f"Found {results.total_count} messages matching query",
+        return api_response(
+            message=f"Found {total_count} messages matching query",
             data=results
         )
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error searching messages: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Bulk export endpoint
+@app.get("/api/export/messages")
+async def export_messages(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$", description="Output format"),
+    query: Optional[str] = Query(None, description="Text filter"),
+    channel: Optional[str] = Query(None, description="Filter by channel"),
+    start_date: Optional[datetime] = Query(None, description="Start date filter"),
+    end_date: Optional[datetime] = Query(None, description="End date filter"),
+    has_media: Optional[bool] = Query(None, description="Filter by media presence"),
+    min_views: Optional[int] = Query(None, ge=0, description="Minimum views filter"),
+    detected_object: Optional[str] = Query(None, description="Only messages whose image contains this object"),
+    cursor: Optional[str] = Query(None, description="Resume after this row: <message_date>,<channel>,<id>"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum rows to export"),
+    chunk_size: int = Query(5000, ge=100, le=50000, description="Rows per server-side cursor batch")
+):
+    """
+    Stream every message matching the filters as NDJSON, CSV or Parquet.
+    
+    Rows are read through a server-side cursor and encoded batch by batch, so
+    memory use is flat for any result size. Output is ordered by
+    (message_date, channel, id); an interrupted export resumes by passing the
+    last received row as `cursor`. The cursor after the last row ends the
+    output: a `{"cursor": ...}` record in NDJSON, a `# cursor=...` comment
+    line in CSV and the `export_cursor` metadata in Parquet.
+    """
+    params = MessageExportParams(
+        query=query,
+        channel=channel,
+        start_date=start_date,
+        end_date=end_date,
+        has_media=has_media,
+        min_views=min_views,
+        detected_object=detected_object,
+        format=format,
+        cursor=cursor,
+        limit=limit,
+        chunk_size=chunk_size
+    )
+    
+    try:
+        if params.cursor:
+            parse_export_cursor(params.cursor)
+        check_format_available(params.format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    chunks = iterate_in_db_thread(MessageCRUD.iter_export_chunks, params, chunk_size=1)
+    return StreamingResponse(
+        ENCODERS[params.format](chunks, params.cursor),
+        media_type=MEDIA_TYPES[params.format],
+        headers={
+            "Content-Disposition": f'attachment; filename="messages.{params.format}"'
+        }
+    )
+
 # Additional utility endpoints
 
 @app.get("/api/channels", response_model=APIResponse)
 async def list_channels(db: Session = Depends(get_db)):
     """Get list of all available channels."""
     try:
-        from api.models import DimChannel
-        channels = db.query(DimChannel).all()
+        channels = await run_in_db_thread(ChannelCRUD.list_channels, db)
         
-        return APIResponse(
-            success=True,
+        return api_response(
             message=f"Retrieved {len(channels)} channels",
             data=channels,
             total_count=len(channels)
@@ -184,10 +311,9 @@ async def list_channels(db: Session = Depends(get_db)):
 async def get_detection_summary(db: Session = Depends(get_db)):
     """Get summary of YOLO object detection results."""
     try:
-        summary = DetectionCRUD.get_detection_summary(db)
+        summary = await run_in_db_thread(DetectionCRUD.get_detection_summary, db)
         
-        return APIResponse(
-            success=True,
+        return api_response(
             message="Retrieved detection summary",
             data=summary
         )
@@ -196,107 +322,135 @@ async def get_detection_summary(db: Session = Depends(get_db)):
         logger.error(f"Error getting detection summary: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/detections/objects/{object_name}", response_model=APIResponse)
+async def get_object_engagement(
+    object_name: str,
+    days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
+    db: Session = Depends(get_db)
+):
+    """Engagement of messages whose images contain a detected object (e.g. `bottle`)."""
+    try:
+        engagement = await run_in_db_thread(DetectionCRUD.get_object_engagement, db, object_name, days)
+        
+        return api_response(
+            message=f"Retrieved engagement for messages with '{object_name}'",
+            data=engagement,
+            total_count=engagement["message_count"]
+        )
+    
+    except Exception as e:
+        logger.error(f"Error getting object engagement: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/channels/{channel_name}/detections", response_model=APIResponse)
 async def get_channel_detections(
     channel_name: str,
     limit: int = Query(50, ge=1, le=200, description="Number of detections to return"),
+    include_message: bool = Query(False, description="Join each detection to its message facts"),
+    stream: bool = Query(False, description="Stream detections as rows arrive"),
+    fields: Optional[str] = Query(None, description="Comma-separated detection fields to return (default: all)"),
     db: Session = Depends(get_db)
 ):
     """Get object detection results for a specific channel."""
     try:
-        detections = DetectionCRUD.get_detections_by_channel(db, channel_name, limit)
+        columns = DETECTION_COLUMNS + (DETECTION_MESSAGE_COLUMNS if include_message else ())
+        selected_fields = parse_fields(fields, columns)
+        if stream:
+            return stream_api_response(
+                iterate_in_db_thread(
+                    DetectionCRUD.iter_detections_by_channel,
+                    channel_name, limit, include_message, selected_fields
+                ),
+                message=f"Streaming detections for {channel_name}"
+            )
         
-        return APIResponse(
-            success=True,
+        detections = await run_in_db_thread(
+            DetectionCRUD.get_detections_by_channel,
+            db, channel_name, limit, include_message, selected_fields
+        )
+        
+        return api_response(
             message=f"Retrieved {len(detections)} detections for {channel_name}",
             data=detections,
             total_count=len(detections)
         )
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting channel detections: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/analytics/dashboard", response_model=APIResponse)
 async def get_dashboard_data(
+    request: Request,
     days: int = Query(7, ge=1, le=90, description="Number of days for dashboard data"),
     db: Session = Depends(get_db)
 ):
     """Get comprehensive dashboard data."""
     try:
-        from api.models import FactMessage, DimChannel
-        from datetime import timedelta
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        # Get basic stats
-        total_messages = db.query(FactMessage).filter(
-            FactMessage.message_date >= cutoff_date
-        ).count()
-        
-        total_channels = db.query(DimChannel).count()
-        
-        # Get engagement distribution
-        engagement_query = db.query(
-            FactMessage.engagement_level,
-            func.count(FactMessage.message_id).label('count')
-        ).filter(
-            FactMessage.message_date >= cutoff_date
-        ).group_by(FactMessage.engagement_level).all()
+        def build():
+            dashboard_data = MessageCRUD.get_dashboard_data(db, days)
+            return APIResponse(
+                success=True,
+                message="Retrieved dashboard data",
+                data=dashboard_data
+            )
         
-        engagement_dist = {level: count for level, count in engagement_query}
-        
-        # Get top channels by activity
-        channel_activity = db.query(
-            FactMessage.channel,
-            func.count(FactMessage.message_id).label('message_count'),
-            func.avg(FactMessage.views).label('avg_views')
-        ).filter(
-            FactMessage.message_date >= cutoff_date
-        ).group_by(FactMessage.channel)\
-         .order_by(func.count(FactMessage.message_id).desc())\
-         .limit(5).all()
-        
-        dashboard_data = {
-            "period_days": days,
-            "total_messages": total_messages,
-            "total_channels": total_channels,
-            "engagement_distribution": engagement_dist,
-            "top_channels": [
-                {
-                    "channel": channel,
-                    "message_count": msg_count,
-                    "avg_views": float(avg_views) if avg_views else 0
-                }
-                for channel, msg_count, avg_views in channel_activity
-            ]
-        }
-        
-        return APIResponse(
-            success=True,
-            message="Retrieved dashboard data",
-            data=dashboard_data
+        return await run_in_db_thread(
+            response_cache.respond, request, db, "dashboard", {"days": days}, build
         )
     
     except Exception as e:
         logger.error(f"Error getting dashboard data: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Batch reports endpoint
+@app.post("/api/batch", response_model=APIResponse)
+async def run_batch_reports(batch: BatchRequest):
+    """
+    Run many reports (channel activity, channel detections, top products) in one request.
+    
+    Identical reports run once, cached reports come from the response cache,
+    and channel activity for many channels is computed with one set of
+    queries. `data` holds one envelope per requested report, in order, each
+    as the single-report endpoint would return it; a failing report only
+    fails its own entry.
+    """
+    try:
+        results = await run_batch(batch.requests)
+        
+        return encoded_list_response(
+            results,
+            message=f"Ran {len(results)} reports",
+            total_count=len(results)
+        )
+    
+    except Exception as e:
+        logger.error(f"Error running batch reports: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return ErrorResponse(
-        success=False,
-        message="Resource not found",
-        error_code="NOT_FOUND"
+    return ORJSONResponse(
+        status_code=404,
+        content=ErrorResponse(
+            success=False,
+            message=getattr(exc, "detail", None) or "Resource not found",
+            error_code="NOT_FOUND"
+        ).model_dump()
     )
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
-    return ErrorResponse(
-        success=False,
-        message="Internal server error",
-        error_code="INTERNAL_ERROR"
+    return ORJSONResponse(
+        status_code=500,
+        content=ErrorResponse(
+            success=False,
+            message="Internal server error",
+            error_code="INTERNAL_ERROR"
+        ).model_dump()
     )
 
 if __name__ == "__main__":
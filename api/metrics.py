@@ -0,0 +1,221 @@
+"""
+Prometheus instrumentation for the API.
+
+- `MetricsMiddleware` records request latency per route template and status.
+- SQLAlchemy cursor events time every statement and label it with the CRUD
+  method that issued it (see `track_db_operations`).
+- Pool checkouts report how long they waited for a connection.
+- Statements slower than SLOW_QUERY_MS are logged, optionally with their
+  EXPLAIN plan (SLOW_QUERY_EXPLAIN=true). Parameter values are redacted
+  unless SLOW_QUERY_LOG_PARAMS=true.
+- Admission control queue depth, in-flight requests and rejections per
+  endpoint class (see `api/admission.py`).
+
+Everything is exposed on `/metrics` via `render_metrics()`.
+"""
+
+import functools
+import inspect
+import logging
+import time
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from api.admission import admission_stats
+from utils.config import SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN, SLOW_QUERY_LOG_PARAMS
+from utils.db import on_pool_checkout, pool_stats
+
+logger = logging.getLogger("api.slow_queries")
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route", "status"]
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    ["operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total",
+    "SQL statements slower than SLOW_QUERY_MS",
+    ["operation"]
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["role"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+
+# CRUD method currently issuing queries, used to label statement timings
+db_operation: ContextVar[str] = ContextVar("db_operation", default="other")
+
+def _wrap_operation(name: str, func):
+    if inspect.isgeneratorfunction(func):
+        # Generators run step by step (possibly on different worker threads),
+        # so the label is set around each step rather than once
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            iterator = func(*args, **kwargs)
+            while True:
+                token = db_operation.set(name)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    db_operation.reset(token)
+                yield item
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = db_operation.set(name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            db_operation.reset(token)
+    return wrapper
+
+def track_db_operations(cls):
+    """Class decorator: label queries issued by each static CRUD method with its name."""
+    for attr, value in list(vars(cls).items()):
+        if isinstance(value, staticmethod) and not attr.startswith("_"):
+            name = f"{cls.__name__}.{attr}"
+            setattr(cls, attr, staticmethod(_wrap_operation(name, value.__func__)))
+    return cls
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    operation = db_operation.get()
+    DB_QUERY_LATENCY.labels(operation=operation).observe(elapsed)
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        DB_SLOW_QUERIES.labels(operation=operation).inc()
+        plan = None
+        if SLOW_QUERY_EXPLAIN and not executemany and statement.lstrip().upper().startswith("SELECT"):
+            plan = _explain(cursor, statement, parameters)
+        logger.warning(
+            f"Slow query ({elapsed * 1000:.1f} ms) in {operation}: {statement} "
+            f"params={_format_parameters(parameters)}" + (f"\n{plan}" if plan else "")
+        )
+
+def _format_parameters(parameters) -> str:
+    """Bound parameters for the slow-query log: values only with SLOW_QUERY_LOG_PARAMS, else just their names."""
+    if SLOW_QUERY_LOG_PARAMS:
+        return repr(parameters)
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name!r}: <redacted>" for name in parameters) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return f"<{len(parameters)} redacted>"
+    return "<redacted>"
+
+def _explain(cursor, statement, parameters):
+    """EXPLAIN a statement on the same DBAPI connection (outside SQLAlchemy events)."""
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute("EXPLAIN " + statement, parameters)
+            return "\n".join(row[0] for row in explain_cursor.fetchall())
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        return f"(EXPLAIN failed: {e})"
+
+def _record_checkout_wait(role: str, seconds: float):
+    DB_POOL_CHECKOUT_WAIT.labels(role=role).observe(seconds)
+
+class PoolStatsCollector:
+    """Exposes current pool usage (from the engine registry) at scrape time."""
+
+    def collect(self):
+        gauges = {
+            "checked_out": GaugeMetricFamily("db_pool_checked_out", "Connections in use", labels=["role"]),
+            "checked_in": GaugeMetricFamily("db_pool_checked_in", "Idle pooled connections", labels=["role"]),
+            "overflow": GaugeMetricFamily("db_pool_overflow", "Overflow connections beyond pool_size", labels=["role"]),
+            "size": GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["role"]),
+        }
+        for role, stats in pool_stats().items():
+            for key, gauge in gauges.items():
+                gauge.add_metric([role], stats[key])
+        return list(gauges.values())
+
+class AdmissionStatsCollector:
+    """Exposes admission control state per endpoint class at scrape time."""
+
+    def collect(self):
+        queue_depth = GaugeMetricFamily(
+            "api_admission_queue_depth", "Requests waiting for an admission slot", labels=["class"]
+        )
+        in_flight = GaugeMetricFamily(
+            "api_admission_in_flight", "Requests holding an admission slot", labels=["class"]
+        )
+        rejected = CounterMetricFamily(
+            "api_admission_rejected", "Requests shed with 503", labels=["class", "reason"]
+        )
+        for name, stats in admission_stats().items():
+            queue_depth.add_metric([name], stats["queue_depth"])
+            in_flight.add_metric([name], stats["in_flight"])
+            rejected.add_metric([name, "queue_full"], stats["rejected_queue_full"])
+            rejected.add_metric([name, "timeout"], stats["rejected_timeout"])
+        return [queue_depth, in_flight, rejected]
+
+_installed = False
+
+def install_instrumentation():
+    """Register SQL, pool and collector hooks (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    on_pool_checkout(_record_checkout_wait)
+    REGISTRY.register(PoolStatsCollector())
+    REGISTRY.register(AdmissionStatsCollector())
+    _installed = True
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency by route template and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status["code"])
+            ).observe(time.perf_counter() - start)
+
+def render_metrics():
+    """Prometheus exposition payload and content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
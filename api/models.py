@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, Date, DateTime, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.dialects.postgresql import ARRAY
 from api.database import Base
 
 class TelegramMessage(Base):
@@ -7,12 +8,12 @@ class TelegramMessage(Base):
     __tablename__ = "telegram_messages"
     __table_args__ = {"schema": "raw"}
     
+    channel = Column(String(255), primary_key=True)
     id = Column(Integer, primary_key=True)
     date = Column(DateTime)
     text = Column(Text)
     views = Column(Integer)
     has_media = Column(Boolean)
-    channel = Column(String(255))
     media_path = Column(String(500))
 
 class StagingTelegramMessage(Base):
@@ -25,7 +26,7 @@ class StagingTelegramMessage(Base):
     message_text = Column(Text)
     views = Column(Integer)
     has_media = Column(Boolean)
-    channel = Column(String(255))
+    channel = Column(String(255), primary_key=True)
     loaded_at = Column(DateTime)
 
 class DimChannel(Base):
@@ -33,7 +34,8 @@ class DimChannel(Base):
     __tablename__ = "dim_channels"
     __table_args__ = {"schema": "dbt_public"}
     
-    channel = Column(String(255), primary_key=True)
+    channel_key = Column(Integer, primary_key=True)
+    channel = Column(String(255), unique=True)
     total_messages = Column(Integer)
     first_message_date = Column(DateTime)
     last_message_date = Column(DateTime)
@@ -43,35 +45,81 @@ class DimDate(Base):
     __tablename__ = "dim_dates"
     __table_args__ = {"schema": "dbt_public"}
     
-    message_date = Column(DateTime, primary_key=True)
+    date_key = Column(Integer, primary_key=True)
+    date = Column(Date, unique=True)
     year = Column(Integer)
+    quarter = Column(Integer)
     month = Column(Integer)
-    day = Column(Integer)
+    month_name = Column(String(20))
+    day_of_month = Column(Integer)
     day_of_week = Column(Integer)
+    day_name = Column(String(20))
+    iso_year = Column(Integer)
+    iso_week = Column(Integer)
+    week_start_date = Column(Date)
+    month_start_date = Column(Date)
+    is_weekend = Column(Boolean)
 
 class FactMessage(Base):
     """Message facts table from dbt."""
     __tablename__ = "fct_messages"
     __table_args__ = {"schema": "dbt_public"}
     
+    # Telegram message ids are only unique within a channel
+    channel = Column(String(255), primary_key=True)
     message_id = Column(Integer, primary_key=True)
     message_date = Column(DateTime)
-    channel = Column(String(255))
+    date_key = Column(Integer)
+    channel_key = Column(Integer)
     message_length = Column(Integer)
     views = Column(Integer)
     has_media = Column(Boolean)
     engagement_level = Column(String(50))
     loaded_at = Column(DateTime)
 
+class DailyChannelMetric(Base):
+    """Daily channel x engagement aggregates from dbt (dashboard source)."""
+    __tablename__ = "agg_daily_channel_metrics"
+    __table_args__ = {"schema": "dbt_public"}
+    
+    date_key = Column(Integer, primary_key=True)
+    channel_key = Column(Integer, primary_key=True)
+    engagement_level = Column(String(50), primary_key=True)
+    message_count = Column(Integer)
+    viewed_message_count = Column(Integer)
+    total_views = Column(BigInteger)
+    media_message_count = Column(Integer)
+
+class ImageDetectionFact(Base):
+    """YOLO detections linked to their messages, one row per message (dbt mart)."""
+    __tablename__ = "fct_image_detections"
+    __table_args__ = {"schema": "dbt_public"}
+    
+    channel = Column(String(255), primary_key=True)
+    message_id = Column(Integer, primary_key=True)
+    message_date = Column(DateTime)
+    date_key = Column(Integer)
+    channel_key = Column(Integer)
+    views = Column(Integer)
+    engagement_level = Column(String(50))
+    image_count = Column(Integer)
+    detected_objects = Column(ARRAY(Text))
+    object_count = Column(Integer)
+
 class YoloDetection(Base):
     """YOLO object detection results."""
     __tablename__ = "yolo_detections"
-    __table_args__ = {"schema": "enriched"}
+    __table_args__ = (
+        Index("ix_yolo_detections_channel_message", "channel", "message_id"),
+        {"schema": "enriched"},
+    )
     
     id = Column(Integer, primary_key=True)
     file_path = Column(String(500))
     relative_path = Column(String(500))
     filename = Column(String(255))
+    channel = Column(String(255))
+    message_id = Column(Integer)
     detected_objects = Column(Text)  # JSON array as text
     object_count = Column(Integer)
     confidence_score = Column(Float)
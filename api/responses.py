@@ -0,0 +1,72 @@
+"""
+Response helpers for the API.
+
+Endpoints build typed schemas straight from query rows and hand them to
+`ORJSONResponse`, skipping FastAPI's response_model validation and the stdlib
+JSON encoder. `stream_api_response` emits the same envelope incrementally for
+large lists, so a page is never held in memory as a whole.
+"""
+
+from decimal import Decimal
+from typing import Any, AsyncIterator, Iterable, List, Optional
+
+import orjson
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def api_response(data: Any = None, message: str = "Success",
+                 total_count: Optional[int] = None) -> ORJSONResponse:
+    """Standard APIResponse envelope, serialized without re-validation."""
+    return ORJSONResponse({
+        "success": True,
+        "message": message,
+        "data": data,
+        "total_count": total_count
+    })
+
+def encoded_list_response(items: List[bytes], message: str = "Success",
+                          total_count: Optional[int] = None) -> Response:
+    """APIResponse envelope whose `data` list is built from already-encoded JSON items."""
+    body = (
+        b'{"success":true,"message":' + dumps(message)
+        + b',"total_count":' + dumps(total_count)
+        + b',"data":[' + b",".join(items) + b"]}"
+    )
+    return Response(content=body, media_type="application/json")
+
+def stream_api_response(items: AsyncIterator[Any], message: str = "Success",
+                        total_count: Optional[int] = None) -> StreamingResponse:
+    """Stream an APIResponse envelope whose `data` is a list, item by item."""
+    async def body():
+        yield (
+            b'{"success":true,"message":' + dumps(message)
+            + b',"total_count":' + dumps(total_count)
+            + b',"data":['
+        )
+        first = True
+        async for item in items:
+            yield (b"" if first else b",") + dumps(item)
+            first = False
+        yield b"]}"
+
+    return StreamingResponse(body(), media_type="application/json")
@@ -70,12 +70,20 @@ class DetectionBase(BaseModel):
 class DetectionResponse(DetectionBase):
     """Response schema for detection data."""
     id: int
+    channel: Optional[str] = None
+    message_id: Optional[int] = None
     confidence_score: Optional[float] = None
     created_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class DetectionWithMessage(DetectionResponse):
+    """Detection joined to the message that carried the image."""
+    message_date: Optional[datetime] = None
+    views: Optional[int] = None
+    engagement_level: Optional[str] = None
+
 # API Response wrappers
 class APIResponse(BaseModel):
     """Standard API response wrapper."""
@@ -102,6 +110,7 @@ class MessageSearchParams(BaseModel):
     min_views: Optional[int] = Field(None, ge=0, description="Minimum views filter")
     page: int = Field(1, ge=1, description="Page number")
     page_size: int = Field(20, ge=1, le=100, description="Items per page")
+    fields: Optional[List[str]] = Field(None, description="Message fields to return (default: all)")
 
 class TopProductsParams(BaseModel):
     """Parameters for top products endpoint."""
@@ -115,3 +124,35 @@ class ChannelActivityParams(BaseModel):
     days: int = Field(30, ge=1, le=365, description="Number of days to analyze")
     include_keywords: bool = Field(True, description="Include keyword analysis")
     keyword_limit: int = Field(10, ge=1, le=50, description="Number of top keywords")
+
+class MessageExportParams(BaseModel):
+    """Filters and output options for bulk message export."""
+    query: Optional[str] = Field(None, description="Text filter")
+    channel: Optional[str] = Field(None, description="Filter by channel")
+    start_date: Optional[datetime] = Field(None, description="Start date filter")
+    end_date: Optional[datetime] = Field(None, description="End date filter")
+    has_media: Optional[bool] = Field(None, description="Filter by media presence")
+    min_views: Optional[int] = Field(None, ge=0, description="Minimum views filter")
+    detected_object: Optional[str] = Field(None, description="Only messages whose image contains this object")
+    format: str = Field("ndjson", pattern="^(ndjson|csv|parquet)$", description="Output format")
+    cursor: Optional[str] = Field(None, description="Resume after this row (message_date,channel,id)")
+    limit: Optional[int] = Field(None, ge=1, description="Maximum rows to export")
+    chunk_size: int = Field(5000, ge=100, le=50000, description="Rows fetched per server-side cursor batch")
+
+class DetectionListParams(BaseModel):
+    """Parameters for a channel's detection list."""
+    limit: int = Field(50, ge=1, le=200, description="Number of detections to return")
+    include_message: bool = Field(False, description="Join each detection to its message facts")
+    fields: Optional[str] = Field(None, description="Comma-separated detection fields to return (default: all)")
+
+class BatchReportRequest(BaseModel):
+    """One report in a batch request."""
+    type: str = Field(
+        ..., pattern="^(channel_activity|channel_detections|top_products)$", description="Report type"
+    )
+    channel: Optional[str] = Field(None, description="Channel (channel_activity, channel_detections)")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Query parameters of the single report endpoint")
+
+class BatchRequest(BaseModel):
+    """Reports to run in one batch request."""
+    requests: List[BatchReportRequest] = Field(..., min_length=1, max_length=100)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Check that date-window API queries prune fct_messages partitions.
+
+Runs the dashboard, channel activity and search CRUD calls against the
+database, captures every SQL statement they issue, and EXPLAINs each one with
+its parameters inlined (as psycopg2 sends them, so pruning happens at plan
+time). For every statement touching fct_messages it lists the monthly
+partitions in the plan and fails if any lies outside the query window.
+
+Usage:
+    python benchmarks/check_query_plans.py --days 7
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+
+from api.crud import MessageCRUD
+from api.database import SessionLocal, read_engine
+from api.models import DimChannel
+from api.schemas import ChannelActivityParams, MessageSearchParams
+
+PARTITION_PATTERN = re.compile(r"^fct_messages_(p\d{6}|default)$")
+
+def capture_statements(func):
+    """Run `func()` and return the (statement, parameters) pairs it executed."""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(read_engine, "before_cursor_execute", listener)
+    try:
+        func()
+    finally:
+        event.remove(read_engine, "before_cursor_execute", listener)
+    return statements
+
+def plan_relations(plan):
+    """All relation names scanned anywhere in a JSON plan tree."""
+    relations = set()
+    if "Relation Name" in plan:
+        relations.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        relations |= plan_relations(child)
+    return relations
+
+def explain(statement, parameters):
+    raw_connection = read_engine.raw_connection()
+    try:
+        cursor = raw_connection.cursor()
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+    finally:
+        raw_connection.close()
+
+def all_partitions():
+    raw_connection = read_engine.raw_connection()
+    try:
+        cursor = raw_connection.cursor()
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'fct_messages'"
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+    finally:
+        raw_connection.close()
+
+def window_partitions(days):
+    """Partition names for every month overlapping the last `days` days."""
+    start = (datetime.now() - timedelta(days=days)).date().replace(day=1)
+    end = datetime.now().date()
+    names = set()
+    month = start
+    while month <= end:
+        names.add(f"fct_messages_p{month:%Y%m}")
+        month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return names
+
+def check(name, func, days, expect_facts=True):
+    allowed = window_partitions(days) | {"fct_messages_default"}
+    ok = True
+    touched_facts = False
+    for statement, parameters in capture_statements(func):
+        relations = plan_relations(explain(statement, parameters))
+        partitions = {relation for relation in relations if PARTITION_PATTERN.match(relation)}
+        if not partitions:
+            continue
+        touched_facts = True
+        outside = partitions - allowed
+        status = "✅" if not outside else "❌"
+        ok = ok and not outside
+        print(f"{status} {name}: scans {len(partitions)} partition(s): {', '.join(sorted(partitions))}")
+        if outside:
+            print(f"   outside the {days}-day window: {', '.join(sorted(outside))}")
+
+    if not expect_facts and not touched_facts:
+        print(f"✅ {name}: reads pre-aggregated tables only, no fct_messages partitions")
+    elif expect_facts and not touched_facts:
+        print(f"⚠️  {name}: no statement touched fct_messages")
+    elif not expect_facts:
+        ok = False
+        print(f"❌ {name}: expected to read only pre-aggregated tables")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=7, help="Query window in days")
+    parser.add_argument("--channel", help="Channel for the activity query (default: first channel)")
+    parser.add_argument("--query", default="tablet", help="Search term")
+    args = parser.parse_args()
+
+    partitions = all_partitions()
+    if not partitions:
+        sys.exit("❌ fct_messages is not partitioned; run `dbt run --full-refresh` first.")
+    print(f"ℹ️  fct_messages has {len(partitions)} partitions")
+
+    db = SessionLocal()
+    try:
+        channel = args.channel or db.query(DimChannel.channel).order_by(DimChannel.channel).limit(1).scalar()
+        start_date = datetime.now() - timedelta(days=args.days)
+
+        results = [
+            check(
+                "dashboard",
+                lambda: MessageCRUD.get_dashboard_data(db, args.days),
+                args.days, expect_facts=False
+            ),
+            check(
+                "channel activity",
+                lambda: MessageCRUD.get_channel_activity(
+                    db, channel, ChannelActivityParams(days=args.days, include_keywords=False)
+                ),
+                args.days
+            ),
+            check(
+                "search",
+                lambda: MessageCRUD.search_messages(
+                    db, MessageSearchParams(query=args.query, start_date=start_date)
+                ),
+                args.days
+            ),
+        ]
+    finally:
+        db.close()
+
+    if not all(results):
+        sys.exit(1)
+    print("✅ All date-window queries prune fct_messages partitions")
+
+if __name__ == "__main__":
+    main()
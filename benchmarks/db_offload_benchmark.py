@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: blocking vs worker-thread database calls in async endpoints.
+
+Runs two in-process FastAPI apps whose "report" endpoint performs a blocking
+call of fixed duration (standing in for a slow SQLAlchemy query):
+
+- blocking:  the call runs directly inside `async def`, as the API used to do
+- offloaded: the call goes through `api.database.run_in_db_thread`
+
+For each app it fires concurrent report requests while polling `/health`, and
+prints report throughput and health-check latency. No database is needed.
+
+Usage:
+    python benchmarks/db_offload_benchmark.py --requests 60 --concurrency 15 --query-ms 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+from fastapi import FastAPI
+
+from api.database import run_in_db_thread, DB_WORKER_THREADS
+
+def build_app(offload: bool, query_seconds: float) -> FastAPI:
+    app = FastAPI()
+
+    def slow_query():
+        time.sleep(query_seconds)
+        return {"rows": 1}
+
+    @app.get("/report")
+    async def report():
+        if offload:
+            return await run_in_db_thread(slow_query)
+        return slow_query()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+async def run_scenario(name: str, app: FastAPI, total: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+        health_latencies = []
+        done = asyncio.Event()
+
+        async def one_report():
+            async with semaphore:
+                response = await client.get("/report")
+                response.raise_for_status()
+
+        async def poll_health():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.005)
+
+        poller = asyncio.create_task(poll_health())
+        start = time.perf_counter()
+        await asyncio.gather(*(one_report() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await poller
+
+    return {
+        "scenario": name,
+        "requests": total,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "health_checks_served": len(health_latencies),
+        "health_p50_ms": round(statistics.median(health_latencies), 1) if health_latencies else None,
+        "health_max_ms": round(max(health_latencies), 1) if health_latencies else None,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=60, help="Report requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=15, help="Concurrent report requests")
+    parser.add_argument("--query-ms", type=float, default=50, help="Simulated query duration")
+    args = parser.parse_args()
+
+    query_seconds = args.query_ms / 1000
+    print(f"Worker threads (pool_size + max_overflow): {DB_WORKER_THREADS}")
+    for name, offload in (("blocking", False), ("offloaded", True)):
+        result = await run_scenario(name, build_app(offload, query_seconds), args.requests, args.concurrency)
+        print(result)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for API benchmarks.
+
+Fills a local PostgreSQL with realistic Telegram data at production scale:
+multilingual (English/Amharic) pharmacy and cosmetics posts across hundreds of
+channels, with skewed channel popularity, daily posting rhythms, log-normal
+view counts and YOLO detections for posts with photos.
+
+Rows are bulk-loaded with COPY in batches. The output is deterministic for a
+given --seed, so benchmark runs on different commits see identical data.
+
+Usage:
+    python benchmarks/generate_data.py --messages 2000000 --channels 300 --truncate
+    cd telegram_dbt && dbt run     # rebuild marts from the generated raw data
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+
+from enrichment.create_yolo_table import create_yolo_detections_table
+from loading.models import create_raw_tables
+from utils.data_version import bump_data_version
+from utils.db import get_engine
+
+PRODUCTS = [
+    "paracetamol", "ibuprofen", "aspirin", "amoxicillin", "omeprazole",
+    "metformin", "insulin", "vitamin", "antibiotic", "painkiller",
+    "azithromycin", "sunscreen", "moisturizer", "serum", "lotion",
+]
+FORMS = ["tablet", "capsule", "syrup", "injection", "vaccine", "cream", "gel"]
+
+ENGLISH_TEMPLATES = [
+    "{product} {dose}mg {form} now available at our pharmacy. Order today!",
+    "New stock: {product} {form} ({dose}mg). Prescription required for treatment.",
+    "Did you know? {product} dosage should follow your doctor's prescription. Ask our pharmacist.",
+    "Special offer on {product} {form}s this week only. Free delivery in Addis Ababa.",
+    "{product} therapy: take one {form} daily after meals. Consult us for more medicine advice.",
+]
+AMHARIC_TEMPLATES = [
+    "{product} {dose}mg {form} በፋርማሲያችን ይገኛል። አሁኑኑ ይዘዙ!",
+    "{product} በሃኪም ማዘዣ የሚሰጥ መድሃኒት ነው። ለበለጠ መረጃ ያግኙን።",
+    "አዲስ ምርት: {product} {form}። በቴሌግራም ግሩፓችን ይዘዙ።",
+    "የ{product} አጠቃቀም: በቀን አንድ {form} ከምግብ በኋላ።",
+]
+MIXED_TEMPLATES = [
+    "⚠️Notice! {product} {form} ይገኛል 📌 Order via t.me/{channel}",
+    "🔅{product} {dose}mg — ዋጋ ቅናሽ! Delivery available 🔅",
+]
+
+DETECTION_CLASSES = [
+    "bottle", "person", "cup", "cell phone", "book", "toothbrush",
+    "scissors", "handbag", "vase", "clock",
+]
+
+CHANNEL_PREFIXES = ["pharma", "med", "health", "cosmetics", "drug", "care", "clinic", "beauty"]
+
+def make_channels(count, rng):
+    """Channel names with Zipf-like popularity weights."""
+    channels = []
+    for i in range(count):
+        name = f"{rng.choice(CHANNEL_PREFIXES)}_{i:04d}"
+        popularity = 1.0 / (i + 1) ** 0.8
+        channels.append((name, popularity))
+    return channels
+
+def make_text(rng, channel):
+    roll = rng.random()
+    if roll < 0.45:
+        template = rng.choice(ENGLISH_TEMPLATES)
+    elif roll < 0.85:
+        template = rng.choice(AMHARIC_TEMPLATES)
+    else:
+        template = rng.choice(MIXED_TEMPLATES)
+    return template.format(
+        product=rng.choice(PRODUCTS).capitalize() if rng.random() < 0.3 else rng.choice(PRODUCTS),
+        form=rng.choice(FORMS),
+        dose=rng.choice([50, 100, 250, 500, 1000]),
+        channel=channel,
+    )
+
+def message_time(rng, start, days):
+    """Random timestamp in the window, weighted toward working hours."""
+    day = start + timedelta(days=rng.randrange(days))
+    hour = min(23, max(0, int(rng.gauss(13, 4))))
+    return day + timedelta(hours=hour, minutes=rng.randrange(60), seconds=rng.randrange(60))
+
+def generate(args):
+    rng = random.Random(args.seed)
+    engine = get_engine()
+
+    create_raw_tables(engine)
+    create_yolo_detections_table()
+
+    if args.truncate:
+        with engine.begin() as conn:
+            conn.execute(text("TRUNCATE raw.telegram_messages"))
+            conn.execute(text("TRUNCATE enriched.yolo_detections"))
+        print("🧹 Truncated raw.telegram_messages and enriched.yolo_detections")
+
+    channels = make_channels(args.channels, rng)
+    names = [name for name, _ in channels]
+    weights = [weight for _, weight in channels]
+    if args.end_date:
+        end = datetime.strptime(args.end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    else:
+        end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=args.days)
+
+    raw_connection = engine.raw_connection()
+    started = time.perf_counter()
+    message_id = args.first_id
+    detections = 0
+    try:
+        cursor = raw_connection.cursor()
+        remaining = args.messages
+        while remaining > 0:
+            batch = min(args.batch_size, remaining)
+            messages_buffer = io.StringIO()
+            detections_buffer = io.StringIO()
+            messages_writer = csv.writer(messages_buffer)
+            detections_writer = csv.writer(detections_buffer)
+
+            for channel in rng.choices(names, weights=weights, k=batch):
+                has_media = rng.random() < args.media_ratio
+                views = int(rng.lognormvariate(6, 1.2))
+                date = message_time(rng, start, args.days)
+                messages_writer.writerow([
+                    message_id, date.isoformat(), make_text(rng, channel), views, has_media, channel
+                ])
+
+                if has_media and rng.random() < args.detection_ratio:
+                    objects = rng.sample(DETECTION_CLASSES, k=rng.randint(1, 3))
+                    filename = f"{channel}_{message_id}.jpg"
+                    detections_writer.writerow([
+                        f"data/raw/images/{channel}/{filename}", f"{channel}/{filename}", filename,
+                        channel, message_id, json.dumps(objects), len(objects),
+                        round(rng.uniform(0.3, 0.99), 3),
+                    ])
+                    detections += 1
+                message_id += 1
+
+            messages_buffer.seek(0)
+            detections_buffer.seek(0)
+            cursor.copy_expert(
+                "COPY raw.telegram_messages (id, date, text, views, has_media, channel) FROM STDIN WITH CSV",
+                messages_buffer
+            )
+            cursor.copy_expert(
+                "COPY enriched.yolo_detections (file_path, relative_path, filename, channel, message_id, "
+                "detected_objects, object_count, confidence_score) FROM STDIN WITH CSV",
+                detections_buffer
+            )
+            raw_connection.commit()
+
+            remaining -= batch
+            done = args.messages - remaining
+            rate = done / (time.perf_counter() - started)
+            print(f"  → {done:,}/{args.messages:,} messages ({rate:,.0f} rows/s), {detections:,} detections")
+    finally:
+        raw_connection.close()
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE raw.telegram_messages"))
+        conn.execute(text("ANALYZE enriched.yolo_detections"))
+        bump_data_version(conn, "generate_data")
+
+    print(f"✅ Generated {args.messages:,} messages across {args.channels} channels "
+          f"and {detections:,} detections in {time.perf_counter() - started:.1f}s")
+    print("ℹ️  Run `dbt run` in telegram_dbt/ to rebuild the marts before benchmarking.")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1_000_000, help="Number of messages to generate")
+    parser.add_argument("--channels", type=int, default=200, help="Number of channels")
+    parser.add_argument("--days", type=int, default=730, help="History length in days")
+    parser.add_argument("--end-date", help="Last day of history, YYYY-MM-DD (default: today)")
+    parser.add_argument("--media-ratio", type=float, default=0.4, help="Share of messages with a photo")
+    parser.add_argument("--detection-ratio", type=float, default=0.8, help="Share of photos with detections")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="Rows per COPY batch")
+    parser.add_argument("--first-id", type=int, default=1, help="First message id")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed, same data)")
+    parser.add_argument("--truncate", action="store_true", help="Empty the raw and detection tables first")
+    generate(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
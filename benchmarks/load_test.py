@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the analytics API.
+
+Drives every endpoint with a fixed number of concurrent closed-loop clients for
+a fixed duration and writes p50/p95/p99 latency, throughput and error counts
+to a JSON report. Request parameters are drawn from a seeded RNG and the report
+records the git commit and run configuration, so reports from different
+commits can be compared with the `compare` sub-command.
+
+Usage:
+    python benchmarks/load_test.py run --base-url http://localhost:8000 \\
+        --concurrency 32 --duration 30 --output bench_results/$(git rev-parse --short HEAD).json
+    python benchmarks/load_test.py compare bench_results/base.json bench_results/new.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+SEARCH_TERMS = ["paracetamol", "vitamin", "tablet", "insulin", "cream", "መድሃኒት", "syrup"]
+# Classes benchmarks/generate_data.py writes detections for
+OBJECT_NAMES = ["bottle", "person", "cup", "cell phone", "book"]
+
+def build_scenarios(channels):
+    """Endpoint name -> function(rng) returning (path, params), or (path, params, json body) for a POST."""
+    def days(rng):
+        return rng.choice([7, 30, 90])
+
+    def batch_report(rng):
+        kind = rng.choice(["channel_activity", "channel_detections", "top_products"])
+        if kind == "channel_activity":
+            return {"type": kind, "channel": rng.choice(channels), "params": {"days": days(rng)}}
+        if kind == "channel_detections":
+            return {"type": kind, "channel": rng.choice(channels), "params": {"limit": 50}}
+        return {"type": kind, "params": {"days": days(rng), "limit": 10}}
+
+    return {
+        "health": lambda rng: ("/health", {}),
+        "dashboard": lambda rng: ("/api/analytics/dashboard", {"days": rng.choice([1, 7, 30])}),
+        "top_products": lambda rng: ("/api/reports/top-products", {
+            "days": days(rng), "limit": 10, "min_mentions": 1
+        }),
+        "channel_activity": lambda rng: (f"/api/channels/{rng.choice(channels)}/activity", {
+            "days": days(rng), "include_keywords": rng.random() < 0.5
+        }),
+        "channel_detections": lambda rng: (f"/api/channels/{rng.choice(channels)}/detections", {
+            "limit": 50, "include_message": rng.random() < 0.5
+        }),
+        "search": lambda rng: ("/api/search/messages", {
+            "query": rng.choice(SEARCH_TERMS), "page": rng.randint(1, 5), "page_size": 20
+        }),
+        "channels": lambda rng: ("/api/channels", {}),
+        "detection_summary": lambda rng: ("/api/detections/summary", {}),
+        "object_engagement": lambda rng: (f"/api/detections/objects/{rng.choice(OBJECT_NAMES)}", {
+            "days": days(rng)
+        }),
+        "batch": lambda rng: ("/api/batch", {}, {
+            "requests": [batch_report(rng) for _ in range(rng.randint(2, 8))]
+        }),
+        "metrics": lambda rng: ("/metrics", {}),
+        "export": lambda rng: ("/api/export/messages", {
+            "channel": rng.choice(channels),
+            "start_date": (datetime.now(timezone.utc) - timedelta(days=days(rng))).date().isoformat(),
+            "limit": 1000,
+        }),
+    }
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+async def run_endpoint(client, name, scenario, concurrency, duration, seed):
+    latencies = []
+    errors = 0
+    status_counts = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id):
+        nonlocal errors
+        rng = random.Random(f"{seed}-{name}-{worker_id}")
+        while time.perf_counter() < deadline:
+            path, params, *body = scenario(rng)
+            start = time.perf_counter()
+            try:
+                if body:
+                    response = await client.post(path, params=params, json=body[0])
+                else:
+                    response = await client.get(path, params=params)
+                await response.aread()
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "transport_error"
+            latencies.append((time.perf_counter() - start) * 1000)
+            status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+            if status == "transport_error" or status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_counts": status_counts,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0,
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        response = await client.get("/api/channels")
+        response.raise_for_status()
+        channels = sorted(channel["channel"] for channel in response.json()["data"])
+        if not channels:
+            sys.exit("❌ No channels found; generate data and run dbt first.")
+
+        scenarios = build_scenarios(channels)
+        selected = args.endpoints or list(scenarios)
+        results = {}
+        for name in selected:
+            if args.warmup:
+                await run_endpoint(client, name, scenarios[name], args.concurrency, args.warmup, args.seed)
+            print(f"🚀 {name}: {args.concurrency} clients for {args.duration}s")
+            results[name] = await run_endpoint(
+                client, name, scenarios[name], args.concurrency, args.duration, args.seed
+            )
+            r = results[name]
+            print(f"   {r['throughput_rps']} req/s  p50 {r['p50_ms']} ms  p95 {r['p95_ms']} ms  "
+                  f"p99 {r['p99_ms']} ms  errors {r['errors']}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "seed": args.seed,
+            "channels": len(channels),
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report written to {args.output}")
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    if baseline["config"] != candidate["config"]:
+        print("⚠️  Runs used different configurations; comparison may not be meaningful")
+
+    print(f"{'endpoint':<20}{'metric':<16}{'baseline':>12}{'candidate':>12}{'change':>10}")
+    for name, base in baseline["results"].items():
+        new = candidate["results"].get(name)
+        if new is None:
+            continue
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            old_value, new_value = base[metric], new[metric]
+            if old_value and new_value is not None:
+                change = f"{(new_value - old_value) / old_value * 100:+.1f}%"
+            else:
+                change = "n/a"
+            print(f"{name:<20}{metric:<16}{str(old_value):>12}{str(new_value):>12}{change:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the load test")
+    run_parser.add_argument("--base-url", default="http://localhost:8000")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients per endpoint")
+    run_parser.add_argument("--duration", type=float, default=20, help="Seconds per endpoint")
+    run_parser.add_argument("--warmup", type=float, default=3, help="Warm-up seconds per endpoint (not recorded)")
+    run_parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--endpoints", nargs="*", help="Subset of endpoints to drive")
+    run_parser.add_argument("--output", default="bench_results/load_test.json")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        asyncio.run(run(args))
+    else:
+        compare(args)
+
+if __name__ == "__main__":
+    main()
@@ -2,25 +2,59 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.config import get_db_connection
+from utils.db import get_engine
 from sqlalchemy import text
 
 def create_yolo_detections_table():
-    conn = get_db_connection()
+    statements = [
+        text("CREATE SCHEMA IF NOT EXISTS enriched"),
+        text("""
+            CREATE TABLE IF NOT EXISTS enriched.yolo_detections (
+                id SERIAL PRIMARY KEY,
+                file_path TEXT NOT NULL,
+                relative_path TEXT,
+                filename TEXT,
+                channel TEXT,
+                message_id INTEGER,
+                detected_objects JSONB,
+                object_count INTEGER,
+                confidence_score FLOAT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """),
+        # Tables created before detections were linked to messages lack these columns
+        text("ALTER TABLE enriched.yolo_detections ADD COLUMN IF NOT EXISTS channel TEXT"),
+        text("ALTER TABLE enriched.yolo_detections ADD COLUMN IF NOT EXISTS message_id INTEGER"),
+        # ...so fill them in from the `<channel>_<message_id>.jpg` media name, as fct_image_detections does
+        text(r"""
+            UPDATE enriched.yolo_detections
+            SET channel = coalesce(channel, substring(media_name from '^(.+)_[0-9]+\.[^.]+$')),
+                message_id = coalesce(message_id, substring(media_name from '_([0-9]+)\.[^.]+$')::integer)
+            FROM (
+                SELECT id AS detection_id,
+                       coalesce(filename, regexp_replace(file_path, '^.*/', '')) AS media_name
+                FROM enriched.yolo_detections
+                WHERE channel IS NULL OR message_id IS NULL
+            ) unlinked
+            WHERE id = unlinked.detection_id
+        """),
+        text("""
+            CREATE INDEX IF NOT EXISTS ix_yolo_detections_channel_message
+            ON enriched.yolo_detections (channel, message_id)
+        """),
+        # Watermark of the incremental fct_image_detections mart
+        text("""
+            CREATE INDEX IF NOT EXISTS ix_yolo_detections_created_at
+            ON enriched.yolo_detections (created_at)
+        """),
+    ]
 
-    create_table_sql = text("""
-        CREATE TABLE IF NOT EXISTS yolo_detections (
-            id SERIAL PRIMARY KEY,
-            file_path TEXT NOT NULL,
-            detected_objects JSONB,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """)
+    # One transaction on a pooled connection, returned to the pool afterwards
+    with get_engine().begin() as conn:
+        for statement in statements:
+            conn.execute(statement)
 
-    with conn.begin():
-        conn.execute(create_table_sql)
-
-    print("✅ Table 'yolo_detections' created successfully.")
+    print("✅ Table 'enriched.yolo_detections' created successfully.")
 
 if __name__ == "__main__":
     create_yolo_detections_table()
@@ -0,0 +1,283 @@
+"""
+Media asset catalog: enriched.media_assets.
+
+One row per downloaded message photo, keyed by its source message
+(channel, message_id), with the canonical file path (where the scraper saved
+it), content hash, size, pixel dimensions and a processing state per stage:
+
+- extract: `register_assets` adds photos as `pending`; `extract_pending`
+  fills in hash, size and dimensions (`done`, or `failed` when the file is
+  missing or unreadable);
+- detect: YOLO inference (enrichment/yolo_inference.py) claims extracted
+  assets still `pending` by setting them `running`, then marks them `done`
+  (or `failed` when the model errors), running the model once per distinct
+  hash.
+
+Stages pick their work with indexed queries on the pending states instead of
+walking data/raw/images, so every photo is processed exactly once. Rows are
+locked with SKIP LOCKED, so concurrent workers never pick the same asset; a
+detect claim older than STALE_CLAIM is assumed to belong to a crashed worker
+and is handed out again.
+
+Usage:
+    python enrichment/media_catalog.py          # create the table and show asset states
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+from sqlalchemy import text
+
+from utils.db import get_engine
+from utils.helpers import parse_media_filename
+
+EXTRACT = "extract"
+DETECT = "detect"
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Detect claims older than this are taken over by the next worker
+STALE_CLAIM = "1 hour"
+
+CREATE_STATEMENTS = [
+    text("CREATE SCHEMA IF NOT EXISTS enriched"),
+    text("""
+        CREATE TABLE IF NOT EXISTS enriched.media_assets (
+            channel TEXT NOT NULL,
+            message_id INTEGER NOT NULL,
+            canonical_path TEXT NOT NULL,
+            sha256 TEXT,
+            size_bytes BIGINT,
+            width INTEGER,
+            height INTEGER,
+            extract_status TEXT NOT NULL DEFAULT 'pending',
+            extracted_at TIMESTAMPTZ,
+            detect_status TEXT NOT NULL DEFAULT 'pending',
+            detected_at TIMESTAMPTZ,
+            registered_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (channel, message_id)
+        )
+    """),
+    # Work queues: only pending rows are indexed, so they stay small
+    text("""
+        CREATE INDEX IF NOT EXISTS ix_media_assets_extract_pending
+        ON enriched.media_assets (channel, registered_at)
+        WHERE extract_status = 'pending'
+    """),
+    text("""
+        CREATE INDEX IF NOT EXISTS ix_media_assets_detect_pending
+        ON enriched.media_assets (channel, registered_at)
+        WHERE detect_status = 'pending' AND extract_status = 'done'
+    """),
+    text("""
+        CREATE INDEX IF NOT EXISTS ix_media_assets_detect_running
+        ON enriched.media_assets (detected_at)
+        WHERE detect_status = 'running'
+    """),
+    text("CREATE INDEX IF NOT EXISTS ix_media_assets_sha256 ON enriched.media_assets (sha256)"),
+]
+
+# One statement per batch; RETURNING counts the rows actually added
+REGISTER_ASSETS = text("""
+    INSERT INTO enriched.media_assets (channel, message_id, canonical_path)
+    SELECT * FROM unnest(CAST(:channels AS text[]), CAST(:message_ids AS integer[]), CAST(:paths AS text[]))
+    ON CONFLICT (channel, message_id) DO NOTHING
+    RETURNING message_id
+""")
+
+UPDATE_METADATA = text("""
+    UPDATE enriched.media_assets
+    SET sha256 = :sha256, size_bytes = :size_bytes, width = :width, height = :height,
+        extract_status = :status, extracted_at = now()
+    WHERE channel = :channel AND message_id = :message_id
+""")
+
+UPDATE_DETECT_STATUS = text("""
+    UPDATE enriched.media_assets
+    SET detect_status = :status, detected_at = now()
+    WHERE channel = :channel AND message_id = :message_id
+""")
+
+def create_media_assets_table(conn=None):
+    """Create enriched.media_assets and its indexes (in `conn`'s transaction if given)."""
+    if conn is not None:
+        for statement in CREATE_STATEMENTS:
+            conn.execute(statement)
+        return
+    with get_engine().begin() as conn:
+        for statement in CREATE_STATEMENTS:
+            conn.execute(statement)
+
+def assets_from_messages(channel: str, messages: Iterable[dict]) -> List[Dict]:
+    """Catalog entries for the downloaded photos of one channel's scraped messages."""
+    return [
+        {"channel": msg.get("channel", channel), "message_id": msg["id"], "path": msg["media_path"]}
+        for msg in messages
+        if msg.get("has_media") and msg.get("media_path")
+    ]
+
+def assets_from_paths(paths: Iterable[str]) -> List[Dict]:
+    """Catalog entries for photos named by the scraper convention (`<channel>_<message_id>.jpg`)."""
+    assets = []
+    for path in paths:
+        channel, message_id = parse_media_filename(path)
+        if channel is not None:
+            assets.append({"channel": channel, "message_id": message_id, "path": path})
+    return assets
+
+def register_assets(conn, assets: List[Dict]) -> int:
+    """Add assets not yet in the catalog, pending every stage; returns the number added."""
+    if not assets:
+        return 0
+    rows = conn.execute(REGISTER_ASSETS, {
+        "channels": [asset["channel"] for asset in assets],
+        "message_ids": [asset["message_id"] for asset in assets],
+        "paths": [asset["path"] for asset in assets],
+    })
+    return len(rows.fetchall())
+
+def pending_assets(conn, stage: str, channel: Optional[str] = None, limit: int = 500,
+                   keys: Optional[List[Tuple[str, int]]] = None) -> List[Dict]:
+    """Oldest assets waiting for `stage`, from the pending indexes.
+
+    `channel` restricts them to one channel, `keys` to the given
+    (channel, message_id) assets. The rows stay locked until `conn`'s
+    transaction ends; rows locked by other workers are skipped.
+    """
+    query, params = _pending_query(stage, channel, limit, keys)
+    return [dict(row._mapping) for row in conn.execute(text(query), params)]
+
+def claim_detection(conn, channel: Optional[str] = None, limit: int = 500,
+                    keys: Optional[List[Tuple[str, int]]] = None) -> List[Dict]:
+    """Mark up to `limit` assets pending detection as `running` and return them.
+
+    Inference runs outside the claiming transaction, so the claim (not a row
+    lock) keeps other workers off these assets until `mark_detected`.
+    """
+    query, params = _pending_query(DETECT, channel, limit, keys)
+    rows = conn.execute(text(f"""
+        UPDATE enriched.media_assets a
+        SET detect_status = 'running', detected_at = now()
+        FROM ({query}) claimed
+        WHERE a.channel = claimed.channel AND a.message_id = claimed.message_id
+        RETURNING a.channel, a.message_id, a.canonical_path, a.sha256
+    """), params)
+    return [dict(row._mapping) for row in rows]
+
+def _pending_query(stage: str, channel: Optional[str], limit: int,
+                   keys: Optional[List[Tuple[str, int]]]) -> Tuple[str, Dict]:
+    if stage == EXTRACT:
+        conditions = ["extract_status = 'pending'"]
+        params = {"limit": limit}
+    else:
+        conditions = ["""(detect_status = 'pending' AND extract_status = 'done'
+            OR detect_status = 'running' AND detected_at < now() - CAST(:stale_claim AS interval))"""]
+        params = {"limit": limit, "stale_claim": STALE_CLAIM}
+    if channel is not None:
+        conditions.append("channel = :channel")
+        params["channel"] = channel
+    if keys is not None:
+        conditions.append("""(channel, message_id) IN (
+            SELECT * FROM unnest(CAST(:key_channels AS text[]), CAST(:key_message_ids AS integer[]))
+        )""")
+        params["key_channels"] = [key[0] for key in keys]
+        params["key_message_ids"] = [key[1] for key in keys]
+    query = f"""
+        SELECT channel, message_id, canonical_path, sha256
+        FROM enriched.media_assets
+        WHERE {' AND '.join(conditions)}
+        ORDER BY registered_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    """
+    return query, params
+
+def asset_metadata(path: str) -> Dict:
+    """Content hash, size and pixel dimensions of an image file (only its header is decoded)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with Image.open(path) as image:
+        width, height = image.size
+    return {"sha256": digest.hexdigest(), "size_bytes": os.path.getsize(path), "width": width, "height": height}
+
+def extract_pending(channel: Optional[str] = None, batch_size: int = 500,
+                    keys: Optional[List[Tuple[str, int]]] = None) -> Tuple[int, int]:
+    """Fill in metadata of every asset pending extraction (optionally only `channel`'s or `keys`);
+    returns (extracted, failed)."""
+    engine = get_engine()
+    extracted = failed = 0
+    while True:
+        with engine.begin() as conn:
+            assets = pending_assets(conn, EXTRACT, channel, batch_size, keys)
+            if not assets:
+                break
+            updates = []
+            for asset in assets:
+                try:
+                    metadata = {**asset_metadata(asset["canonical_path"]), "status": DONE}
+                    extracted += 1
+                except (OSError, ValueError) as e:
+                    print(f"Image file not usable: {asset['canonical_path']} ({e})")
+                    metadata = {"sha256": None, "size_bytes": None, "width": None, "height": None,
+                                "status": FAILED}
+                    failed += 1
+                updates.append({**metadata, "channel": asset["channel"], "message_id": asset["message_id"]})
+            conn.execute(UPDATE_METADATA, updates)
+    return extracted, failed
+
+def mark_detected(conn, assets: List[Dict], status: str = DONE):
+    if assets:
+        conn.execute(UPDATE_DETECT_STATUS, [
+            {"status": status, "channel": asset["channel"], "message_id": asset["message_id"]}
+            for asset in assets
+        ])
+
+def known_detections(conn, hashes: Iterable[str]) -> Dict[str, List[str]]:
+    """Detected objects already stored for assets with these hashes (reposted photos)."""
+    hashes = [sha256 for sha256 in set(hashes) if sha256]
+    if not hashes:
+        return {}
+    rows = conn.execute(text("""
+        SELECT DISTINCT ON (a.sha256) a.sha256, d.detected_objects
+        FROM enriched.media_assets a
+        JOIN enriched.yolo_detections d
+          ON d.channel = a.channel AND d.message_id = a.message_id
+        WHERE a.detect_status = 'done' AND a.sha256 = ANY(:hashes)
+        ORDER BY a.sha256, d.created_at DESC
+    """), {"hashes": hashes})
+    return {row.sha256: row.detected_objects for row in rows}
+
+def print_status():
+    with get_engine().begin() as conn:
+        create_media_assets_table(conn)
+        rows = conn.execute(text("""
+            SELECT channel, count(*) AS assets,
+                   count(*) FILTER (WHERE extract_status = 'pending') AS extract_pending,
+                   count(*) FILTER (WHERE extract_status = 'failed') AS extract_failed,
+                   count(*) FILTER (WHERE detect_status = 'pending') AS detect_pending,
+                   count(*) FILTER (WHERE detect_status = 'failed') AS detect_failed,
+                   count(DISTINCT sha256) AS unique_images,
+                   coalesce(sum(size_bytes), 0) AS size_bytes
+            FROM enriched.media_assets
+            GROUP BY channel
+            ORDER BY channel
+        """)).fetchall()
+
+    print(f"{'channel':<24}{'assets':>8}{'unique':>8}{'MB':>9}{'extract pend/fail':>19}{'detect pend/fail':>18}")
+    for row in rows:
+        print(f"{row.channel:<24}{row.assets:>8}{row.unique_images:>8}{row.size_bytes / (1024 * 1024):>9.1f}"
+              f"{f'{row.extract_pending}/{row.extract_failed}':>19}{f'{row.detect_pending}/{row.detect_failed}':>18}")
+    if not rows:
+        print("ℹ️  The media catalog is empty; run `python ingestion/extract_images.py`")
+
+if __name__ == "__main__":
+    print_status()
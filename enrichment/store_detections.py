@@ -2,30 +2,51 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.config import get_db_connection
+from utils.db import get_engine
+from utils.helpers import parse_media_filename
 import json
 from sqlalchemy import text
 
 INPUT_PATH = "data/enriched/detections.json"
 
+INSERT_DETECTION = text("""
+    INSERT INTO enriched.yolo_detections (
+        file_path, relative_path, filename, channel, message_id,
+        detected_objects, object_count
+    )
+    VALUES (
+        :file_path, :relative_path, :filename, :channel, :message_id,
+        :detected_objects, :object_count
+    )
+""")
+
+def insert_detections(conn, detections):
+    """Insert detection records (as written by yolo_inference) in one executemany."""
+    rows = []
+    for record in detections:
+        channel, message_id = record.get("channel"), record.get("message_id")
+        if channel is None or message_id is None:
+            # detections.json files written before the linkage columns existed
+            channel, message_id = parse_media_filename(record["file_path"])
+
+        rows.append({
+            "file_path": record["file_path"],
+            "relative_path": record.get("relative_path"),
+            "filename": record.get("filename", os.path.basename(record["file_path"])),
+            "channel": channel,
+            "message_id": message_id,
+            "detected_objects": json.dumps(record["detected_objects"]),
+            "object_count": record.get("object_count", len(record["detected_objects"])),
+        })
+    if rows:
+        conn.execute(INSERT_DETECTION, rows)
+
 def store_detections():
     with open(INPUT_PATH, "r") as f:
         detections = json.load(f)
 
-    conn = get_db_connection()
-
-    with conn.begin():
-        for record in detections:
-            conn.execute(
-                text("""
-                    INSERT INTO yolo_detections (file_path, detected_objects)
-                    VALUES (:file_path, :detected_objects)
-                """),
-                {
-                    "file_path": record["file_path"],
-                    "detected_objects": json.dumps(record["detected_objects"]),
-                }
-            )
+    with get_engine().begin() as conn:
+        insert_detections(conn, detections)
 
     print(f"✅ {len(detections)} detections stored successfully.")
 
@@ -1,77 +1,122 @@
-from ultralytics import YOLO
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ultralytics import YOLO
 import json
 import cv2
+from utils.helpers import parse_media_filename
 
 MODEL_PATH = "yolov8n.pt"  # replace with medical-specific model if available
-IMAGE_DIR = "data/raw/images"  # Look in images directory instead of messages
+IMAGE_DIR = "data/raw/images"
 OUTPUT_PATH = "data/enriched/detections.json"
 
 model = YOLO(MODEL_PATH)
 
 def detect_objects(image_path):
-    """Run YOLO inference on a single image and return detected objects."""
-    try:
-        results = model(image_path)
-        objects = results[0].names
-        detected = set()
-        
-        for r in results:
-            if r.boxes is not None:
-                for c in r.boxes.cls:
-                    detected.add(objects[int(c)])
-        
-        return list(detected)
-    except Exception as e:
-        print(f"Error processing {image_path}: {e}")
-        return []
+    """Run YOLO inference on a single image and return detected objects (raises if inference fails)."""
+    results = model(image_path)
+    objects = results[0].names
+    detected = set()
+
+    for r in results:
+        if r.boxes is not None:
+            for c in r.boxes.cls:
+                detected.add(objects[int(c)])
+
+    return list(detected)
+
+def detection_record(image_path, detected_objects=None, channel=None, message_id=None):
+    """Detection record of one image, running inference unless `detected_objects` is given."""
+    if detected_objects is None:
+        detected_objects = detect_objects(image_path)
+    
+    # Extract metadata from filename/path
+    filename = os.path.basename(image_path)
+    if channel is None or message_id is None:
+        channel, message_id = parse_media_filename(filename)
+    return {
+        "file_path": image_path,
+        "relative_path": os.path.relpath(image_path, IMAGE_DIR),
+        "filename": filename,
+        "channel": channel,
+        "message_id": message_id,
+        "detected_objects": detected_objects,
+        "object_count": len(detected_objects)
+    }
 
-def run_inference():
-    """Run YOLO inference on all images in the image directory."""
+def run_inference(channel=None, output_path=OUTPUT_PATH, batch_size=100, keys=None):
+    """Run YOLO on every cataloged image pending detection (optionally one channel's,
+    or only the (channel, message_id) assets in `keys`).
+
+    Work is claimed from enriched.media_assets (see enrichment/media_catalog.py),
+    so concurrent runs never detect the same asset twice; the model runs once
+    per distinct image hash, and photos already detected under another
+    message reuse those results. Images the model fails on are marked
+    `failed` rather than `done`. Detections are stored in
+    enriched.yolo_detections batch by batch, and also written to
+    `output_path` unless it is None. Returns the detection records stored.
+    """
+    from enrichment.media_catalog import FAILED, claim_detection, known_detections, mark_detected
+    from enrichment.store_detections import insert_detections
+    from utils.db import get_engine
+
+    engine = get_engine()
     enriched_data = []
     processed_count = 0
-    
-    # Check if image directory exists
-    if not os.path.exists(IMAGE_DIR):
-        print(f"❌ Image directory {IMAGE_DIR} does not exist. Run image extraction first.")
-        return
-    
-    # Process all images in subdirectories
-    for root, _, files in os.walk(IMAGE_DIR):
-        for f in files:
-            if f.lower().endswith((".jpg", ".jpeg", ".png", ".bmp", ".tiff")):
-                image_path = os.path.join(root, f)
+    reused_count = 0
+    failed_count = 0
+
+    while True:
+        with engine.begin() as conn:
+            assets = claim_detection(conn, channel, batch_size, keys)
+            if not assets:
+                break
+            results = known_detections(conn, (asset["sha256"] for asset in assets))
+
+        records = []
+        detected, failed = [], []
+        for asset in assets:
+            image_path = asset["canonical_path"]
+            detected_objects = results.get(asset["sha256"])
+            if detected_objects is None:
                 print(f"Processing: {image_path}")
-                
-                detected_objects = detect_objects(image_path)
-                
-                # Extract metadata from filename/path
-                relative_path = os.path.relpath(image_path, IMAGE_DIR)
-                
-                enriched_data.append({
-                    "file_path": image_path,
-                    "relative_path": relative_path,
-                    "filename": f,
-                    "detected_objects": detected_objects,
-                    "object_count": len(detected_objects)
-                })
-                
+                try:
+                    detected_objects = detect_objects(image_path)
+                except Exception as e:
+                    print(f"Error processing {image_path}: {e}")
+                    failed.append(asset)
+                    failed_count += 1
+                    continue
+                results[asset["sha256"]] = detected_objects
                 processed_count += 1
                 print(f"  → Detected: {detected_objects}")
+            else:
+                reused_count += 1
+            detected.append(asset)
+            records.append(detection_record(image_path, detected_objects, asset["channel"], asset["message_id"]))
 
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+        with engine.begin() as conn:
+            insert_detections(conn, records)
+            mark_detected(conn, detected)
+            mark_detected(conn, failed, FAILED)
+        enriched_data.extend(records)
 
-    # Save results
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(enriched_data, f, indent=2)
+    if output_path is not None:
+        # Ensure output directory exists
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    print(f"✅ YOLO inference complete. {processed_count} files processed.")
+        # Save results
+        with open(output_path, "w") as f:
+            json.dump(enriched_data, f, indent=2)
+
+    print(f"✅ YOLO inference complete. {processed_count} files processed, "
+          f"{reused_count} duplicates reused earlier results, {failed_count} failed.")
     
     # Print summary
     if enriched_data:
         total_objects = sum(len(item["detected_objects"]) for item in enriched_data)
-        print(f"📊 Summary: {total_objects} total objects detected across {processed_count} images")
+        print(f"📊 Summary: {total_objects} total objects detected across {len(enriched_data)} images")
         
         # Show most common objects
         all_objects = []
@@ -85,5 +130,11 @@ def run_inference():
             for obj, count in common_objects:
                 print(f"   - {obj}: {count} times")
 
+    return enriched_data
+
 if __name__ == "__main__":
+    from enrichment.create_yolo_table import create_yolo_detections_table
+    from enrichment.media_catalog import create_media_assets_table
+    create_yolo_detections_table()
+    create_media_assets_table()
     run_inference()
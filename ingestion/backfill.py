@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Parallel, resumable historical backfill of Telegram channels.
+
+A channel's history is split into message-id chunks (`--chunk-size` ids,
+aligned to multiples of the chunk size), optionally bounded by date with
+`--since`/`--until`. Chunks are fetched concurrently (`--concurrency`) over a
+single Telegram session, newest first, with every request paced by the
+request scheduler (ingestion/rate_limit.py), and their messages are
+stored in the raw storage format, one file per chunk. Like the scraper's, raw
+files are keyed by the date messages were *fetched* (the run date, default
+today UTC), not the date they were sent:
+data/raw/telegram_messages/<run date>/<channel>/<first id>-<last id>.json,
+with photos in data/raw/images/<run date>/<channel>/. Writing a chunk never
+touches another chunk's file, so I/O grows with the chunk size rather than
+the channel's history. `loading/loader.py` and `loading/archive.py` pick the
+chunk files up next to the scraper's `<run date>/<channel>.json`, as do the
+pipeline's load and archive stages for that partition.
+
+Completed chunks are checkpointed (data/backfill/state.json, see
+pipeline/runner.py's PipelineState), so an interrupted backfill continues
+with the chunks it had not finished. Rerunning is safe: a chunk written again
+is merged into its own file by id.
+
+Usage:
+    python ingestion/backfill.py CheMed123 --since 2022-01-01
+    python ingestion/backfill.py lobelia4cosmetics tikvahpharma --chunk-size 5000 --concurrency 4 --images
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+
+from ingestion.logger import scrape_logger
+from ingestion.rate_limit import get_scheduler
+from ingestion.scraper import PAGE_SIZE, merge_raw_file, message_record, telegram_client
+from pipeline.runner import PipelineState, COMPLETED, FAILED
+from utils.helpers import ensure_dir
+
+BASE_DIR = "data/raw/telegram_messages"
+IMAGE_DIR = "data/raw/images"
+CHECKPOINT_FILE = "data/backfill/state.json"
+
+def plan_chunks(min_id, max_id, chunk_size):
+    """(lo, hi] message-id ranges covering (min_id, max_id], newest first.
+
+    Boundaries fall on multiples of `chunk_size`, so the same chunks (and
+    checkpoints) come out of every run; only the newest chunk grows as new
+    messages arrive, and its changed bounds make it run again.
+    """
+    chunks = []
+    lo = (min_id // chunk_size) * chunk_size
+    while lo < max_id:
+        chunks.append((max(lo, min_id), min(lo + chunk_size, max_id)))
+        lo += chunk_size
+    return chunks[::-1]
+
+def chunk_partition(channel, lo, hi):
+    return f"{channel}/{lo + 1}-{hi}"
+
+def chunk_path(channel, lo, hi, run_date, base_dir=BASE_DIR):
+    return os.path.join(base_dir, run_date, channel, f"{lo + 1}-{hi}.json")
+
+def write_chunk(channel, lo, hi, messages, run_date, base_dir=BASE_DIR):
+    """Store the messages of chunk (lo, hi] in its own raw file for `run_date`; returns its path.
+
+    Only this chunk's file is read and rewritten. Messages it already holds
+    are replaced by id, so writing a chunk again changes nothing.
+    """
+    path = chunk_path(channel, lo, hi, run_date, base_dir)
+    ensure_dir(os.path.dirname(path))
+    merge_raw_file(path, messages)
+    return path
+
+async def id_bounds(client, channel_url, since=None, until=None):
+    """(min_id, max_id) of the history to fetch: ids in (min_id, max_id].
+
+    Date bounds are resolved with `offset_date`, which returns the newest
+    message sent before the given date.
+    """
+    scheduler = get_scheduler()
+    channel_name = channel_url.split("/")[-1]
+
+    async def last_id_before(date):
+        messages = await scheduler.acall(channel_name, client.get_messages, channel_url,
+                                         limit=1, offset_date=date)
+        return messages[0].id if messages else 0
+
+    if until:
+        max_id = await last_id_before(until)
+    else:
+        latest = await scheduler.acall(channel_name, client.get_messages, channel_url, limit=1)
+        max_id = latest[0].id if latest else 0
+    min_id = await last_id_before(since) if since else 0
+    return min_id, max_id
+
+async def fetch_chunk(client, channel_url, lo, hi, image_dir=None):
+    """Messages with ids in (lo, hi], in the scraper's format, downloading photos if `image_dir` is set.
+
+    `image_dir` is the channel's photo folder for the run date.
+
+    Pages are requested from `offset_id` hi + 1 down to `min_id` lo through
+    the request scheduler.
+    """
+    scheduler = get_scheduler()
+    channel_name = channel_url.split("/")[-1]
+    messages = []
+    offset_id = hi + 1
+    while True:
+        page = await scheduler.acall(channel_name, client.get_messages, channel_url,
+                                     limit=PAGE_SIZE, offset_id=offset_id, min_id=lo)
+        if not page:
+            break
+        for msg in page:
+            record = message_record(msg)
+            if record["has_media"] and image_dir:
+                image_path = os.path.join(image_dir, f"{channel_name}_{msg.id}.jpg")
+                try:
+                    if not os.path.exists(image_path):
+                        ensure_dir(image_dir)
+                        await scheduler.acall(channel_name, client.download_media, msg, image_path)
+                    record["media_path"] = image_path
+                except Exception as e:
+                    scrape_logger.warning(f"Failed to download media for message {msg.id}: {e}")
+            messages.append(record)
+        offset_id = page[-1].id
+    return messages
+
+async def backfill(channel_urls, state, since=None, until=None, chunk_size=2000, concurrency=3,
+                   image_dir=None, base_dir=BASE_DIR, run_date=None):
+    """Fetch every chunk not yet checkpointed; returns True if all chunks completed.
+
+    `concurrency` caps the chunks in progress; the request scheduler further
+    limits the requests they make. Chunk files are written under `run_date`
+    (YYYY-MM-DD, default today UTC), off the event loop so writing a chunk
+    does not stall the other chunks' requests.
+    """
+    run_date = run_date or datetime.utcnow().strftime("%Y-%m-%d")
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def run_chunk(channel_url, lo, hi):
+        nonlocal failed
+        channel_name = channel_url.split("/")[-1]
+        partition = chunk_partition(channel_name, lo, hi)
+        channel_image_dir = os.path.join(image_dir, run_date, channel_name) if image_dir else None
+        async with semaphore:
+            try:
+                messages = await fetch_chunk(client, channel_url, lo, hi, channel_image_dir)
+                await asyncio.to_thread(write_chunk, channel_name, lo, hi, messages, run_date, base_dir)
+            except Exception as e:
+                failed += 1
+                state.record("backfill", partition, FAILED, error=str(e))
+                scrape_logger.error(f"Chunk {partition} failed: {e}")
+                return
+        state.record("backfill", partition, COMPLETED, messages=len(messages))
+        print(f"✅ {partition}: {len(messages)} messages")
+
+    async with telegram_client("backfill_session") as client:
+        tasks = []
+        for channel_url in channel_urls:
+            channel_name = channel_url.split("/")[-1]
+            min_id, max_id = await id_bounds(client, channel_url, since, until)
+            chunks = plan_chunks(min_id, max_id, chunk_size)
+            pending = [
+                (lo, hi) for lo, hi in chunks
+                if state.status("backfill", chunk_partition(channel_name, lo, hi)) != COMPLETED
+            ]
+            print(f"📚 {channel_name}: ids {min_id + 1}-{max_id}, {len(chunks)} chunks, "
+                  f"{len(chunks) - len(pending)} already done")
+            tasks += [run_chunk(channel_url, lo, hi) for lo, hi in pending]
+        await asyncio.gather(*tasks)
+
+    return not failed
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("channels", nargs="+", help="Channel names or t.me URLs")
+    parser.add_argument("--since", type=parse_date, help="Oldest message date, YYYY-MM-DD (default: the beginning)")
+    parser.add_argument("--until", type=parse_date, help="Only messages before this date, YYYY-MM-DD")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Message ids per chunk")
+    parser.add_argument("--concurrency", type=int, default=3, help="Chunks fetched at once")
+    parser.add_argument("--images", action="store_true", help=f"Also download photos to {IMAGE_DIR}")
+    parser.add_argument("--state-file", default=CHECKPOINT_FILE, help="Chunk checkpoints")
+    args = parser.parse_args()
+
+    channel_urls = [
+        channel if channel.startswith("https://") else f"https://t.me/{channel}"
+        for channel in args.channels
+    ]
+    state = PipelineState(args.state_file)
+    succeeded = asyncio.run(backfill(
+        channel_urls, state,
+        since=args.since,
+        until=args.until,
+        chunk_size=args.chunk_size,
+        concurrency=args.concurrency,
+        image_dir=IMAGE_DIR if args.images else None
+    ))
+    get_scheduler().print_report()
+
+    if succeeded:
+        print("🎉 Backfill complete; load it with `python loading/loader.py`")
+    else:
+        print(f"⚠️  Some chunks failed; rerun to resume ({args.state_file})")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
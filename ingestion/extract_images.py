@@ -1,50 +1,49 @@
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 import json
-import shutil
+
+from enrichment.media_catalog import (
+    assets_from_messages, create_media_assets_table, extract_pending, register_assets
+)
+from utils.db import get_engine
 
 RAW_DIR = "data/raw/telegram_messages"
-IMAGE_OUTPUT_DIR = "data/raw/images"
-os.makedirs(IMAGE_OUTPUT_DIR, exist_ok=True)
+
+def extract_images_from_file(json_path):
+    """Catalog the photos of one scraped channel file and extract their metadata; returns the number found.
+
+    Photos stay where the scraper downloaded them (the catalog's canonical
+    path); only photos not cataloged yet are registered and examined.
+    """
+    # Scraped files are named after their channel (<date>/<channel>.json)
+    file_channel = os.path.splitext(os.path.basename(json_path))[0]
+    print(f"Processing: {json_path}")
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        messages = json.load(f)
+
+    assets = assets_from_messages(file_channel, messages)
+    with get_engine().begin() as conn:
+        create_media_assets_table(conn)
+        registered = register_assets(conn, assets)
+
+    extracted, failed = extract_pending(channel=file_channel)
+    print(f"Cataloged {registered} new images ({extracted} extracted, {failed} unreadable)")
+    return len(assets)
 
 def extract_images_from_json():
-    """Extract and organize images from scraped telegram messages."""
+    """Catalog the images of every scraped telegram message file."""
     images_found = 0
-    
+
     for root, _, files in os.walk(RAW_DIR):
         for file in files:
             if file.endswith(".json"):
-                json_path = os.path.join(root, file)
-                print(f"Processing: {json_path}")
-                
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    messages = json.load(f)
-                    
-                for msg in messages:
-                    # Check if message has media and media_path
-                    if msg.get("has_media") and msg.get("media_path"):
-                        source_path = msg["media_path"]
-                        
-                        # Check if the image file actually exists
-                        if os.path.exists(source_path):
-                            # Create organized directory structure
-                            channel = msg.get("channel", "unknown")
-                            organized_dir = os.path.join(IMAGE_OUTPUT_DIR, channel)
-                            os.makedirs(organized_dir, exist_ok=True)
-                            
-                            filename = f"{channel}_{msg['id']}.jpg"
-                            dest_path = os.path.join(organized_dir, filename)
-                            
-                            # Copy image to organized location if not already there
-                            if source_path != dest_path:
-                                shutil.copy2(source_path, dest_path)
-                                print(f"Organized image: {filename}")
-                            
-                            images_found += 1
-                        else:
-                            print(f"Image file not found: {source_path}")
-    
-    print(f"✅ Image extraction complete. {images_found} images organized.")
+                images_found += extract_images_from_file(os.path.join(root, file))
+
+    print(f"✅ Image extraction complete. {images_found} images cataloged.")
     return images_found
 
 if __name__ == "__main__":
-    extract_images_from_json()
\ No newline at end of file
+    extract_images_from_json()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Live listener: subscribe to Telegram events instead of polling channels.
+
+New messages, edits and view-count updates of the configured channels are
+received as they happen and fed through the streaming pipeline
+(pipeline/streaming.py), which buffers them into micro-batches
+(`--batch-size` events or `--batch-wait` seconds), bulk upserts them into
+raw.telegram_messages and merges them into the Parquet archive. New photos
+are downloaded and enriched with YOLO.
+
+`--fake` replaces Telegram with a synthetic event source, so the listener
+can be tested and its sustained events/sec benchmarked without network
+access (`--no-db` also skips the database, measuring the pipeline alone).
+
+Usage:
+    python ingestion/listener.py                              # every configured channel
+    python ingestion/listener.py --channels CheMed123 --dbt-interval 60
+    python ingestion/listener.py --fake --rate 2000 --duration 30
+    python ingestion/listener.py --fake --rate 0 --duration 10 --no-db   # as fast as possible
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from ingestion.logger import scrape_logger
+from pipeline.streaming import StreamingPipeline, prepare_tables
+from utils.helpers import ensure_dir
+
+IMAGE_DIR = "data/raw/images"
+
+class TelegramEventSource:
+    """Iterate (channel, record) pairs from live Telegram events.
+
+    New and edited messages yield full message records (the scraper's JSON
+    format); view-count updates yield `{"id", "views"}`. The Telegram client
+    runs its own event loop in a background thread and hands events over
+    through a bounded queue, so a slow pipeline slows event handling rather
+    than buffering without limit. Call `close()` to disconnect.
+    """
+
+    def __init__(self, channel_urls, image_dir=IMAGE_DIR, queue_size=1000):
+        self.channel_urls = channel_urls
+        self.image_dir = image_dir
+        self.events = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self._closed = threading.Event()
+        self._loop = None
+        self._client = None
+        self._thread = None
+
+    def __iter__(self):
+        self._thread = threading.Thread(target=asyncio.run, args=(self._listen(),),
+                                        name="telegram-listener", daemon=True)
+        self._thread.start()
+        while True:
+            try:
+                yield self.events.get(timeout=0.5)
+            except queue.Empty:
+                if self._closed.is_set():
+                    break
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        if self._loop is not None and self._client is not None and not self._closed.is_set():
+            asyncio.run_coroutine_threadsafe(self._client.disconnect(), self._loop)
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    async def _record(self, client, channel, msg):
+        from ingestion.rate_limit import get_scheduler
+        from ingestion.scraper import message_record
+
+        record = message_record(msg)
+        if record["has_media"] and self.image_dir:
+            image_dir = os.path.join(self.image_dir, msg.date.strftime("%Y-%m-%d"), channel)
+            image_path = os.path.join(image_dir, f"{channel}_{msg.id}.jpg")
+            # Edits of a message whose photo is already stored are not enriched again
+            if not os.path.exists(image_path):
+                try:
+                    ensure_dir(image_dir)
+                    await get_scheduler().acall(channel, client.download_media, msg, image_path)
+                    record["media_path"] = image_path
+                except Exception as e:
+                    scrape_logger.warning(f"Failed to download media for message {msg.id}: {e}")
+        return record
+
+    async def _listen(self):
+        from telethon import events
+        from telethon.tl.types import PeerChannel, UpdateChannelMessageViews
+        from telethon.utils import get_peer_id
+        from ingestion.rate_limit import get_scheduler
+        from ingestion.scraper import telegram_client
+
+        loop = asyncio.get_running_loop()
+
+        async def emit(channel, record):
+            # Blocks in an executor thread when the queue is full (backpressure)
+            await loop.run_in_executor(None, self.events.put, (channel, record))
+
+        try:
+            client = telegram_client("listener_session")
+            self._loop, self._client = loop, client
+            await client.start()
+
+            channels = {}
+            for channel_url in self.channel_urls:
+                entity = await get_scheduler().acall(channel_url.split("/")[-1], client.get_entity, channel_url)
+                channels[get_peer_id(entity)] = channel_url.split("/")[-1]
+
+            async def on_message(event):
+                channel = channels[event.chat_id]
+                await emit(channel, await self._record(client, channel, event.message))
+
+            async def on_views(update):
+                channel = channels.get(get_peer_id(PeerChannel(update.channel_id)))
+                if channel:
+                    await emit(channel, {"id": update.id, "views": update.views})
+
+            chats = list(channels)
+            client.add_event_handler(on_message, events.NewMessage(chats=chats))
+            client.add_event_handler(on_message, events.MessageEdited(chats=chats))
+            client.add_event_handler(on_views, events.Raw(types=UpdateChannelMessageViews))
+
+            scrape_logger.info(f"Listening to {', '.join(channels.values())}...")
+            await client.run_until_disconnected()
+        except Exception as e:
+            scrape_logger.error(f"Listener failed: {e}")
+            self.error = e
+        finally:
+            self._closed.set()
+
+class FakeEventSource:
+    """Synthetic new-message, edit and view-count events, with no network.
+
+    Emits `rate` events per second (0: as fast as they are consumed) for
+    `duration` seconds or `count` events, spread over `channels`. A share
+    `edit_ratio` of the events update a recent message: half change its
+    views only, half edit its text. Events are deterministic for a `seed`.
+    """
+
+    def __init__(self, channels=("fake_channel_1", "fake_channel_2", "fake_channel_3"),
+                 rate: float = 1000, duration: float = 10, count: Optional[int] = None,
+                 edit_ratio: float = 0.3, seed: int = 0):
+        self.channels = list(channels)
+        self.rate = rate
+        self.duration = duration
+        self.count = count
+        self.edit_ratio = edit_ratio
+        self.seed = seed
+        self.stats = {"events": 0, "new": 0, "edits": 0, "views": 0}
+
+    def __iter__(self):
+        rng = random.Random(self.seed)
+        last_ids = {channel: 0 for channel in self.channels}
+        messages = {}
+        started = time.monotonic()
+
+        while True:
+            emitted = self.stats["events"]
+            if self.count is not None and emitted >= self.count:
+                return
+            now = time.monotonic()
+            if self.duration and now - started >= self.duration:
+                return
+            if self.rate:
+                delay = started + emitted / self.rate - now
+                if delay > 0:
+                    time.sleep(delay)
+
+            channel = rng.choice(self.channels)
+            if last_ids[channel] and rng.random() < self.edit_ratio:
+                # Recent messages get most of the edits and views
+                message_id = max(1, last_ids[channel] - int(rng.expovariate(0.05)))
+                message = messages[(channel, message_id)]
+                message["views"] += rng.randint(1, 50)
+                if rng.random() < 0.5:
+                    kind, record = "views", {"id": message_id, "views": message["views"]}
+                else:
+                    message["text"] += " (edited)"
+                    kind, record = "edits", dict(message)
+            else:
+                last_ids[channel] += 1
+                message_id = last_ids[channel]
+                message = {
+                    "id": message_id,
+                    "date": str(datetime.now(timezone.utc)),
+                    "text": f"Synthetic message {message_id} from {channel}",
+                    "views": 0,
+                    "has_media": False,
+                    "media_path": None
+                }
+                messages[(channel, message_id)] = message
+                kind, record = "new", dict(message)
+
+            self.stats["events"] += 1
+            self.stats[kind] += 1
+            yield channel, record
+
+def discard_messages(batches):
+    """Stand-in loader for `--no-db`: counts the events instead of writing them."""
+    return sum(len(records) for records in batches.values())
+
+def discard_images(image_paths):
+    return len(image_paths)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", nargs="*", help="Channel names (default: all configured channels)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Events per upsert micro-batch")
+    parser.add_argument("--batch-wait", type=float, default=1.0,
+                        help="Seconds a micro-batch waits to fill before it is written")
+    parser.add_argument("--queue-size", type=int, default=5000,
+                        help="Queue capacity between stages (bounds memory)")
+    parser.add_argument("--dbt-interval", type=float, default=0,
+                        help="Run dbt every N seconds while new rows arrive (0: never)")
+
+    fake = parser.add_argument_group("fake event source (testing and benchmarks)")
+    fake.add_argument("--fake", action="store_true", help="Generate synthetic events instead of listening")
+    fake.add_argument("--rate", type=float, default=1000, help="Target events/sec (0: as fast as possible)")
+    fake.add_argument("--duration", type=float, default=10, help="Seconds to generate events for")
+    fake.add_argument("--edit-ratio", type=float, default=0.3, help="Share of events updating a recent message")
+    fake.add_argument("--no-db", action="store_true", help="Discard events instead of writing them")
+    args = parser.parse_args()
+
+    if args.fake:
+        source = FakeEventSource(
+            channels=args.channels or ("fake_channel_1", "fake_channel_2", "fake_channel_3"),
+            rate=args.rate, duration=args.duration, edit_ratio=args.edit_ratio
+        )
+    else:
+        from ingestion.scraper import CHANNELS
+        channel_urls = [f"https://t.me/{channel}" for channel in args.channels] if args.channels else CHANNELS
+        source = TelegramEventSource(channel_urls, queue_size=args.queue_size)
+
+    options = {}
+    if args.no_db:
+        options = {"load": discard_messages, "archive": None, "enrich": discard_images}
+    else:
+        prepare_tables()
+    pipeline = StreamingPipeline(
+        batch_size=args.batch_size,
+        batch_wait=args.batch_wait,
+        queue_size=args.queue_size,
+        dbt_interval=0 if args.no_db else args.dbt_interval,
+        **options
+    )
+
+    started = time.monotonic()
+    try:
+        succeeded = pipeline.run(source)
+    except KeyboardInterrupt:
+        succeeded = not pipeline.errors
+        print("\n🛑 Listener stopped")
+    finally:
+        if isinstance(source, TelegramEventSource):
+            source.close()
+    elapsed = time.monotonic() - started
+
+    summary = pipeline.summary()
+    print("\n" + "=" * 60)
+    print("📊 LISTENER SUMMARY")
+    print("=" * 60)
+    if isinstance(source, FakeEventSource):
+        stats = source.stats
+        print(f"Events generated: {stats['events']} ({stats['new']} new, {stats['edits']} edits, "
+              f"{stats['views']} view updates), target {args.rate or 'max'}/s")
+    print(f"Events loaded: {summary['loaded']} in {summary['load_batches']} batches "
+          f"({summary['written']} rows written, {summary['archived']} archived)")
+    print(f"Sustained throughput: {summary['loaded'] / elapsed:.0f} events/s over {elapsed:.1f}s")
+    print(f"Freshness (received → loaded): avg {summary['freshness_avg_s']}s, max {summary['freshness_max_s']}s")
+
+    if not succeeded:
+        print("⚠️  Listener stopped with errors")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
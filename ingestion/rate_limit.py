@@ -0,0 +1,215 @@
+"""
+Central request scheduler for Telegram API calls.
+
+Every scraper request (history pages, media downloads, entity lookups) goes
+through one `RequestScheduler` per process:
+
+- a token bucket caps the request rate, allowing short bursts of `burst`
+  requests;
+- a FloodWaitError pauses *all* requests for exactly the number of seconds
+  Telegram asked for, then the request is retried;
+- the rate and the number of requests in flight adapt AIMD-style: they grow
+  with every success (quickly until the first flood wait, then additively),
+  up to SCRAPER_MAX_RATE and SCRAPER_MAX_CONCURRENCY, and are cut by
+  `decrease` on a flood wait, so the scheduler settles just below the
+  highest rate Telegram sustains;
+- server errors and dropped connections are retried with exponential backoff
+  and jitter, up to `max_retries` times.
+
+The concurrency limit only binds when several threads or tasks share the
+scheduler (backfill chunks, listener downloads). The history scraper
+(ingestion/scraper.py) issues one request at a time, so there only the rate
+and flood-wait pauses apply.
+
+Requests, retries, flood waits and backoff time are counted per channel
+(`print_report`). Telethon's own flood handling is switched off on the
+clients (`flood_sleep_threshold=0`) so that flood waits reach the scheduler.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from telethon.errors import FloodWaitError, ServerError
+
+from utils.config import SCRAPER_MAX_RATE, SCRAPER_MAX_CONCURRENCY, SCRAPER_MAX_RETRIES
+
+# Retried with backoff; anything else fails the request at once
+TRANSIENT_ERRORS = (ServerError, OSError, asyncio.TimeoutError)
+
+class RequestScheduler:
+    """Token bucket plus AIMD rate and concurrency shared by every Telegram request.
+
+    `call` runs a blocking request (telethon.sync), `acall` awaits a
+    coroutine; both share the same budget and may be used from several
+    threads or tasks at once.
+    """
+
+    def __init__(self, max_rate: float = 20.0, max_concurrency: int = 8, initial_rate: float = 5.0,
+                 min_rate: float = 0.5, burst: int = 5, increase: float = 0.5, decrease: float = 0.7,
+                 max_retries: int = 5, backoff_base: float = 1.0, max_flood_wait: float = 3600):
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.min_rate = min_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_flood_wait = max_flood_wait
+
+        self.rate = min(initial_rate, max_rate)
+        self.concurrency = 1.0
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._slow_start = True
+        self.started = time.monotonic()
+        self._updated = self.started
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict] = {}
+
+    def _channel_stats(self, channel: str) -> Dict:
+        return self.stats.setdefault(channel, {
+            "requests": 0, "retries": 0, "flood_waits": 0, "flood_wait_s": 0.0,
+            "backoff_s": 0.0, "failures": 0
+        })
+
+    def _reserve(self) -> float:
+        """Take a token, borrowing ahead when the bucket is empty; returns how long to wait for it.
+
+        Borrowed tokens queue callers in arrival order, so no channel is starved.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate, self.paused_until - now)
+
+    def _start(self) -> float:
+        """Take an in-flight slot; returns 0, or how long to wait (for a slot or a flood pause)."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.in_flight >= int(self.concurrency):
+                return 0.01
+            self.in_flight += 1
+            return 0.0
+
+    def _succeeded(self, channel: str):
+        with self._lock:
+            self.in_flight -= 1
+            self._channel_stats(channel)["requests"] += 1
+            if self._slow_start:
+                # Until the first flood wait the rate grows by `increase` per request
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            else:
+                # Additive increase: about +`increase` requests/sec per second at full rate
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+    def _failed(self, channel: str, error: Exception, attempt: int) -> float:
+        """Account for a failed request; returns the backoff before retrying, or raises `error`."""
+        with self._lock:
+            self.in_flight -= 1
+            stats = self._channel_stats(channel)
+            now = time.monotonic()
+            if isinstance(error, FloodWaitError) and error.seconds <= self.max_flood_wait:
+                stats["retries"] += 1
+                stats["flood_waits"] += 1
+                stats["flood_wait_s"] += error.seconds
+                # Requests already in flight hit the same limit: back off once per pause
+                if now >= self.paused_until:
+                    self._slow_start = False
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self.concurrency = max(1.0, self.concurrency * self.decrease)
+                self.paused_until = max(self.paused_until, now + error.seconds)
+                return 0.0
+            if isinstance(error, TRANSIENT_ERRORS) and attempt < self.max_retries:
+                delay = self.backoff_base * 2 ** attempt * random.uniform(0.5, 1.0)
+                stats["retries"] += 1
+                stats["backoff_s"] += delay
+                return delay
+            stats["failures"] += 1
+        raise error
+
+    def call(self, channel: str, func: Callable, *args, **kwargs):
+        """Run a blocking request for `channel` within the budget, retrying flood waits and transient errors."""
+        attempt = 0
+        while True:
+            time.sleep(self._reserve())
+            delay = self._start()
+            while delay:
+                time.sleep(delay)
+                delay = self._start()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                time.sleep(self._failed(channel, e, attempt))
+                if not isinstance(e, FloodWaitError):
+                    attempt += 1
+                continue
+            self._succeeded(channel)
+            return result
+
+    async def acall(self, channel: str, func: Callable, *args, **kwargs):
+        """`call` for coroutine functions."""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._reserve())
+            delay = self._start()
+            while delay:
+                await asyncio.sleep(delay)
+                delay = self._start()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                await asyncio.sleep(self._failed(channel, e, attempt))
+                if not isinstance(e, FloodWaitError):
+                    attempt += 1
+                continue
+            self._succeeded(channel)
+            return result
+
+    def summary(self) -> Dict:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            requests = sum(stats["requests"] for stats in self.stats.values())
+            return {
+                "elapsed_s": round(elapsed, 1),
+                "requests": requests,
+                "requests_per_s": round(requests / elapsed, 2) if elapsed > 0 else None,
+                "rate": round(self.rate, 2),
+                "concurrency": int(self.concurrency),
+                "channels": {channel: dict(stats) for channel, stats in self.stats.items()},
+            }
+
+    def print_report(self):
+        summary = self.summary()
+        print(f"{'channel':<24}{'requests':>10}{'retries':>9}{'floods':>8}{'flood s':>9}"
+              f"{'backoff s':>11}{'failed':>8}")
+        for channel, stats in summary["channels"].items():
+            print(f"{channel:<24}{stats['requests']:>10}{stats['retries']:>9}{stats['flood_waits']:>8}"
+                  f"{stats['flood_wait_s']:>9.0f}{stats['backoff_s']:>11.1f}{stats['failures']:>8}")
+        print(f"📈 {summary['requests']} requests in {summary['elapsed_s']}s "
+              f"({summary['requests_per_s']}/s); adaptive rate now {summary['rate']}/s, "
+              f"concurrency {summary['concurrency']}")
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> RequestScheduler:
+    """The process-wide scheduler, configured from SCRAPER_* settings."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(
+                max_rate=SCRAPER_MAX_RATE,
+                max_concurrency=SCRAPER_MAX_CONCURRENCY,
+                max_retries=SCRAPER_MAX_RETRIES
+            )
+        return _scheduler
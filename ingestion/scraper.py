@@ -8,6 +8,7 @@ from datetime import datetime
 from telethon.sync import TelegramClient
 from telethon.tl.types import MessageMediaPhoto
 from ingestion.logger import scrape_logger
+from ingestion.rate_limit import get_scheduler
 from utils.config import TELEGRAM_API_ID, TELEGRAM_API_HASH
 from utils.helpers import ensure_dir
 
@@ -20,9 +21,91 @@ CHANNELS = [
 
 BASE_DIR = "data/raw/telegram_messages"
 IMAGE_DIR = "data/raw/images"
+PAGE_SIZE = 100  # messages per history request (the API maximum)
 
-def fetch_messages(channel_url, limit=200):
-    today = datetime.utcnow().strftime("%Y-%m-%d")
+def telegram_client(session):
+    """A client whose flood waits are raised to the request scheduler instead of slept through."""
+    return TelegramClient(session, TELEGRAM_API_ID, TELEGRAM_API_HASH, flood_sleep_threshold=0)
+
+def message_record(msg):
+    """A Telegram message as stored in the raw JSON files (`media_path` is set by the caller)."""
+    return {
+        "id": msg.id,
+        "date": str(msg.date),
+        "text": msg.message,
+        "views": msg.views,
+        "has_media": isinstance(msg.media, MessageMediaPhoto),
+        "media_path": None
+    }
+
+def merge_raw_file(path, messages):
+    """Merge messages into a raw JSON file by id (creating it if needed); returns the messages stored.
+
+    Messages already in the file are replaced, keeping the path of a photo an
+    earlier run downloaded; the file stays sorted newest first and is replaced
+    atomically.
+    """
+    stored = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            stored = {message["id"]: message for message in json.load(f)}
+    for message in messages:
+        if not message.get("media_path") and message["id"] in stored:
+            message["media_path"] = stored[message["id"]].get("media_path")
+        stored[message["id"]] = message
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(sorted(stored.values(), key=lambda m: m["id"], reverse=True), f,
+                  indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return len(stored)
+
+def iter_messages(client, channel_url, limit=200, image_output_dir=None):
+    """Yield a channel's messages as dicts, newest first, downloading photos as they arrive.
+
+    History is fetched page by page and every request goes through the
+    request scheduler. Requests are sequential, so only its rate limit and
+    flood-wait pauses apply; its adaptive concurrency has no effect here.
+    Photos are saved to `image_output_dir` (skipped when None) and their path
+    recorded in `media_path`.
+    """
+    scheduler = get_scheduler()
+    channel_name = channel_url.split("/")[-1]
+    offset_id = 0
+    remaining = limit
+    while remaining > 0:
+        page = scheduler.call(channel_name, client.get_messages, channel_url,
+                              limit=min(PAGE_SIZE, remaining), offset_id=offset_id)
+        if not page:
+            break
+        for msg in page:
+            message_data = message_record(msg)
+
+            # Download images if message has media
+            if isinstance(msg.media, MessageMediaPhoto) and image_output_dir:
+                try:
+                    image_filename = f"{channel_name}_{msg.id}.jpg"
+                    image_path = os.path.join(image_output_dir, image_filename)
+                    scheduler.call(channel_name, client.download_media, msg, image_path)
+                    message_data["media_path"] = image_path
+                    scrape_logger.info(f"Downloaded image: {image_filename}")
+                except Exception as e:
+                    scrape_logger.warning(f"Failed to download media for message {msg.id}: {e}")
+
+            yield message_data
+        offset_id = page[-1].id
+        remaining -= len(page)
+
+def fetch_messages(channel_url, limit=200, run_date=None):
+    """Scrape a channel into data/raw/telegram_messages/<run_date>/<channel>.json.
+
+    Raw files are keyed by the date messages were fetched, not sent: `run_date`
+    (YYYY-MM-DD) defaults to today (UTC). Messages are merged into the file by
+    id, so a backfill of the same day is kept. Returns the JSON path; raises
+    if the channel could not be fetched.
+    """
+    today = run_date or datetime.utcnow().strftime("%Y-%m-%d")
     channel_name = channel_url.split("/")[-1]
     output_dir = os.path.join(BASE_DIR, today)
     image_output_dir = os.path.join(IMAGE_DIR, today, channel_name)
@@ -33,42 +116,41 @@ def fetch_messages(channel_url, limit=200):
     scrape_logger.info(f"Fetching messages from {channel_name}...")
 
     try:
-        with TelegramClient("scraper_session", TELEGRAM_API_ID, TELEGRAM_API_HASH) as client:
-            messages = []
-            for msg in client.iter_messages(channel_url, limit=limit):
-                message_data = {
-                    "id": msg.id,
-                    "date": str(msg.date),
-                    "text": msg.message,
-                    "views": msg.views,
-                    "has_media": isinstance(msg.media, MessageMediaPhoto),
-                    "media_path": None
-                }
-                
-                # Download images if message has media
-                if isinstance(msg.media, MessageMediaPhoto):
-                    try:
-                        image_filename = f"{channel_name}_{msg.id}.jpg"
-                        image_path = os.path.join(image_output_dir, image_filename)
-                        client.download_media(msg, image_path)
-                        message_data["media_path"] = image_path
-                        scrape_logger.info(f"Downloaded image: {image_filename}")
-                    except Exception as e:
-                        scrape_logger.warning(f"Failed to download media for message {msg.id}: {e}")
-                
-                messages.append(message_data)
-
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(messages, f, indent=2, ensure_ascii=False)
+        with telegram_client("scraper_session") as client:
+            messages = list(iter_messages(client, channel_url, limit, image_output_dir))
+            merge_raw_file(filename, messages)
 
             scrape_logger.info(f"Saved {len(messages)} messages from {channel_name} to {filename}")
 
     except Exception as e:
         scrape_logger.error(f"Failed to fetch {channel_name}: {str(e)}")
+        raise
+
+    return filename
+
+def stream_messages(channel_urls, limit=200, run_date=None):
+    """Yield (channel_name, message) for each channel in turn, as messages are fetched.
+
+    One Telegram session serves all channels. Photos go to the same
+    data/raw/images/<run_date>/<channel>/ folders as `fetch_messages`.
+    """
+    today = run_date or datetime.utcnow().strftime("%Y-%m-%d")
+    with telegram_client("scraper_session") as client:
+        for channel_url in channel_urls:
+            channel_name = channel_url.split("/")[-1]
+            image_output_dir = os.path.join(IMAGE_DIR, today, channel_name)
+            ensure_dir(image_output_dir)
+            scrape_logger.info(f"Streaming messages from {channel_name}...")
+            for message_data in iter_messages(client, channel_url, limit, image_output_dir):
+                yield channel_name, message_data
 
 def run_all():
     for channel in CHANNELS:
-        fetch_messages(channel)
+        try:
+            fetch_messages(channel)
+        except Exception:
+            continue  # already logged; scrape the remaining channels
+    get_scheduler().print_report()
 
 if __name__ == "__main__":
     run_all()
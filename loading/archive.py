@@ -0,0 +1,117 @@
+"""
+Columnar archive of raw messages: Parquet files partitioned by channel and message date.
+
+    data/archive/messages/channel=<channel>/date=<YYYY-MM-DD>/messages.parquet
+
+Scraped files are archived alongside loading (the pipeline's `archive`
+stage), and streamed micro-batches as they are loaded (pipeline/streaming.py).
+Messages are merged into their partition by id, the latest copy winning, so
+archiving is idempotent and each partition holds one row per message. analytics/offline.py queries the archive without touching
+PostgreSQL.
+
+Usage:
+    python loading/archive.py              # archive every scraped file
+    python loading/archive.py data/raw/telegram_messages/2025-07-19/CheMed123.json
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.helpers import raw_file_channel, raw_message_files
+
+RAW_DIR = "data/raw/telegram_messages"
+ARCHIVE_DIR = "data/archive/messages"
+
+# Partition columns (channel, date) live in the directory names only
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("message_date", pa.timestamp("us", tz="UTC")),
+    ("text", pa.string()),
+    ("views", pa.int64()),
+    ("has_media", pa.bool_()),
+    ("media_path", pa.string()),
+])
+
+def parse_message_date(value):
+    """Scraped dates (`str(msg.date)`) as aware UTC datetimes; naive values are taken as UTC."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+def partition_path(channel, date, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, f"channel={channel}", f"date={date}", "messages.parquet")
+
+def archive_messages(channel, messages, archive_dir=ARCHIVE_DIR):
+    """Merge one channel's messages into their date partitions; returns the number of messages archived."""
+    by_date = defaultdict(dict)
+    for msg in messages:
+        message_date = parse_message_date(msg["date"])
+        by_date[message_date.date().isoformat()][msg["id"]] = {
+            "id": msg["id"],
+            "message_date": message_date,
+            "text": msg.get("text"),
+            "views": msg.get("views"),
+            "has_media": msg.get("has_media", False),
+            "media_path": msg.get("media_path"),
+        }
+
+    for date, rows in by_date.items():
+        path = partition_path(channel, date, archive_dir)
+        merged = {}
+        if os.path.exists(path):
+            merged = {row["id"]: row for row in pq.ParquetFile(path).read().to_pylist()}
+        for message_id, row in rows.items():
+            # Keep the photo path an earlier copy recorded (view updates carry none)
+            if row["media_path"] is None and message_id in merged:
+                row["media_path"] = merged[message_id]["media_path"]
+        merged.update(rows)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pylist(sorted(merged.values(), key=lambda row: row["id"]), schema=SCHEMA)
+        tmp_path = path + ".tmp"
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+    return sum(len(rows) for rows in by_date.values())
+
+def archive_file(json_path, archive_dir=ARCHIVE_DIR):
+    """Archive one raw messages file (a scrape or backfill chunk); returns the number of messages archived."""
+    channel = raw_file_channel(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        messages = json.load(f)
+    return archive_messages(channel, messages, archive_dir)
+
+def archive_all(raw_dir=RAW_DIR, archive_dir=ARCHIVE_DIR):
+    """Archive every raw messages file, oldest run first so later runs win."""
+    archived = 0
+    for path in raw_message_files(raw_dir):
+        count = archive_file(path, archive_dir)
+        print(f"Archived {count} messages from {path}")
+        archived += count
+    print(f"✅ Archive complete: {archived} messages in {archive_dir}")
+    return archived
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="Scraped files to archive (default: all)")
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    if not args.files:
+        archive_all(args.raw_dir, args.archive_dir)
+        return
+    for path in args.files:
+        print(f"Archived {archive_file(path, args.archive_dir)} messages from {path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 import os, sys, json
-from glob import glob
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import Integer, column, func, or_, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
@@ -9,74 +8,161 @@ from dotenv import load_dotenv
 # Add project root to Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from loading.models import telegram_messages, metadata
+from loading.models import telegram_messages, create_raw_tables
 from utils.config import PG_CONFIG
+from utils.db import get_engine
+from utils.helpers import raw_file_channel, raw_message_files
 
 # load .env
 load_dotenv()
 
-# Build database URL using config
-DB_URL = (
-    f"postgresql+psycopg2://{PG_CONFIG['user']}:"
-    f"{PG_CONFIG['password']}@{PG_CONFIG['host']}:"
-    f"{PG_CONFIG['port']}/{PG_CONFIG['database']}"
-)
-
-print(f"Connecting to database: {PG_CONFIG['host']}:{PG_CONFIG['port']}/{PG_CONFIG['database']}")
-print(f"Database URL: postgresql+psycopg2://{PG_CONFIG['user']}:***@{PG_CONFIG['host']}:{PG_CONFIG['port']}/{PG_CONFIG['database']}")
-
-# set up engine & session
-try:
-    engine = create_engine(DB_URL)
-    # Test the connection
-    with engine.connect() as conn:
-        print("Database connection successful!")
-        
-        # Create schema if it doesn't exist
-        conn.execute(text("CREATE SCHEMA IF NOT EXISTS raw"))
-        conn.commit()
-        print("Schema 'raw' created/verified")
+RAW_DIR = 'data/raw/telegram_messages'
+LOAD_BATCH_SIZE = 1000  # rows per INSERT ... ON CONFLICT statement
+
+_engine = None
+_session = None
+
+def get_session():
+    """Connect on first use, creating the raw schema and tables.
+
+    The session is shared by every call, so files must be loaded one at a time.
+    """
+    global _engine, _session
+    if _session is not None:
+        return _session
+
+    print(f"Connecting to database: {PG_CONFIG['host']}:{PG_CONFIG['port']}/{PG_CONFIG['database']}")
+    print(f"Database URL: postgresql+psycopg2://{PG_CONFIG['user']}:***@{PG_CONFIG['host']}:{PG_CONFIG['port']}/{PG_CONFIG['database']}")
+
+    # set up engine & session
+    try:
+        engine = get_engine()
+        # Test the connection
+        with engine.connect() as conn:
+            print("Database connection successful!")
+            
+        # Create schema and tables (and new columns on existing tables)
+        create_raw_tables(engine)
+        print("Schema 'raw' and tables created/verified")
         
-    # Create all tables defined in metadata
-    metadata.create_all(engine)
-    print("Tables created/verified")
-    
-    Session = sessionmaker(bind=engine)
-    session = Session()
-except Exception as e:
-    print(f"Database connection failed: {e}")
-    print("Make sure PostgreSQL is running and accessible")
-    exit(1)
+        Session = sessionmaker(bind=engine)
+        _engine, _session = engine, Session()
+    except Exception as e:
+        print(f"Database connection failed: {e}")
+        print("Make sure PostgreSQL is running and accessible")
+        raise
+    return _session
+
+def close_session():
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
 
 def load_file(filepath):
-    channel = os.path.basename(filepath).replace('.json','')
+    """Upsert a raw messages file in one transaction; returns the number of rows written.
+
+    Records go through `upsert_messages` LOAD_BATCH_SIZE at a time: new
+    messages are inserted and known ones updated when their text or views
+    changed.
+    """
+    channel = raw_file_channel(filepath)
     with open(filepath, 'r', encoding='utf-8') as f:
         records = json.load(f)
 
-    # Insert each record
-    for msg in records:
-        ins = telegram_messages.insert().values(
-            id        = msg['id'],
-            date      = msg['date'],
-            text      = msg['text'],
-            views     = msg.get('views'),
-            has_media = msg.get('has_media', False),
-            channel   = channel
+    get_session()
+    written = 0
+    with _engine.begin() as conn:
+        for start in range(0, len(records), LOAD_BATCH_SIZE):
+            written += upsert_messages(conn, channel, records[start:start + LOAD_BATCH_SIZE])
+    return written
+
+def upsert_messages(conn, channel, records):
+    """Write a micro-batch of one channel's scraped messages in a single statement.
+
+    New messages are inserted; known ones are updated (and re-stamped with
+    `loaded_at`, so incremental dbt models pick them up) only when their
+    text or views changed. Returns the number of rows written.
+    """
+    if not records:
+        return 0
+    # ON CONFLICT DO UPDATE cannot touch a row twice: keep the latest copy of each message
+    latest = {msg['id']: msg for msg in records}
+    stmt = pg_insert(telegram_messages).values([
+        {
+            "id": msg['id'],
+            "date": msg['date'],
+            "text": msg['text'],
+            "views": msg.get('views'),
+            "has_media": msg.get('has_media', False),
+            "channel": channel,
+        }
+        for msg in latest.values()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[telegram_messages.c.channel, telegram_messages.c.id],
+        set_={
+            "text": stmt.excluded.text,
+            "views": stmt.excluded.views,
+            "has_media": stmt.excluded.has_media,
+            "loaded_at": func.now(),
+        },
+        where=or_(
+            telegram_messages.c.text.is_distinct_from(stmt.excluded.text),
+            telegram_messages.c.views.is_distinct_from(stmt.excluded.views),
         )
-        try:
-            session.execute(ins)
-        except IntegrityError:
-            session.rollback()      # skip duplicates
+    )
+    return conn.execute(stmt).rowcount
+
+def update_views(conn, channel, views):
+    """Apply view counts ({message id: views}) to known messages in one UPDATE ... FROM VALUES.
+
+    Unknown messages are ignored. Returns the number of rows whose count changed.
+    """
+    if not views:
+        return 0
+    updates = values(column('id', Integer), column('views', Integer), name='updates').data(list(views.items()))
+    stmt = (
+        telegram_messages.update()
+        .where(
+            telegram_messages.c.channel == channel,
+            telegram_messages.c.id == updates.c.id,
+            telegram_messages.c.views.is_distinct_from(updates.c.views),
+        )
+        .values(views=updates.c.views, loaded_at=func.now())
+    )
+    return conn.execute(stmt).rowcount
+
+def apply_message_events(conn, channel, records):
+    """Write one channel's micro-batch of message events, in arrival order.
+
+    Full message records (new or edited messages) are upserted; view-count
+    updates (`{"id", "views"}` only) are folded into a full record of the same
+    batch when there is one, and otherwise applied with `update_views`.
+    Returns the number of rows written.
+    """
+    messages, views = {}, {}
+    for record in records:
+        message_id = record['id']
+        if 'date' in record:
+            messages[message_id] = record
+            views.pop(message_id, None)
+        elif message_id in messages:
+            messages[message_id] = {**messages[message_id], 'views': record['views']}
         else:
-            session.commit()
+            views[message_id] = record['views']
+    return upsert_messages(conn, channel, list(messages.values())) + update_views(conn, channel, views)
 
 def run_loader():
-    for date_folder in os.listdir('data/raw/telegram_messages'):
-        path = os.path.join('data/raw/telegram_messages', date_folder, '*.json')
-        for filepath in glob(path):
-            print(f"Loading {filepath}")
-            load_file(filepath)
+    """Load every raw messages file; run dbt afterwards to rebuild the marts (and bump the data version)."""
+    for filepath in raw_message_files(RAW_DIR):
+        print(f"Loading {filepath}")
+        load_file(filepath)
 
 if __name__ == "__main__":
+    try:
+        get_session()
+    except Exception:
+        exit(1)
     run_loader()
-    session.close()
+    close_session()
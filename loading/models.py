@@ -1,14 +1,44 @@
-from sqlalchemy import MetaData, Table, Column, Integer, Text, Boolean, TIMESTAMP
+from sqlalchemy import MetaData, Table, Column, Index, Integer, Text, Boolean, TIMESTAMP, func, text
 
 metadata = MetaData()
 
 telegram_messages = Table(
     'telegram_messages', metadata,
+    # Message ids are only unique within a channel
+    Column('channel', Text, primary_key=True),
     Column('id', Integer, primary_key=True),
     Column('date', TIMESTAMP),
     Column('text', Text),
     Column('views', Integer),
     Column('has_media', Boolean),
-    Column('channel', Text),
+    # Load time: the watermark for incremental dbt models
+    Column('loaded_at', TIMESTAMP(timezone=True), nullable=False, server_default=func.now()),
+    Index('ix_telegram_messages_loaded_at', 'loaded_at'),
     schema='raw'
 )
+
+def create_raw_tables(engine):
+    """Create the raw schema and tables, adding columns introduced since they were first created."""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS raw"))
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE raw.telegram_messages "
+            "ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMPTZ NOT NULL DEFAULT now()"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_telegram_messages_loaded_at "
+            "ON raw.telegram_messages (loaded_at)"
+        ))
+        # Tables created before the key included the channel
+        primary_key = conn.execute(text(
+            "SELECT a.attname FROM pg_index i "
+            "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+            "WHERE i.indrelid = 'raw.telegram_messages'::regclass AND i.indisprimary"
+        )).scalars().all()
+        if primary_key == ['id']:
+            conn.execute(text(
+                "ALTER TABLE raw.telegram_messages "
+                "DROP CONSTRAINT telegram_messages_pkey, ADD PRIMARY KEY (channel, id)"
+            ))
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Pipeline run reports and throughput regression checks.
+
+Every `run_pipeline.py` run writes `data/pipeline/runs/<run_id>.json` with the
+metrics of each task it ran (wall time, records in/out, bytes, rows/sec,
+process peak RSS) and per-stage totals. `compare` checks a run against the
+median of the runs before it and flags stages whose throughput fell by more
+than the threshold.
+
+Usage:
+    python pipeline/report.py compare                     # latest run vs the 10 before it
+    python pipeline/report.py compare data/pipeline/runs/20250719T020000Z.json \\
+        --history 20 --threshold 0.3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from datetime import datetime, timezone
+from glob import glob
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+RUNS_DIR = "data/pipeline/runs"
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MiB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+class RunReport:
+    """Metrics of the tasks run by one pipeline invocation."""
+
+    def __init__(self, config: Dict):
+        self.started_at = datetime.now(timezone.utc)
+        self.run_id = self.started_at.strftime("%Y%m%dT%H%M%SZ")
+        self.config = config
+        self.tasks: List[Dict] = []
+
+    def add_task(self, stage: str, partition: str, status: str, wall_s: float,
+                 metrics: Optional[Dict] = None):
+        metrics = metrics or {}
+        # Throughput counts records processed: input, or output for sources
+        records = metrics.get("records_in", metrics.get("records_out"))
+        self.tasks.append({
+            "stage": stage,
+            "partition": partition,
+            "status": status,
+            "wall_s": round(wall_s, 3),
+            "records_in": metrics.get("records_in"),
+            "records_out": metrics.get("records_out"),
+            "bytes": metrics.get("bytes"),
+            "rows_per_s": round(records / wall_s, 2) if records is not None and wall_s > 0 else None,
+            # Shared by concurrent tasks: the process peak when this task finished
+            "peak_rss_mb": peak_rss_mb(),
+        })
+
+    def stage_totals(self) -> Dict[str, Dict]:
+        """Per-stage totals over successful tasks; rows/sec is records over summed wall time."""
+        totals = {}
+        for task in self.tasks:
+            stage = totals.setdefault(task["stage"], {
+                "tasks": 0, "failed": 0, "wall_s": 0.0,
+                "records_in": 0, "records_out": 0, "bytes": 0, "peak_rss_mb": None
+            })
+            if task["status"] != "completed":
+                stage["failed"] += 1
+                continue
+            stage["tasks"] += 1
+            stage["wall_s"] = round(stage["wall_s"] + task["wall_s"], 3)
+            for key in ("records_in", "records_out", "bytes"):
+                stage[key] += task[key] or 0
+            if task["peak_rss_mb"] is not None:
+                stage["peak_rss_mb"] = max(stage["peak_rss_mb"] or 0, task["peak_rss_mb"])
+
+        for stage in totals.values():
+            records = stage["records_in"] or stage["records_out"]
+            stage["rows_per_s"] = round(records / stage["wall_s"], 2) if stage["wall_s"] > 0 else None
+        return totals
+
+    def save(self, directory: str = RUNS_DIR) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.json")
+        with open(path, "w") as f:
+            json.dump({
+                "run_id": self.run_id,
+                "started_at": self.started_at.isoformat(),
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "config": self.config,
+                "stages": self.stage_totals(),
+                "tasks": self.tasks,
+            }, f, indent=2)
+        return path
+
+def print_stage_totals(stages: Dict[str, Dict]):
+    print(f"{'stage':<18}{'tasks':>6}{'wall s':>10}{'in':>10}{'out':>10}{'MB':>10}{'rows/s':>10}{'RSS MB':>10}")
+    for name, stage in stages.items():
+        megabytes = round(stage["bytes"] / (1024 * 1024), 1)
+        print(f"{name:<18}{stage['tasks']:>6}{stage['wall_s']:>10}{stage['records_in']:>10}"
+              f"{stage['records_out']:>10}{megabytes:>10}{str(stage['rows_per_s']):>10}"
+              f"{str(stage['peak_rss_mb']):>10}")
+
+def run_reports(directory: str = RUNS_DIR) -> List[str]:
+    """Report paths, oldest first (run ids sort chronologically)."""
+    return sorted(glob(os.path.join(directory, "*.json")))
+
+def compare_throughput(current: Dict, history: List[Dict], threshold: float) -> List[Dict]:
+    """Each stage's rows/sec against its median over `history`; `regressed` if it fell more than `threshold`."""
+    results = []
+    for name, stage in current["stages"].items():
+        if not stage.get("rows_per_s"):
+            continue
+        past = [
+            report["stages"][name]["rows_per_s"] for report in history
+            if report["stages"].get(name, {}).get("rows_per_s")
+        ]
+        if not past:
+            continue
+        baseline = round(statistics.median(past), 2)
+        change = (stage["rows_per_s"] - baseline) / baseline
+        results.append({
+            "stage": name,
+            "rows_per_s": stage["rows_per_s"],
+            "baseline_rows_per_s": baseline,
+            "history_runs": len(past),
+            "change": change,
+            "regressed": change < -threshold,
+        })
+    return results
+
+def compare(report_path: Optional[str] = None, history: int = 10, threshold: float = 0.2,
+            directory: str = RUNS_DIR) -> bool:
+    """Print the throughput comparison; returns False if any stage regressed."""
+    paths = run_reports(directory)
+    if report_path is None:
+        if not paths:
+            print(f"ℹ️  No run reports in {directory}")
+            return True
+        report_path = paths[-1]
+    earlier = [path for path in paths if os.path.basename(path) < os.path.basename(report_path)]
+
+    with open(report_path) as f:
+        current = json.load(f)
+    past_reports = []
+    for path in earlier[-history:]:
+        with open(path) as f:
+            past_reports.append(json.load(f))
+
+    results = compare_throughput(current, past_reports, threshold)
+    if not results:
+        print(f"ℹ️  No earlier runs with the same stages to compare {current['run_id']} against")
+        return True
+
+    print(f"Run {current['run_id']} vs median of up to {history} earlier runs (threshold -{threshold:.0%})")
+    print(f"{'stage':<18}{'rows/s':>12}{'baseline':>12}{'change':>10}")
+    for result in results:
+        status = "❌" if result["regressed"] else "✅"
+        print(f"{result['stage']:<18}{result['rows_per_s']:>12}{result['baseline_rows_per_s']:>12}"
+              f"{result['change']:>+10.1%}  {status}")
+    regressed = [result["stage"] for result in results if result["regressed"]]
+    if regressed:
+        print(f"⚠️  Throughput regression in: {', '.join(regressed)}")
+    return not regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compare_parser = subparsers.add_parser("compare", help="Flag stages slower than recent runs")
+    compare_parser.add_argument("report", nargs="?", help="Run report (default: the latest)")
+    compare_parser.add_argument("--history", type=int, default=10, help="Earlier runs forming the baseline")
+    compare_parser.add_argument("--threshold", type=float, default=0.2,
+                                help="Flag stages whose rows/sec fell by more than this fraction")
+    compare_parser.add_argument("--runs-dir", default=RUNS_DIR)
+
+    args = parser.parse_args()
+    if not compare(args.report, args.history, args.threshold, args.runs_dir):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
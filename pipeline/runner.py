@@ -0,0 +1,170 @@
+"""
+Dependency-graph runner for the pipeline.
+
+Stages are declared with their upstream stages and run once per partition
+(`<date>/<channel>`). A (stage, partition) task starts as soon as the same
+partition of every upstream stage has completed, so independent stages run in
+parallel on a thread pool and partitions never wait for each other.
+
+Task outcomes are recorded in a JSON state file. On rerun, completed tasks are
+skipped; failed tasks, and everything downstream of them, run again, so a
+failed pipeline resumes from the failed stage. Per-task metrics go to a
+`RunReport` (pipeline/report.py).
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from pipeline.report import RunReport
+
+COMPLETED = "completed"
+FAILED = "failed"
+
+class Stage:
+    """A pipeline step run once per partition.
+
+    `func(partition)` does the work and raises on failure; it may return a
+    dict of `records_in`, `records_out` and `bytes` for the run report.
+    `concurrency` caps how many partitions of this stage run at once (e.g. 1
+    for steps sharing a session file or a model); None means no cap.
+    """
+
+    def __init__(self, name: str, func: Callable[[str], Optional[Dict]], deps: Sequence[str] = (),
+                 description: str = "", concurrency: Optional[int] = None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.description = description or name
+        self.concurrency = concurrency
+
+class PipelineState:
+    """Per-partition task outcomes, persisted to a JSON file after every change."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.tasks: Dict[str, Dict[str, dict]] = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.tasks = json.load(f).get("tasks", {})
+
+    def status(self, stage: str, partition: str) -> Optional[str]:
+        return self.tasks.get(stage, {}).get(partition, {}).get("status")
+
+    def record(self, stage: str, partition: str, status: str, **info):
+        with self._lock:
+            self.tasks.setdefault(stage, {})[partition] = {
+                "status": status,
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                **info
+            }
+            self._save()
+
+    def reset(self, stages: Iterable[str], partitions: Iterable[str]):
+        """Forget outcomes so these tasks run again."""
+        partitions = list(partitions)
+        with self._lock:
+            for stage in stages:
+                for partition in partitions:
+                    self.tasks.get(stage, {}).pop(partition, None)
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"tasks": self.tasks}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def downstream(stages: List[Stage], names: Iterable[str]) -> List[str]:
+    """The named stages and every stage depending on them, in declaration order."""
+    selected = set(names)
+    for stage in stages:
+        if selected.intersection(stage.deps):
+            selected.add(stage.name)
+    return [stage.name for stage in stages if stage.name in selected]
+
+def run_pipeline(stages: List[Stage], partitions: List[str], state: PipelineState,
+                 max_workers: int = 4, report: Optional[RunReport] = None) -> bool:
+    """Run every (stage, partition) task not yet completed; returns True if all succeeded.
+
+    `stages` must be listed in dependency order. Dependencies on stages not in
+    `stages` are treated as satisfied, so a subset of the graph can be run on
+    its own. A failed task blocks its downstream tasks for that partition only.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    pending = [
+        (stage, partition)
+        for stage in stages for partition in partitions
+        if state.status(stage.name, partition) != COMPLETED
+    ]
+    skipped = len(stages) * len(partitions) - len(pending)
+    if skipped:
+        print(f"⏭️  Skipping {skipped} completed task(s)")
+
+    running = {}
+    running_per_stage = {stage.name: 0 for stage in stages}
+    failed = set()
+
+    def dep_status(stage, partition):
+        statuses = [
+            state.status(dep, partition) if dep in by_name else COMPLETED
+            for dep in stage.deps
+        ]
+        if any((dep, partition) in failed for dep in stage.deps):
+            return FAILED
+        return COMPLETED if all(status == COMPLETED for status in statuses) else None
+
+    def run_task(stage, partition):
+        """Returns (wall seconds, metrics, error)."""
+        started = time.perf_counter()
+        try:
+            metrics = stage.func(partition)
+        except Exception as e:
+            return time.perf_counter() - started, None, e
+        return time.perf_counter() - started, metrics, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for task in list(pending):
+                stage, partition = task
+                readiness = dep_status(stage, partition)
+                if readiness == FAILED:
+                    pending.remove(task)
+                    failed.add((stage.name, partition))
+                    print(f"⏸️  {stage.name} [{partition}] blocked by an upstream failure")
+                elif readiness == COMPLETED and (
+                    stage.concurrency is None or running_per_stage[stage.name] < stage.concurrency
+                ):
+                    pending.remove(task)
+                    running_per_stage[stage.name] += 1
+                    print(f"🚀 {stage.description} [{partition}]")
+                    running[executor.submit(run_task, stage, partition)] = task
+
+            if not running:
+                # Nothing runnable: remaining tasks wait on stages outside this run
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, partition = running.pop(future)
+                running_per_stage[stage.name] -= 1
+                duration, metrics, error = future.result()
+                status = FAILED if error is not None else COMPLETED
+                if report is not None:
+                    report.add_task(stage.name, partition, status, duration, metrics)
+                if error is not None:
+                    failed.add((stage.name, partition))
+                    state.record(stage.name, partition, FAILED, error=str(error))
+                    print(f"❌ {stage.name} [{partition}] failed: {error}")
+                else:
+                    state.record(stage.name, partition, COMPLETED, duration_s=round(duration, 2))
+                    print(f"✅ {stage.name} [{partition}] completed in {duration:.1f}s")
+
+    return not failed and not pending
@@ -0,0 +1,141 @@
+"""
+Pipeline stages, each run for one `<date>/<channel>` partition.
+
+Heavy libraries (Telethon, YOLO, SQLAlchemy) are imported inside the stage
+functions, so each is loaded once per pipeline run and only if its stage runs.
+Each stage returns its records in/out and bytes processed for the run report.
+"""
+
+import asyncio
+import functools
+import json
+import os
+
+from pipeline.runner import Stage
+from utils.helpers import raw_message_files
+
+RAW_DIR = "data/raw/telegram_messages"
+IMAGE_DIR = "data/raw/images"
+DETECTIONS_DIR = "data/enriched/detections"
+
+def split_partition(partition):
+    """`<date>/<channel>` -> (date, channel)."""
+    run_date, channel = partition.split("/", 1)
+    return run_date, channel
+
+def messages_path(partition):
+    run_date, channel = split_partition(partition)
+    return os.path.join(RAW_DIR, run_date, f"{channel}.json")
+
+def partition_files(partition):
+    """The partition's scrape and any backfill chunks of the same channel and run date."""
+    run_date, channel = split_partition(partition)
+    return raw_message_files(RAW_DIR, run_date, channel)
+
+def images_dir(partition):
+    run_date, channel = split_partition(partition)
+    return os.path.join(IMAGE_DIR, run_date, channel)
+
+def count_messages(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return len(json.load(f))
+
+def dir_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path) for name in files
+    )
+
+def with_event_loop(func):
+    """Run a stage function with a fresh asyncio event loop set for its worker thread.
+
+    telethon.sync drives its coroutines on the thread's current event loop
+    (`asyncio.get_event_loop()`), and runner worker threads have none.
+    """
+    @functools.wraps(func)
+    def wrapper(partition):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return func(partition)
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+    return wrapper
+
+@with_event_loop
+def scrape(partition):
+    from ingestion.scraper import fetch_messages
+    run_date, channel = split_partition(partition)
+    path = fetch_messages(f"https://t.me/{channel}", run_date=run_date)
+    return {
+        "records_out": count_messages(path),
+        "bytes": os.path.getsize(path) + dir_size(images_dir(partition)),
+    }
+
+def extract_images(partition):
+    from ingestion.extract_images import extract_images_from_file
+    path = messages_path(partition)
+    images_found = extract_images_from_file(path)
+    print(f"🖼️  {images_found} images cataloged for {partition}")
+    return {
+        "records_in": count_messages(path),
+        "records_out": images_found,
+        "bytes": dir_size(images_dir(partition)),
+    }
+
+def detect_objects(partition):
+    """Run YOLO on the channel's cataloged images still pending detection."""
+    from enrichment.create_yolo_table import create_yolo_detections_table
+    from enrichment.yolo_inference import run_inference
+    run_date, channel = split_partition(partition)
+    create_yolo_detections_table()
+    detections = run_inference(channel=channel,
+                               output_path=os.path.join(DETECTIONS_DIR, run_date, f"{channel}.json"))
+    return {
+        "records_in": len(detections),
+        "records_out": sum(item["object_count"] for item in detections),
+        "bytes": dir_size(images_dir(partition)),
+    }
+
+def load(partition):
+    """Upsert the partition's raw files.
+
+    The data version is left alone: the API serves the marts, which only
+    change when dbt runs (run_pipeline.py --dbt), and dbt bumps it then.
+    """
+    from loading.loader import load_file
+    paths = partition_files(partition)
+    written = sum(load_file(path) for path in paths)
+    return {
+        "records_in": sum(count_messages(path) for path in paths),
+        "records_out": written,
+        "bytes": sum(os.path.getsize(path) for path in paths),
+    }
+
+def archive(partition):
+    from loading.archive import archive_file
+    paths = partition_files(partition)
+    archived = sum(archive_file(path) for path in paths)
+    return {
+        "records_in": sum(count_messages(path) for path in paths),
+        "records_out": archived,
+        "bytes": sum(os.path.getsize(path) for path in paths),
+    }
+
+# In dependency order. Scraping shares one Telethon session file, YOLO one
+# model and the loader one database session, and scrapes of one channel merge
+# into the same archive partitions, so those run one partition at a time.
+# Detection works from the media catalog filled by image extraction;
+# extraction, loading and archiving only need the scrape.
+STAGES = [
+    Stage("scrape", scrape, description="Scraping Telegram messages and downloading images",
+          concurrency=1),
+    Stage("extract_images", extract_images, deps=["scrape"], description="Cataloging downloaded images"),
+    Stage("detect_objects", detect_objects, deps=["extract_images"], description="Running YOLO object detection",
+          concurrency=1),
+    Stage("load", load, deps=["scrape"], description="Loading data to PostgreSQL database",
+          concurrency=1),
+    Stage("archive", archive, deps=["scrape"], description="Archiving messages to Parquet",
+          concurrency=1),
+]
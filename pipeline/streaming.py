@@ -0,0 +1,273 @@
+"""
+Streaming pipeline mode: scrape → load → enrich through bounded queues.
+
+The scraper (main thread) puts each message on a queue as soon as it is
+fetched. A loader thread upserts micro-batches (`batch_size` messages or
+`batch_wait` seconds, whichever comes first) into raw.telegram_messages and
+passes messages with photos to an enrichment thread, which catalogs them
+(enrichment/media_catalog.py), runs YOLO and stores detections in
+micro-batches. Queues are bounded: when a consumer falls
+behind, the stage feeding it blocks, so memory stays flat and the scraper
+slows to the pace of the slowest stage.
+
+Every loaded micro-batch is also merged into the Parquet archive
+(loading/archive.py), so analytics/offline.py sees streamed messages as well
+as scraped files.
+
+With `dbt_interval`, dbt also runs every that many seconds if new rows were
+loaded, so messages reach the API marts seconds after they are scraped. The
+data version (and with it the API response caches) only changes when dbt has
+rebuilt the marts, not on every micro-batch: cached reports read the marts,
+which raw loads alone do not change.
+"""
+
+import queue
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+_DONE = object()
+
+def load_messages(batches: Dict[str, List[dict]]) -> int:
+    """Write one micro-batch (channel -> messages or message events) in a transaction; returns rows written."""
+    from loading.loader import apply_message_events
+    from utils.db import get_engine
+
+    with get_engine().begin() as conn:
+        return sum(apply_message_events(conn, channel, records) for channel, records in batches.items())
+
+def archive_batch(batches: Dict[str, List[dict]]) -> int:
+    """Merge one loaded micro-batch into the Parquet archive; returns messages archived.
+
+    The batch's messages are read back from raw.telegram_messages, so
+    view-count events (which carry no date) archive the message's full,
+    current row. Photo paths come from the batch's records.
+    """
+    from sqlalchemy import select
+    from loading.archive import archive_messages
+    from loading.models import telegram_messages
+    from utils.db import get_engine
+
+    archived = 0
+    with get_engine().connect() as conn:
+        for channel, records in batches.items():
+            media_paths = {record["id"]: record["media_path"] for record in records if record.get("media_path")}
+            rows = conn.execute(
+                select(telegram_messages.c.id, telegram_messages.c.date, telegram_messages.c.text,
+                       telegram_messages.c.views, telegram_messages.c.has_media)
+                .where(telegram_messages.c.channel == channel,
+                       telegram_messages.c.id.in_({record["id"] for record in records}))
+            ).mappings()
+            messages = [
+                {**row, "date": str(row["date"]), "media_path": media_paths.get(row["id"])}
+                for row in rows
+            ]
+            archived += archive_messages(channel, messages)
+    return archived
+
+def enrich_images(image_paths: List[str]) -> int:
+    """Catalog newly downloaded images, run YOLO on them and store detections; returns images processed.
+
+    Only this batch's assets are extracted and detected; older backlog (e.g.
+    from a batch scrape) is left to the batch pipeline's stages.
+    """
+    from enrichment.media_catalog import assets_from_paths, extract_pending, register_assets
+    from enrichment.yolo_inference import run_inference
+    from utils.db import get_engine
+
+    assets = assets_from_paths(image_paths)
+    if not assets:
+        return 0
+    with get_engine().begin() as conn:
+        register_assets(conn, assets)
+    keys = [(asset["channel"], asset["message_id"]) for asset in assets]
+    extract_pending(keys=keys)
+    return len(run_inference(output_path=None, keys=keys))
+
+def run_dbt() -> None:
+    """Rebuild the marts; dbt's on-run-end hook then bumps the data version."""
+    subprocess.run(["dbt", "run"], cwd="telegram_dbt", check=True)
+
+def prepare_tables() -> None:
+    """Create the raw and enriched tables the stream writes to."""
+    from enrichment.create_yolo_table import create_yolo_detections_table
+    from enrichment.media_catalog import create_media_assets_table
+    from loading.models import create_raw_tables
+    from utils.db import get_engine
+
+    create_raw_tables(get_engine())
+    create_yolo_detections_table()
+    create_media_assets_table()
+
+class StreamingPipeline:
+    """Bounded-queue pipeline; the load/archive/enrich/dbt callables are injectable.
+
+    `archive` runs on each micro-batch after it is loaded; None skips archiving.
+    """
+
+    def __init__(self, batch_size: int = 200, batch_wait: float = 2.0, queue_size: int = 1000,
+                 image_batch_size: int = 16, dbt_interval: float = 0,
+                 load: Callable[[Dict[str, List[dict]]], int] = load_messages,
+                 archive: Optional[Callable[[Dict[str, List[dict]]], int]] = archive_batch,
+                 enrich: Callable[[List[str]], int] = enrich_images,
+                 dbt: Callable[[], None] = run_dbt):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.image_batch_size = image_batch_size
+        self.dbt_interval = dbt_interval
+        self.load = load
+        self.archive = archive
+        self.enrich = enrich
+        self.dbt = dbt
+
+        self.messages: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.images: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.stop = threading.Event()
+        self.finished = threading.Event()
+        self.errors: List[Tuple[str, Exception]] = []
+
+        self._lock = threading.Lock()
+        self.stats = {
+            "scraped": 0, "loaded": 0, "written": 0, "load_batches": 0, "archived": 0,
+            "images": 0, "enrich_batches": 0, "dbt_runs": 0,
+            "freshness_sum_s": 0.0, "freshness_max_s": 0.0,
+        }
+        self._loaded_since_dbt = 0
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Blocking put (backpressure) that gives up once the pipeline is stopping."""
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _drain(self, q: queue.Queue, max_items: int) -> Tuple[list, bool]:
+        """Next micro-batch: up to `max_items`, waiting at most `batch_wait` after the first.
+
+        Returns (batch, done); done is set once the upstream stage has finished
+        or the pipeline is stopping.
+        """
+        batch = []
+        deadline = None
+        while len(batch) < max_items and not self.stop.is_set():
+            timeout = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+            if timeout <= 0:
+                break
+            try:
+                item = q.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.batch_wait
+        return batch, self.stop.is_set()
+
+    def _guard(self, name: str, target: Callable[[], None]):
+        try:
+            target()
+        except Exception as e:
+            self.errors.append((name, e))
+            self.stop.set()
+            print(f"❌ {name} failed: {e}")
+
+    def _load_worker(self):
+        while True:
+            batch, done = self._drain(self.messages, self.batch_size)
+            if batch:
+                by_channel = defaultdict(list)
+                for channel, message, _ in batch:
+                    by_channel[channel].append(message)
+                written = self.load(by_channel)
+
+                loaded_at = time.monotonic()
+                if self.archive is not None:
+                    self._count(archived=self.archive(by_channel))
+                freshness = [loaded_at - scraped_at for _, _, scraped_at in batch]
+                with self._lock:
+                    self.stats["loaded"] += len(batch)
+                    self.stats["written"] += written
+                    self.stats["load_batches"] += 1
+                    self.stats["freshness_sum_s"] += sum(freshness)
+                    self.stats["freshness_max_s"] = max(self.stats["freshness_max_s"], max(freshness))
+                    self._loaded_since_dbt += written
+                print(f"📥 Loaded {len(batch)} messages ({written} new/changed), "
+                      f"{max(freshness):.1f}s after scraping")
+
+                for _, message, _ in batch:
+                    if message.get("media_path") and not self._put(self.images, message["media_path"]):
+                        return
+            if done:
+                self._put(self.images, _DONE)
+                return
+
+    def _enrich_worker(self):
+        while True:
+            batch, done = self._drain(self.images, self.image_batch_size)
+            if batch:
+                processed = self.enrich(batch)
+                self._count(images=processed, enrich_batches=1)
+                print(f"🔍 Enriched {processed} images")
+            if done:
+                return
+
+    def _dbt_worker(self):
+        while True:
+            finished = self.finished.wait(self.dbt_interval)
+            with self._lock:
+                pending, self._loaded_since_dbt = self._loaded_since_dbt, 0
+            if pending and not self.stop.is_set():
+                print(f"🔄 Running dbt for {pending} new/changed messages")
+                self.dbt()
+                self._count(dbt_runs=1)
+            if finished or self.stop.is_set():
+                return
+
+    def run(self, source: Iterable[Tuple[str, dict]]) -> bool:
+        """Stream (channel, message) pairs from `source` through the pipeline; True if no stage failed."""
+        workers = [
+            threading.Thread(target=self._guard, args=("load", self._load_worker), name="stream-load"),
+            threading.Thread(target=self._guard, args=("enrich", self._enrich_worker), name="stream-enrich"),
+        ]
+        dbt_worker = None
+        if self.dbt_interval:
+            dbt_worker = threading.Thread(target=self._guard, args=("dbt", self._dbt_worker), name="stream-dbt")
+        for worker in workers + ([dbt_worker] if dbt_worker else []):
+            worker.start()
+
+        try:
+            for channel, message in source:
+                if not self._put(self.messages, (channel, message, time.monotonic())):
+                    break
+                self._count(scraped=1)
+        except Exception as e:
+            self.errors.append(("scrape", e))
+            self.stop.set()
+            print(f"❌ scrape failed: {e}")
+        finally:
+            self._put(self.messages, _DONE)
+            for worker in workers:
+                worker.join()
+            self.finished.set()
+            if dbt_worker:
+                dbt_worker.join()
+
+        return not self.errors
+
+    def summary(self) -> Dict[str, float]:
+        stats = dict(self.stats)
+        freshness_sum = stats.pop("freshness_sum_s")
+        stats["freshness_avg_s"] = round(freshness_sum / stats["loaded"], 2) if stats["loaded"] else None
+        stats["freshness_max_s"] = round(stats["freshness_max_s"], 2)
+        return stats
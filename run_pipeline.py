@@ -1,79 +1,181 @@
 #!/usr/bin/env python3
 """
 Complete Telegram Medical Data Pipeline Runner
-Runs scraping, image extraction, and YOLO inference in sequence.
+Runs scraping, image extraction, YOLO inference and loading as a dependency
+graph, one task per `<date>/<channel>` partition (see pipeline/runner.py).
+
+Usage:
+    python run_pipeline.py                           # today's partitions, every channel
+    python run_pipeline.py --date 2025-07-19 --stages load
+    python run_pipeline.py --rerun detect_objects    # redo a stage and its downstream stages
+
+With `--dbt`, dbt runs once after the stages succeed if new rows were
+loaded; its on-run-end hook then bumps the data version, invalidating API
+caches. Loading alone does not, since the API serves the marts.
+    python run_pipeline.py --dbt
+
+Each run writes a metrics report to data/pipeline/runs/ and compares stage
+throughput with earlier runs (see pipeline/report.py).
+
+Streaming mode loads and enriches messages while they are being scraped
+(see pipeline/streaming.py):
+    python run_pipeline.py --stream --dbt-interval 30
 """
 
+import argparse
 import os
 import sys
-import subprocess
 from datetime import datetime
 
-def run_command(command, description):
-    """Run a command and handle errors."""
-    print(f"\n🚀 {description}")
-    print(f"Running: {command}")
-    print("-" * 50)
-    
-    try:
-        result = subprocess.run(command, shell=True, check=True, 
-                              capture_output=False, text=True)
-        print(f"✅ {description} completed successfully")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ {description} failed with error code {e.returncode}")
-        return False
-    except Exception as e:
-        print(f"❌ {description} failed: {e}")
-        return False
+from pipeline.report import RunReport, RUNS_DIR, compare, print_stage_totals
+from pipeline.runner import PipelineState, run_pipeline, downstream, COMPLETED
+from pipeline.stages import STAGES, RAW_DIR
+
+STATE_FILE = "data/pipeline/state.json"
+
+def default_channels(run_date, stage_names):
+    """Channels to scrape, or the channels already scraped for `run_date`."""
+    if "scrape" in stage_names:
+        from ingestion.scraper import CHANNELS
+        return [url.split("/")[-1] for url in CHANNELS]
+    date_dir = os.path.join(RAW_DIR, run_date)
+    if not os.path.isdir(date_dir):
+        return []
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(date_dir) if f.endswith(".json"))
+
+def run_streaming(args):
+    """Scrape, load and enrich through bounded in-process queues."""
+    from ingestion.scraper import CHANNELS, stream_messages
+    from pipeline.streaming import StreamingPipeline, prepare_tables
+
+    channel_urls = [f"https://t.me/{channel}" for channel in args.channels] if args.channels else CHANNELS
+    print("=" * 60)
+    print("🏥 TELEGRAM MEDICAL DATA PIPELINE (streaming)")
+    print("=" * 60)
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    prepare_tables()
+    pipeline = StreamingPipeline(
+        batch_size=args.batch_size,
+        batch_wait=args.batch_wait,
+        queue_size=args.queue_size,
+        dbt_interval=args.dbt_interval
+    )
+    succeeded = pipeline.run(stream_messages(channel_urls, limit=args.limit, run_date=args.date))
+
+    summary = pipeline.summary()
+    print("\n" + "=" * 60)
+    print("📊 PIPELINE SUMMARY")
+    print("=" * 60)
+    print(f"Messages scraped/loaded: {summary['scraped']}/{summary['loaded']} "
+          f"({summary['written']} new or changed, {summary['load_batches']} batches, "
+          f"{summary['archived']} archived)")
+    print(f"Images enriched: {summary['images']}; dbt runs: {summary['dbt_runs']}")
+    print(f"Freshness (scraped → loaded): avg {summary['freshness_avg_s']}s, max {summary['freshness_max_s']}s")
+    print(f"Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    if succeeded:
+        print("🎉 Pipeline completed successfully!")
+    else:
+        print("⚠️  Pipeline stopped with errors")
+        sys.exit(1)
 
 def main():
     """Run the complete pipeline."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--date", default=datetime.utcnow().strftime("%Y-%m-%d"),
+                        help="Partition date, YYYY-MM-DD (default: today, UTC)")
+    parser.add_argument("--channels", nargs="*", help="Channel names (default: all)")
+    parser.add_argument("--stages", nargs="*", choices=[stage.name for stage in STAGES],
+                        help="Only run these stages; their upstream stages are assumed done")
+    parser.add_argument("--rerun", nargs="*", default=[], choices=[stage.name for stage in STAGES],
+                        help="Run these stages and everything downstream again, even if completed")
+    parser.add_argument("--force", action="store_true", help="Run every selected task again")
+    parser.add_argument("--workers", type=int, default=4, help="Tasks run in parallel")
+    parser.add_argument("--state-file", default=STATE_FILE)
+    parser.add_argument("--runs-dir", default=RUNS_DIR, help="Where run reports are kept")
+    parser.add_argument("--dbt", action="store_true",
+                        help="Run dbt once after the stages succeed, if new rows were loaded")
+    parser.add_argument("--regression-threshold", type=float, default=0.2,
+                        help="Flag stages whose rows/sec fell by more than this fraction")
+
+    stream = parser.add_argument_group("streaming mode")
+    stream.add_argument("--stream", action="store_true", help="Load and enrich messages as they are scraped")
+    stream.add_argument("--limit", type=int, default=200, help="Messages scraped per channel")
+    stream.add_argument("--batch-size", type=int, default=200, help="Messages per load micro-batch")
+    stream.add_argument("--batch-wait", type=float, default=2.0,
+                        help="Seconds a micro-batch waits to fill before it is written")
+    stream.add_argument("--queue-size", type=int, default=1000,
+                        help="Queue capacity between stages (bounds memory)")
+    stream.add_argument("--dbt-interval", type=float, default=0,
+                        help="Run dbt every N seconds while new rows arrive (0: never)")
+    args = parser.parse_args()
+
+    if args.stream:
+        run_streaming(args)
+        return
+
+    stages = [stage for stage in STAGES if not args.stages or stage.name in args.stages]
+    stage_names = [stage.name for stage in stages]
+    channels = args.channels or default_channels(args.date, stage_names)
+    if not channels:
+        sys.exit(f"❌ No channels to process for {args.date}")
+    partitions = [f"{args.date}/{channel}" for channel in channels]
+
     print("=" * 60)
     print("🏥 TELEGRAM MEDICAL DATA PIPELINE")
     print("=" * 60)
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    steps = [
-        ("python ingestion/scraper.py", "Scraping Telegram messages and downloading images"),
-        ("python ingestion/extract_images.py", "Organizing extracted images"),
-        ("python enrichment/yolo_inference.py", "Running YOLO object detection"),
-        ("python loading/loader.py", "Loading data to PostgreSQL database")
-    ]
-    
-    successful_steps = 0
-    
-    for command, description in steps:
-        if run_command(command, description):
-            successful_steps += 1
-        else:
-            print(f"\n❌ Pipeline stopped due to failure in: {description}")
-            break
-    
+    print(f"Stages: {', '.join(stage_names)}")
+    print(f"Partitions: {', '.join(partitions)}")
+
+    state = PipelineState(args.state_file)
+    if args.force:
+        state.reset(stage_names, partitions)
+    elif args.rerun:
+        state.reset(downstream(STAGES, args.rerun), partitions)
+
+    report = RunReport({
+        "date": args.date,
+        "stages": stage_names,
+        "partitions": partitions,
+        "workers": args.workers,
+    })
+    succeeded = run_pipeline(stages, partitions, state, max_workers=args.workers, report=report)
+
+    loaded = sum(
+        task["records_out"] or 0 for task in report.tasks
+        if task["stage"] == "load" and task["status"] == COMPLETED
+    )
+    if args.dbt and succeeded and loaded:
+        from pipeline.streaming import run_dbt
+        print(f"🔄 Running dbt for {loaded} new/changed messages")
+        try:
+            run_dbt()
+        except Exception as e:
+            print(f"❌ dbt failed: {e}")
+            succeeded = False
+    report_path = report.save(args.runs_dir) if report.tasks else None
+
+    completed = sum(
+        state.status(stage, partition) == COMPLETED
+        for stage in stage_names for partition in partitions
+    )
     print("\n" + "=" * 60)
     print("📊 PIPELINE SUMMARY")
     print("=" * 60)
-    print(f"Completed steps: {successful_steps}/{len(steps)}")
+    print(f"Completed tasks: {completed}/{len(stage_names) * len(partitions)}")
     print(f"Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    if successful_steps == len(steps):
+    if report_path:
+        print()
+        print_stage_totals(report.stage_totals())
+        print(f"\n📄 Run report: {report_path}")
+        compare(report_path, threshold=args.regression_threshold, directory=args.runs_dir)
+
+    if succeeded:
         print("🎉 Pipeline completed successfully!")
-        
-        # Show some stats
-        try:
-            import json
-            detections_file = "data/enriched/detections.json"
-            if os.path.exists(detections_file):
-                with open(detections_file, 'r') as f:
-                    detections = json.load(f)
-                print(f"📷 Images processed: {len(detections)}")
-                
-                total_objects = sum(len(item.get("detected_objects", [])) for item in detections)
-                print(f"🔍 Objects detected: {total_objects}")
-        except Exception as e:
-            print(f"Note: Could not load detection stats: {e}")
     else:
-        print("⚠️  Pipeline completed with errors")
+        print(f"⚠️  Pipeline completed with errors; rerun to resume from the failed tasks ({args.state_file})")
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,27 @@
+{#
+    Bumps the pipeline data version (raw.data_version) after a run that built
+    at least one model, so API response caches are invalidated. `dbt test` and
+    runs where nothing succeeded leave the version untouched.
+#}
+{% macro bump_data_version(results) %}
+    {% set built = results
+        | selectattr('node.resource_type', 'equalto', 'model')
+        | selectattr('status', 'equalto', 'success')
+        | list %}
+    {% if built %}
+        create table if not exists raw.data_version (
+            id smallint primary key default 1 check (id = 1),
+            version bigint not null,
+            source text,
+            updated_at timestamptz not null default now()
+        );
+        insert into raw.data_version (id, version, source, updated_at)
+        values (1, 1, 'dbt', now())
+        on conflict (id) do update
+        set version = raw.data_version.version + 1,
+            source = excluded.source,
+            updated_at = excluded.updated_at;
+    {% else %}
+        select 1;
+    {% endif %}
+{% endmacro %}
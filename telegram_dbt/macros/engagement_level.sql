@@ -0,0 +1,13 @@
+{#
+    Engagement tier of a message relative to its channel's view distribution:
+    above the channel's 75th percentile of views is 'High', below the 25th
+    'Low', the rest 'Medium' (percentiles from channel_engagement_thresholds).
+    Messages without a view count rank as zero views.
+#}
+{% macro engagement_level(views, views_p25, views_p75) %}
+    case
+        when coalesce({{ views }}, 0) > {{ views_p75 }} then 'High'
+        when coalesce({{ views }}, 0) < {{ views_p25 }} then 'Low'
+        else 'Medium'
+    end
+{% endmacro %}
@@ -0,0 +1,29 @@
+{#
+    Incremental filter on a load-time watermark: on incremental runs only rows
+    loaded after the newest one already in the target (minus a lookback for
+    late-committing loads) are selected. Reprocessed rows are replaced through
+    the model's unique_key, so the overlap is harmless.
+
+    Watermarks written by dbt itself (fct_messages.updated_at) are committed
+    before downstream models run and need no lookback (`lookback=false`).
+#}
+{% macro incremental_filter(column='loaded_at', lookback=true) %}
+    {% if is_incremental_run() %}
+    where {{ column }} > {{ incremental_watermark(column, lookback=lookback) }}
+    {% endif %}
+{% endmacro %}
+
+{#
+    The newest `column` value already in the target (minus the lookback), as
+    a literal: a constant lets the planner use the column's index and
+    statistics, where a `(select max(...))` subquery is planned as matching a
+    third of the table.
+#}
+{% macro incremental_watermark(column, lookback=true) %}
+    {% set query %}
+        select coalesce(max({{ column }})::timestamptz, '-infinity'::timestamptz)::text from {{ this }}
+    {% endset %}
+    {% set watermark = run_query(query).columns[0].values()[0] if execute else '-infinity' %}
+    {{ return("'" ~ watermark ~ "'::timestamptz"
+              ~ (" - interval '" ~ var("incremental_lookback", "1 hour") ~ "'" if lookback else "")) }}
+{% endmacro %}
@@ -0,0 +1,83 @@
+{#
+    Incremental model stored as a PostgreSQL table range-partitioned by month.
+
+    config:
+      partition_by   column to partition on (timestamp/date)
+      unique_key     column or list of columns; matching rows are replaced
+                     (delete+insert) on incremental runs
+
+    Each run builds the model's rows into a temporary table, creates any
+    missing monthly partitions for them (see ensure_month_partitions), then
+    deletes the rows being replaced and inserts the new ones. A DEFAULT
+    partition catches anything outside the created ranges. Indexes are
+    declared as post-hooks on the parent table and cascade to partitions.
+    Use is_incremental_run() (not is_incremental()) in the model SQL.
+#}
+{% materialization partitioned_incremental, adapter='postgres' %}
+
+    {%- set partition_by = config.require('partition_by') -%}
+    {%- set unique_key = config.require('unique_key') -%}
+    {%- set unique_key = [unique_key] if unique_key is string else unique_key -%}
+
+    {%- set target_relation = this.incorporate(type='table') -%}
+    {%- set existing_relation = load_relation(this) -%}
+    {%- set tmp_relation = make_temp_relation(target_relation) -%}
+    {%- set full_refresh = should_full_refresh() or existing_relation is none or existing_relation.type != 'table' -%}
+
+    {% if not full_refresh %}
+        {% set partitioned_query %}
+            select count(*)
+            from pg_partitioned_table pt
+            join pg_class c on c.oid = pt.partrelid
+            join pg_namespace n on n.oid = c.relnamespace
+            where n.nspname = '{{ target_relation.schema }}'
+              and c.relname = '{{ target_relation.identifier }}'
+        {% endset %}
+        {% if run_query(partitioned_query).columns[0].values()[0] == 0 %}
+            {% do exceptions.raise_compiler_error(
+                target_relation ~ " exists but is not partitioned; rebuild it with `dbt run --full-refresh`"
+            ) %}
+        {% endif %}
+    {% endif %}
+
+    {{ run_hooks(pre_hooks, inside_transaction=False) }}
+    {{ run_hooks(pre_hooks, inside_transaction=True) }}
+
+    {% call statement('build_tmp') %}
+        create temporary table {{ tmp_relation }} as (
+            {{ sql }}
+        )
+    {% endcall %}
+
+    {% if full_refresh %}
+        {% if existing_relation is not none %}
+            {{ adapter.drop_relation(existing_relation) }}
+        {% endif %}
+        {% call statement('create_parent') %}
+            create table {{ target_relation }} (like {{ tmp_relation }})
+                partition by range ({{ partition_by }});
+            create table {{ target_relation.incorporate(path={'identifier': target_relation.identifier ~ '_default'}) }}
+                partition of {{ target_relation }} default;
+        {% endcall %}
+    {% endif %}
+
+    {{ ensure_month_partitions(target_relation, partition_by, tmp_relation) }}
+
+    {% call statement('main') %}
+        {% if not full_refresh %}
+        delete from {{ target_relation }}
+        where ({{ unique_key | join(', ') }}) in (
+            select {{ unique_key | join(', ') }} from {{ tmp_relation }}
+        );
+        {% endif %}
+        insert into {{ target_relation }}
+        select * from {{ tmp_relation }};
+    {% endcall %}
+
+    {{ run_hooks(post_hooks, inside_transaction=True) }}
+    {{ adapter.commit() }}
+    {{ run_hooks(post_hooks, inside_transaction=False) }}
+
+    {{ return({'relations': [target_relation]}) }}
+
+{% endmaterialization %}
@@ -0,0 +1,67 @@
+{#
+    Create a monthly partition of `relation` (named <table>_pYYYYMM) for every
+    month present in `source_relation`.`column` that does not have one yet.
+#}
+{% macro ensure_month_partitions(relation, column, source_relation) %}
+    {% set months_query %}
+        select distinct to_char(date_trunc('month', {{ column }}), 'YYYY-MM-DD') as month_start
+        from {{ source_relation }}
+        where {{ column }} is not null
+        order by 1
+    {% endset %}
+    {% set months = run_query(months_query).columns[0].values() if execute else [] %}
+
+    {% for month_start in months %}
+        {% set partition = relation.incorporate(
+            path={'identifier': relation.identifier ~ '_p' ~ (month_start[:7] | replace('-', ''))}
+        ) %}
+        {% call statement('partition_' ~ loop.index) %}
+            create table if not exists {{ partition }}
+                partition of {{ relation }}
+                for values from ('{{ month_start }}') to (('{{ month_start }}'::date + interval '1 month')::date)
+        {% endcall %}
+    {% endfor %}
+{% endmacro %}
+
+{#
+    Drop monthly partitions of `relation` older than `keep_months`.
+    For retention jobs:
+        dbt run-operation drop_old_partitions --args '{relation: fct_messages, keep_months: 36}'
+#}
+{% macro drop_old_partitions(relation, keep_months) %}
+    {% set cutoff = modules.datetime.date.today().replace(day=1) %}
+    {% set query %}
+        select c.relname
+        from pg_inherits i
+        join pg_class c on c.oid = i.inhrelid
+        join pg_class p on p.oid = i.inhparent
+        join pg_namespace n on n.oid = p.relnamespace
+        where p.relname = '{{ relation }}'
+          and n.nspname = '{{ target.schema }}'
+          and c.relname ~ '_p[0-9]{6}$'
+          and to_date(right(c.relname, 6), 'YYYYMM')
+              < date '{{ cutoff }}' - interval '{{ keep_months }} months'
+    {% endset %}
+    {% for partition in run_query(query).columns[0].values() %}
+        {% do run_query('drop table ' ~ adapter.quote(target.schema) ~ '.' ~ adapter.quote(partition)) %}
+        {{ log('Dropped partition ' ~ partition, info=True) }}
+    {% endfor %}
+    {% do run_query('commit') %}
+{% endmacro %}
+
+{#
+    True when an incremental or partitioned_incremental model is being
+    updated in place (is_incremental() only knows the built-in materialization).
+#}
+{% macro is_incremental_run() %}
+    {% if not execute %}
+        {{ return(false) }}
+    {% endif %}
+    {% set relation = adapter.get_relation(this.database, this.schema, this.identifier) %}
+    {{ return(
+        relation is not none
+        and relation.type == 'table'
+        and config.get('materialized') in ('incremental', 'partitioned_incremental')
+        and not should_full_refresh()
+    ) }}
+{% endmacro %}
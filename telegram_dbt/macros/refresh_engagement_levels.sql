@@ -0,0 +1,21 @@
+{#
+    New messages shift a channel's view percentiles, so tiers assigned on
+    earlier incremental runs can go stale. Re-tier the facts of the channels
+    whose thresholds moved since they were last applied, writing only the
+    rows whose tier changed (and stamping their updated_at for downstream
+    incremental models), then record the thresholds as applied.
+#}
+{% macro refresh_engagement_levels(facts, thresholds) %}
+    update {{ facts }} f
+    set engagement_level = {{ engagement_level('f.views', 't.views_p25', 't.views_p75') }},
+        updated_at = now()
+    from {{ thresholds }} t
+    where t.channel = f.channel
+      and (t.views_p25, t.views_p75) is distinct from (t.applied_views_p25, t.applied_views_p75)
+      and f.engagement_level is distinct from {{ engagement_level('f.views', 't.views_p25', 't.views_p75') }};
+
+    update {{ thresholds }}
+    set applied_views_p25 = views_p25,
+        applied_views_p75 = views_p75
+    where (views_p25, views_p75) is distinct from (applied_views_p25, applied_views_p75)
+{% endmacro %}
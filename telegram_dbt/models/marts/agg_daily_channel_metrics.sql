@@ -0,0 +1,43 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key=['date_key', 'channel_key'],
+        post_hook=[
+            "create index if not exists {{ this.name }}_date_key_idx on {{ this }} (date_key)",
+            "create unique index if not exists {{ this.name }}_grain_idx on {{ this }} (channel_key, date_key, engagement_level)",
+            "create index if not exists {{ this.name }}_updated_at_idx on {{ this }} (updated_at)"
+        ]
+    )
+}}
+
+-- One row per day x channel x engagement level, so dashboard queries read a
+-- few rows per day instead of scanning every message in the window. Keyed by
+-- the dim_dates/dim_channels surrogate keys. Incremental runs re-aggregate
+-- only the (channel, day) pairs with facts written since the last run (new,
+-- reloaded or re-tiered messages) and replace all of their rows.
+with changed_days as (
+    select distinct
+        channel_key,
+        message_date::date as day
+    from {{ ref('fct_messages') }}
+    {{ incremental_filter('updated_at', lookback=false) }}
+)
+
+select
+    f.date_key,
+    f.channel_key,
+    f.engagement_level,
+    count(*) as message_count,
+    count(f.views) as viewed_message_count,
+    coalesce(sum(f.views), 0) as total_views,
+    count(*) filter (where f.has_media) as media_message_count,
+    max(f.updated_at) as updated_at
+from {{ ref('fct_messages') }} f
+{% if is_incremental_run() %}
+join changed_days c
+    on c.channel_key = f.channel_key
+   and f.message_date >= c.day
+   and f.message_date < c.day + 1
+{% endif %}
+group by f.date_key, f.channel_key, f.engagement_level
@@ -0,0 +1,52 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key='channel',
+        post_hook=[
+            "create unique index if not exists {{ this.name }}_channel_idx on {{ this }} (channel)"
+        ]
+    )
+}}
+
+-- Per-channel view percentiles that define the engagement tiers
+-- (see macros/engagement_level.sql). Incremental runs only recompute the
+-- channels with newly loaded staging rows. applied_views_p25/p75 are the
+-- thresholds fct_messages was last tiered with (set by its
+-- refresh_engagement_levels post-hook), so only channels whose thresholds
+-- moved get re-tiered.
+with changed_channels as (
+    select distinct channel
+    from {{ ref('stg_telegram_messages') }}
+    {{ incremental_filter('loaded_at') }}
+),
+
+thresholds as (
+    select
+        channel,
+        percentile_cont(0.25) within group (order by coalesce(views, 0)) as views_p25,
+        percentile_cont(0.75) within group (order by coalesce(views, 0)) as views_p75,
+        count(*) as message_count,
+        max(loaded_at) as loaded_at
+    from {{ ref('stg_telegram_messages') }}
+    where channel in (select channel from changed_channels)
+    group by channel
+)
+
+select
+    t.channel,
+    t.views_p25,
+    t.views_p75,
+    t.message_count,
+    t.loaded_at,
+    {% if is_incremental_run() %}
+    p.applied_views_p25,
+    p.applied_views_p75
+    {% else %}
+    null::double precision as applied_views_p25,
+    null::double precision as applied_views_p75
+    {% endif %}
+from thresholds t
+{% if is_incremental_run() %}
+left join {{ this }} p on p.channel = t.channel
+{% endif %}
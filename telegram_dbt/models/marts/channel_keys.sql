@@ -0,0 +1,37 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='append',
+        post_hook=[
+            "create unique index if not exists {{ this.name }}_channel_idx on {{ this }} (channel)",
+            "create unique index if not exists {{ this.name }}_key_idx on {{ this }} (channel_key)"
+        ]
+    )
+}}
+
+-- Append-only registry of compact integer channel keys. A key never changes
+-- once assigned, so incremental facts can carry it safely. New channels can
+-- only appear in newly loaded staging rows.
+with new_channels as (
+    select
+        channel,
+        min(loaded_at) as first_loaded_at
+    from {{ ref('stg_telegram_messages') }}
+    {% if is_incremental_run() %}
+    where loaded_at > (
+        select coalesce(max(first_loaded_at), '-infinity'::timestamptz) from {{ this }}
+    ) - interval '{{ var("incremental_lookback", "1 hour") }}'
+      and channel not in (select channel from {{ this }})
+    {% endif %}
+    group by channel
+)
+
+select
+    (row_number() over (order by channel)
+        {% if is_incremental_run() %}
+        + (select coalesce(max(channel_key), 0) from {{ this }})
+        {% endif %}
+    )::integer as channel_key,
+    channel,
+    first_loaded_at
+from new_channels
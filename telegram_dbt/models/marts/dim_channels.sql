@@ -1,3 +1,47 @@
-select distinct
-    channel as channel_name
-from {{ ref('stg_telegram_messages') }}
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key='channel_key',
+        post_hook=[
+            "create unique index if not exists {{ this.name }}_key_idx on {{ this }} (channel_key)",
+            "create unique index if not exists {{ this.name }}_channel_idx on {{ this }} (channel)"
+        ]
+    )
+}}
+
+-- Incremental runs only rebuild the channels with facts loaded since the last
+-- run. Message counts roll up agg_daily_channel_metrics; first/last dates
+-- come from the (channel_key, message_date) index of fct_messages.
+with changed_channels as (
+    select
+        channel_key,
+        max(loaded_at) as loaded_at
+    from {{ ref('fct_messages') }}
+    {{ incremental_filter('loaded_at') }}
+    group by channel_key
+),
+
+message_counts as (
+    select
+        channel_key,
+        sum(message_count)::bigint as total_messages
+    from {{ ref('agg_daily_channel_metrics') }}
+    where channel_key in (select channel_key from changed_channels)
+    group by channel_key
+)
+
+select
+    k.channel_key,
+    k.channel,
+    m.total_messages,
+    (
+        select min(f.message_date) from {{ ref('fct_messages') }} f where f.channel_key = c.channel_key
+    ) as first_message_date,
+    (
+        select max(f.message_date) from {{ ref('fct_messages') }} f where f.channel_key = c.channel_key
+    ) as last_message_date,
+    c.loaded_at
+from changed_channels c
+join {{ ref('channel_keys') }} k on k.channel_key = c.channel_key
+join message_counts m on m.channel_key = c.channel_key
@@ -1,3 +1,39 @@
-select distinct
-    message_date::date as date
-from {{ ref('stg_telegram_messages') }}
+{{
+    config(
+        materialized='table',
+        post_hook=[
+            "create unique index if not exists {{ this.name }}_key_idx on {{ this }} (date_key)"
+        ]
+    )
+}}
+
+-- Calendar dimension: one row per day from the first message through the end
+-- of next year, whether or not anything was posted that day.
+with bounds as (
+    select
+        coalesce(min(message_date)::date, current_date) as first_day,
+        (date_trunc('year', greatest(max(message_date)::date, current_date)) + interval '2 years - 1 day')::date as last_day
+    from {{ ref('fct_messages') }}
+),
+
+days as (
+    select generate_series(first_day, last_day, interval '1 day')::date as date
+    from bounds
+)
+
+select
+    to_char(date, 'YYYYMMDD')::integer as date_key,
+    date,
+    extract(year from date)::integer as year,
+    extract(quarter from date)::integer as quarter,
+    extract(month from date)::integer as month,
+    trim(to_char(date, 'Month')) as month_name,
+    extract(day from date)::integer as day_of_month,
+    extract(isodow from date)::integer as day_of_week,
+    trim(to_char(date, 'Day')) as day_name,
+    extract(isoyear from date)::integer as iso_year,
+    extract(week from date)::integer as iso_week,
+    date_trunc('week', date)::date as week_start_date,
+    date_trunc('month', date)::date as month_start_date,
+    extract(isodow from date) in (6, 7) as is_weekend
+from days
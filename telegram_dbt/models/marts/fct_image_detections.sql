@@ -0,0 +1,125 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key=['channel', 'message_id'],
+        post_hook=[
+            "create unique index if not exists {{ this.name }}_key_idx on {{ this }} (channel, message_id)",
+            "create index if not exists {{ this.name }}_objects_gin on {{ this }} using gin (detected_objects)",
+            "create index if not exists {{ this.name }}_date_idx on {{ this }} (message_date)",
+            "create index if not exists {{ this.name }}_detected_at_idx on {{ this }} (detected_at)",
+            "create index if not exists {{ this.name }}_updated_at_idx on {{ this }} (updated_at)",
+            "analyze {{ this }}"
+        ]
+    )
+}}
+
+-- One row per message with at least one processed image, linking YOLO
+-- detections (enriched.yolo_detections) to fct_messages. Detections stored
+-- without channel/message_id are matched by the media naming convention
+-- `<channel>_<message_id>.<ext>`; channel names may contain underscores, so
+-- the id is the last segment. `detected_objects` is GIN-indexed for
+-- `detected_objects @> array['bottle']` filters.
+--
+-- Incremental runs rebuild only the messages with detections stored since the
+-- last run, or with facts written since then (new, reloaded or re-tiered),
+-- reading their detections through the (channel, message_id) index.
+-- Detections stored without channel/message_id (before detections were
+-- linked to messages) are only matched on `dbt run --full-refresh`.
+with
+{% if is_incremental_run() %}
+changed_messages as (
+    select channel, message_id
+    from enriched.yolo_detections
+    where created_at > {{ incremental_watermark('detected_at') }}
+      and channel is not null
+      and message_id is not null
+    union
+    select f.channel, f.message_id
+    from {{ ref('fct_messages') }} f
+    where f.updated_at > {{ incremental_watermark('updated_at', lookback=false) }}
+      and f.has_media
+      and exists (
+          select 1
+          from enriched.yolo_detections y
+          where y.channel = f.channel
+            and y.message_id = f.message_id
+      )
+),
+{% endif %}
+
+detections as (
+    select
+        file_path,
+        detected_objects,
+        created_at,
+        coalesce(channel, substring(media_name from '^(.+)_[0-9]+\.[^.]+$')) as channel,
+        coalesce(message_id, substring(media_name from '_([0-9]+)\.[^.]+$')::integer) as message_id
+    from (
+        select
+            y.*,
+            coalesce(filename, regexp_replace(file_path, '^.*/', '')) as media_name
+        from enriched.yolo_detections y
+        {% if is_incremental_run() %}
+        join changed_messages c
+            on c.channel = y.channel
+           and c.message_id = y.message_id
+        {% endif %}
+    ) d
+),
+
+-- Image count and distinct objects per message in one grouped pass
+images as (
+    select
+        d.channel,
+        d.message_id,
+        count(distinct d.file_path) as image_count,
+        coalesce(
+            array_agg(distinct o.object_name order by o.object_name)
+                filter (where o.object_name is not null),
+            '{}'::text[]
+        ) as detected_objects,
+        max(d.created_at) as detected_at
+    from detections d
+    left join lateral jsonb_array_elements_text(coalesce(d.detected_objects, '[]'::jsonb)) as o(object_name)
+        on true
+    where d.channel is not null and d.message_id is not null
+    group by d.channel, d.message_id
+),
+
+linked as (
+    select
+        f.message_id,
+        f.message_date,
+        f.date_key,
+        f.channel_key,
+        f.channel,
+        f.views,
+        f.engagement_level,
+        i.image_count,
+        i.detected_objects,
+        i.detected_at,
+        f.updated_at
+    from images i
+    join {{ ref('fct_messages') }} f
+        on f.channel = i.channel
+       and f.message_id = i.message_id
+)
+
+select
+    message_id,
+    message_date,
+    date_key,
+    channel_key,
+    channel,
+    views,
+    engagement_level,
+    image_count,
+    detected_objects,
+    cardinality(detected_objects) as object_count,
+    {%- for object_class in var('detection_classes') %}
+    detected_objects @> array['{{ object_class }}'] as has_{{ object_class | replace(' ', '_') }},
+    {%- endfor %}
+    detected_at,
+    updated_at
+from linked
@@ -1,8 +1,47 @@
+{{
+    config(
+        materialized='partitioned_incremental',
+        partition_by='message_date',
+        unique_key=['channel', 'message_id'],
+        post_hook=[
+            "create index if not exists {{ this.name }}_date_brin on {{ this }} using brin (message_date)",
+            "create index if not exists {{ this.name }}_channel_date_idx on {{ this }} (channel, message_date)",
+            "create index if not exists {{ this.name }}_key_idx on {{ this }} (channel, message_id)",
+            "create index if not exists {{ this.name }}_channel_key_date_idx on {{ this }} (channel_key, message_date)",
+            "create index if not exists {{ this.name }}_loaded_at_idx on {{ this }} (loaded_at)",
+            "create index if not exists {{ this.name }}_updated_at_idx on {{ this }} (updated_at)",
+            "{{ refresh_engagement_levels(this, ref('channel_engagement_thresholds')) }}",
+            "analyze {{ this }}"
+        ]
+    )
+}}
+
+-- Range-partitioned by month (macros/materializations/partitioned_incremental.sql)
+-- so date-window queries only touch the partitions in the window.
+-- Message text stays in stg_telegram_messages; the facts carry its length.
+-- date_key/channel_key reference dim_dates/dim_channels; `channel` is kept for
+-- row-level lookups (search, export, detection joins). updated_at is when the
+-- row was last written (inserted or re-tiered) and is the watermark of the
+-- incremental marts built from the facts.
+with messages as (
+    select * from {{ ref('stg_telegram_messages') }}
+    {{ incremental_filter('loaded_at') }}
+)
+
 select
-    id,
-    message_date,
-    text,
-    views,
-    has_media,
-    channel as channel_name
-from {{ ref('stg_telegram_messages') }}
+    m.id as message_id,
+    m.message_date,
+    to_char(m.message_date, 'YYYYMMDD')::integer as date_key,
+    k.channel_key,
+    m.channel,
+    char_length(coalesce(m.message_text, '')) as message_length,
+    m.views,
+    m.has_media,
+    {{ engagement_level('m.views', 't.views_p25', 't.views_p75') }} as engagement_level,
+    m.loaded_at,
+    now() as updated_at
+from messages m
+join {{ ref('channel_engagement_thresholds') }} t
+    on t.channel = m.channel
+join {{ ref('channel_keys') }} k
+    on k.channel = m.channel
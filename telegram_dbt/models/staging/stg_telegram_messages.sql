@@ -1,15 +1,30 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key=['channel', 'id'],
+        post_hook=[
+            "create unique index if not exists {{ this.name }}_key_idx on {{ this }} (channel, id)",
+            "create index if not exists {{ this.name }}_channel_date_idx on {{ this }} (channel, message_date)",
+            "create index if not exists {{ this.name }}_loaded_at_idx on {{ this }} (loaded_at)"
+        ]
+    )
+}}
+
 with source as (
     select * from raw.telegram_messages
+    {{ incremental_filter('loaded_at') }}
 ),
 
 renamed as (
     select
         id,
         date::timestamp as message_date,
-        text,
+        text as message_text,
         views,
         has_media,
-        channel
+        channel,
+        loaded_at
     from source
 )
 
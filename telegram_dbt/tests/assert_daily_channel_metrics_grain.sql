@@ -0,0 +1,9 @@
+-- agg_daily_channel_metrics must have one row per day, channel and engagement level
+select
+    date_key,
+    channel_key,
+    engagement_level,
+    count(*) as row_count
+from {{ ref('agg_daily_channel_metrics') }}
+group by date_key, channel_key, engagement_level
+having count(*) > 1
@@ -0,0 +1,16 @@
+-- dim_channels aggregates must agree with the facts they are computed from
+select
+    d.channel_key,
+    d.channel,
+    d.total_messages,
+    f.message_count
+from {{ ref('dim_channels') }} d
+left join (
+    select channel_key, count(*) as message_count, min(message_date) as first_date, max(message_date) as last_date
+    from {{ ref('fct_messages') }}
+    group by channel_key
+) f on f.channel_key = d.channel_key
+where f.channel_key is null
+   or d.total_messages <> f.message_count
+   or d.first_message_date <> f.first_date
+   or d.last_message_date <> f.last_date
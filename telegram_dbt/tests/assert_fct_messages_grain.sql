@@ -0,0 +1,8 @@
+-- fct_messages must have one row per message; Telegram message ids are only unique within a channel
+select
+    channel,
+    message_id,
+    count(*) as row_count
+from {{ ref('fct_messages') }}
+group by channel, message_id
+having count(*) > 1
@@ -0,0 +1,8 @@
+-- fct_image_detections must have one row per message
+select
+    channel,
+    message_id,
+    count(*) as row_count
+from {{ ref('fct_image_detections') }}
+group by channel, message_id
+having count(*) > 1
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for API admission control (api/admission.py).
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import json
+
+import anyio
+import pytest
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+import api.admission
+from api.admission import BULK, EXEMPT, HEAVY, LIGHT, AdmissionClass, AdmissionMiddleware
+
+def test_waiting_request_gets_the_released_slot():
+    """A request finding its class full queues and runs as soon as a slot frees up."""
+    admission = AdmissionClass("heavy", concurrency=1, max_queue=1, max_wait=5)
+    events = []
+
+    async def waiter():
+        events.append(("waiter", await admission.acquire()))
+
+    async def main():
+        assert await admission.acquire() is None
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(waiter)
+            await anyio.wait_all_tasks_blocked()
+            assert admission.waiting == 1
+            assert admission.stats()["queue_depth"] == 1
+            admission.release()
+        assert admission.waiting == 0
+        assert admission.in_flight == 1
+
+    anyio.run(main)
+    assert events == [("waiter", None)]
+
+def test_full_queue_rejects_immediately():
+    admission = AdmissionClass("heavy", concurrency=1, max_queue=0, max_wait=5)
+
+    async def main():
+        assert await admission.acquire() is None
+        with anyio.fail_after(1):
+            assert await admission.acquire() == "queue_full"
+
+    anyio.run(main)
+    assert admission.rejected == {"queue_full": 1, "timeout": 0}
+
+def test_wait_expires():
+    admission = AdmissionClass("heavy", concurrency=1, max_queue=5, max_wait=0.05)
+
+    async def main():
+        assert await admission.acquire() is None
+        assert await admission.acquire() == "timeout"
+
+    anyio.run(main)
+    assert admission.rejected == {"queue_full": 0, "timeout": 1}
+    assert admission.waiting == 0 and admission.in_flight == 1
+
+async def ok(request):
+    return PlainTextResponse("ok")
+
+ROUTES = [Route("/api/reports/top-products", ok), Route("/api/channels", ok)]
+
+def http_scope(path, method="GET"):
+    return {"type": "http", "method": method, "path": path, "root_path": "", "query_string": b"",
+            "headers": []}
+
+async def call(app, scope):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = next(message for message in messages if message["type"] == "http.response.start")
+    body = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+    return start["status"], dict((k.decode(), v.decode()) for k, v in start["headers"]), body
+
+def test_saturated_class_answers_503_with_retry_after(monkeypatch):
+    """Rejected requests get 503 OVERLOADED with Retry-After; other classes are unaffected."""
+    heavy = AdmissionClass(HEAVY, concurrency=1, max_queue=0, max_wait=2.5)
+    monkeypatch.setitem(api.admission.admission_classes, HEAVY, heavy)
+    monkeypatch.setitem(api.admission.admission_classes, LIGHT, AdmissionClass(LIGHT, 5, 5, 2.5))
+
+    async def app(scope, receive, send):
+        await PlainTextResponse("ok")(scope, receive, send)
+
+    middleware = AdmissionMiddleware(app, ROUTES, {"/api/reports/top-products": HEAVY})
+
+    async def main():
+        assert await heavy.acquire() is None  # another heavy report is running
+        rejected = await call(middleware, http_scope("/api/reports/top-products"))
+        light = await call(middleware, http_scope("/api/channels"))
+        heavy.release()
+        admitted = await call(middleware, http_scope("/api/reports/top-products"))
+        return rejected, light, admitted
+
+    rejected, light, admitted = anyio.run(main)
+    status, headers, body = rejected
+    assert status == 503
+    assert headers["retry-after"] == "3"
+    assert json.loads(body)["error_code"] == "OVERLOADED"
+    assert light[0] == 200
+    assert admitted[0] == 200
+    assert heavy.in_flight == 0
+
+@pytest.mark.parametrize("path, method, expected", [
+    ("/api/reports/top-products", "GET", HEAVY),
+    ("/api/channels/CheMed123/activity", "GET", HEAVY),
+    ("/api/search/messages", "GET", HEAVY),
+    ("/api/analytics/dashboard", "GET", HEAVY),
+    ("/api/export/messages", "GET", BULK),
+    ("/api/batch", "POST", BULK),
+    ("/api/channels", "GET", LIGHT),
+    ("/health", "GET", EXEMPT),
+    ("/metrics", "GET", EXEMPT),
+    ("/not/a/route", "GET", EXEMPT),
+])
+def test_endpoint_classes(path, method, expected):
+    """Routes of the real app map to their admission class by route template."""
+    from api.main import ENDPOINT_CLASSES, app
+    middleware = AdmissionMiddleware(None, app.router.routes, ENDPOINT_CLASSES)
+    assert middleware.classify(http_scope(path, method))[1] == expected
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the Parquet message archive (loading/archive.py) and offline reads (analytics/offline.py).
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import json
+
+import pyarrow.parquet as pq
+
+from analytics.offline import read_messages
+from ingestion.listener import FakeEventSource
+from loading.archive import archive_file, archive_messages, partition_path
+from pipeline.streaming import StreamingPipeline
+
+def message(message_id, date="2024-03-01 08:00:00+00:00", views=10, media_path=None):
+    return {"id": message_id, "date": date, "text": f"message {message_id}", "views": views,
+            "has_media": media_path is not None, "media_path": media_path}
+
+def write_raw(path, messages):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(messages, f)
+    return str(path)
+
+def read_partition(archive_dir, channel, date):
+    return pq.ParquetFile(partition_path(channel, date, str(archive_dir))).read().to_pylist()
+
+def test_archive_file_is_idempotent(tmp_path):
+    """Archiving the same file again leaves every partition unchanged, one row per message."""
+    path = write_raw(tmp_path / "raw" / "2025-07-19" / "CheMed123.json", [
+        message(3, date="2024-03-02 09:00:00+00:00"), message(2), message(1),
+    ])
+    archive_dir = tmp_path / "archive"
+
+    assert archive_file(path, str(archive_dir)) == 3
+    first = {date: read_partition(archive_dir, "CheMed123", date) for date in ("2024-03-01", "2024-03-02")}
+    assert archive_file(path, str(archive_dir)) == 3
+    second = {date: read_partition(archive_dir, "CheMed123", date) for date in ("2024-03-01", "2024-03-02")}
+
+    assert second == first
+    assert [row["id"] for row in first["2024-03-01"]] == [1, 2]
+    assert [row["id"] for row in first["2024-03-02"]] == [3]
+
+def test_later_copies_win_and_keep_photo_paths(tmp_path):
+    """A later copy of a message replaces the archived row, keeping a photo path it lacks."""
+    archive_messages("CheMed123", [message(1, media_path="data/raw/images/x/CheMed123_1.jpg")], str(tmp_path))
+    archive_messages("CheMed123", [message(1, views=99)], str(tmp_path))
+
+    [row] = read_partition(tmp_path, "CheMed123", "2024-03-01")
+    assert row["views"] == 99
+    assert row["media_path"] == "data/raw/images/x/CheMed123_1.jpg"
+
+def test_backfill_chunks_archive_under_their_channel(tmp_path):
+    path = write_raw(tmp_path / "raw" / "2025-07-19" / "CheMed123" / "1-100.json", [message(1)])
+    archive_file(path, str(tmp_path / "archive"))
+    assert read_partition(tmp_path / "archive", "CheMed123", "2024-03-01")[0]["id"] == 1
+
+def test_read_messages_filters_channels_and_dates(tmp_path):
+    """Channel and date filters select partitions; `until` is exclusive."""
+    for channel in ("CheMed123", "tikvahpharma"):
+        archive_messages(channel, [
+            message(1, date="2024-02-28 23:59:00+00:00"),
+            message(2, date="2024-03-01 00:00:00+00:00"),
+            message(3, date="2024-03-02 12:00:00+00:00"),
+        ], str(tmp_path))
+
+    table = read_messages(str(tmp_path), channels=["CheMed123"], since="2024-03-01", until="2024-03-02")
+    assert table.column("channel").to_pylist() == ["CheMed123"]
+    assert table.column("id").to_pylist() == [2]
+
+    everything = read_messages(str(tmp_path), columns=["id", "channel"])
+    assert everything.num_rows == 6
+    assert everything.column_names == ["id", "channel"]
+
+    since = read_messages(str(tmp_path), since="2024-03-01")
+    assert sorted(since.column("id").to_pylist()) == [2, 2, 3, 3]
+
+def test_streaming_archives_every_loaded_batch():
+    """Each micro-batch is archived after it is loaded, including view-only events."""
+    calls = []
+
+    def load(batches):
+        calls.append(("load", sum(len(records) for records in batches.values())))
+        return calls[-1][1]
+
+    def archive(batches):
+        calls.append(("archive", sum(len(records) for records in batches.values())))
+        return calls[-1][1]
+
+    pipeline = StreamingPipeline(batch_size=25, batch_wait=0.05, load=load, archive=archive,
+                                 enrich=lambda paths: len(paths))
+    source = FakeEventSource(rate=0, duration=0, count=200, edit_ratio=0.4)
+
+    assert pipeline.run(source)
+    assert [kind for kind, _ in calls] == ["load", "archive"] * (len(calls) // 2)
+    assert all(load_size == archive_size for (_, load_size), (_, archive_size) in zip(calls[::2], calls[1::2]))
+    assert pipeline.summary()["archived"] == pipeline.summary()["loaded"] == 200
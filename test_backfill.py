@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for chunk planning and raw-file merging of the historical backfill (ingestion/backfill.py).
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import ingestion.backfill
+import ingestion.rate_limit
+from ingestion.backfill import backfill, chunk_partition, plan_chunks, write_chunk
+from ingestion.rate_limit import RequestScheduler
+from pipeline.runner import COMPLETED, PipelineState
+from utils.helpers import raw_file_channel, raw_message_files
+
+def message(message_id, views=10, media_path=None, date="2024-03-01 08:00:00+00:00"):
+    return {"id": message_id, "date": date, "text": f"message {message_id}", "views": views,
+            "has_media": media_path is not None, "media_path": media_path}
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def test_plan_chunks_covers_the_range_newest_first():
+    """Chunks are (lo, hi] ranges aligned to the chunk size, with no gaps or overlaps."""
+    chunks = plan_chunks(1234, 7100, 2000)
+    assert chunks == [(6000, 7100), (4000, 6000), (2000, 4000), (1234, 2000)]
+
+    ids = [message_id for lo, hi in chunks for message_id in range(lo + 1, hi + 1)]
+    assert sorted(ids) == list(range(1235, 7101))
+
+def test_plan_chunks_is_stable_as_the_channel_grows():
+    """Only the newest chunk changes when new messages arrive, so older checkpoints still match."""
+    before = plan_chunks(0, 5500, 1000)
+    after = plan_chunks(0, 5800, 1000)
+    assert before[1:] == after[1:]
+    assert before[0] == (5000, 5500) and after[0] == (5000, 5800)
+
+def test_plan_chunks_empty_range():
+    assert plan_chunks(500, 500, 100) == []
+    assert plan_chunks(0, 0, 100) == []
+
+def test_write_chunk_uses_the_run_date_folder(tmp_path):
+    """Messages of any send date go to the chunk's file under the run date, as with the scraper."""
+    messages = [message(2, date="2024-03-02 08:00:00+00:00"), message(1, date="2023-11-30 08:00:00+00:00")]
+    path = write_chunk("CheMed123", 0, 2, messages, "2025-07-19", str(tmp_path))
+
+    assert path == os.path.join(str(tmp_path), "2025-07-19", "CheMed123", "1-2.json")
+    assert [stored["id"] for stored in read(path)] == [2, 1]
+    assert raw_file_channel(path) == "CheMed123"
+    assert raw_message_files(str(tmp_path), "2025-07-19", "CheMed123") == [path]
+
+def test_write_chunk_is_idempotent(tmp_path):
+    """Writing the same chunk again stores each message once, with its latest values."""
+    chunk = [message(3), message(1), message(2)]
+    path = write_chunk("CheMed123", 0, 4, [dict(m) for m in chunk], "2025-07-19", str(tmp_path))
+    first = read(path)
+    write_chunk("CheMed123", 0, 4, [dict(m) for m in chunk], "2025-07-19", str(tmp_path))
+    assert read(path) == first
+
+    write_chunk("CheMed123", 0, 4, [message(4), message(3, views=99)], "2025-07-19", str(tmp_path))
+    stored = read(path)
+    assert [m["id"] for m in stored] == [4, 3, 2, 1]
+    assert stored[1]["views"] == 99
+
+def test_write_chunk_keeps_downloaded_photos(tmp_path):
+    """A rerun without --images keeps the photo path an earlier run recorded."""
+    write_chunk("CheMed123", 4, 5, [message(5, media_path="data/raw/images/x/CheMed123_5.jpg")],
+                "2025-07-19", str(tmp_path))
+    path = write_chunk("CheMed123", 4, 5, [message(5, views=20)], "2025-07-19", str(tmp_path))
+    assert read(path)[0]["media_path"] == "data/raw/images/x/CheMed123_5.jpg"
+    assert read(path)[0]["views"] == 20
+    assert not os.path.exists(path + ".tmp")
+
+def test_many_chunks_leave_earlier_files_alone(tmp_path):
+    """Each chunk writes only its own file: earlier chunks are never reread or rewritten."""
+    first = write_chunk("CheMed123", 0, 100, [message(i) for i in range(100, 0, -1)], "2025-07-19", str(tmp_path))
+    before = os.stat(first)
+
+    paths = [
+        write_chunk("CheMed123", lo, lo + 100, [message(i) for i in range(lo + 100, lo, -1)],
+                    "2025-07-19", str(tmp_path))
+        for lo in range(100, 5000, 100)
+    ]
+
+    after = os.stat(first)
+    assert (after.st_ino, after.st_mtime_ns, after.st_size) == (before.st_ino, before.st_mtime_ns, before.st_size)
+    assert [m["id"] for m in read(first)] == list(range(100, 0, -1))
+    assert all(len(read(path)) == 100 for path in paths)
+    assert len(raw_message_files(str(tmp_path))) == 50
+
+class FakeClient:
+    """Async stand-in for a Telethon client over a channel with message ids 1..`count`."""
+
+    def __init__(self, count):
+        self.history = [
+            SimpleNamespace(id=message_id, date=datetime(2024, 3, 1, tzinfo=timezone.utc),
+                            message=f"message {message_id}", views=message_id, media=None)
+            for message_id in range(count, 0, -1)
+        ]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def get_messages(self, channel_url, limit, offset_id=0, min_id=0, offset_date=None):
+        page = [msg for msg in self.history if msg.id > min_id and (not offset_id or msg.id < offset_id)]
+        return page[:limit]
+
+def test_backfill_writes_concurrent_chunks_to_their_own_files(tmp_path, monkeypatch):
+    """Each chunk of a channel gets its own file under the run date, and is checkpointed."""
+    monkeypatch.setattr(ingestion.backfill, "telegram_client", lambda session: FakeClient(250))
+    monkeypatch.setattr(ingestion.rate_limit, "_scheduler", RequestScheduler(initial_rate=1000, burst=100))
+    state = PipelineState(str(tmp_path / "state.json"))
+
+    assert asyncio.run(backfill(["https://t.me/CheMed123"], state, chunk_size=100, concurrency=3,
+                                base_dir=str(tmp_path / "raw"), run_date="2025-07-19"))
+
+    paths = raw_message_files(str(tmp_path / "raw"))
+    assert [os.path.basename(path) for path in paths] == ["1-100.json", "101-200.json", "201-250.json"]
+    stored = [m["id"] for path in paths for m in read(path)]
+    assert sorted(stored) == list(range(1, 251))
+    assert all(state.status("backfill", chunk_partition("CheMed123", lo, hi)) == COMPLETED
+               for lo, hi in plan_chunks(0, 250, 100))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for batch report admission (api/batch.py).
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import contextlib
+import json
+import time
+
+import anyio
+import pytest
+
+import api.admission
+import api.batch
+from api.admission import HEAVY, LIGHT, AdmissionClass
+from api.schemas import BatchReportRequest
+
+class FakeUnits:
+    """Report units without a database, tracking how many run at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    def _run(self, key):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        time.sleep(0.02)
+        self.running -= 1
+        return {key: json.dumps({"success": True}).encode()}
+
+    def top_products(self, report, version):
+        return self._run(report.key)
+
+    def detections(self, report):
+        return self._run(report.key)
+
+@pytest.fixture
+def units(monkeypatch):
+    fake = FakeUnits()
+    monkeypatch.setattr(api.batch, "_current_version", lambda: 1)
+    monkeypatch.setattr(api.batch, "_top_products_unit", fake.top_products)
+    monkeypatch.setattr(api.batch, "_detections_unit", fake.detections)
+    return fake
+
+def set_class(monkeypatch, name, concurrency, max_queue, max_wait=1.0):
+    admission = AdmissionClass(name, concurrency, max_queue, max_wait)
+    monkeypatch.setitem(api.admission.admission_classes, name, admission)
+    return admission
+
+def top_products(limit):
+    return BatchReportRequest(type="top_products", params={"days": 30, "limit": limit})
+
+def test_batch_units_take_slots_in_their_class(monkeypatch, units):
+    """A batch never runs more heavy reports at once than the heavy budget allows."""
+    heavy = set_class(monkeypatch, HEAVY, concurrency=1, max_queue=10)
+    set_class(monkeypatch, LIGHT, concurrency=10, max_queue=10)
+    items = [top_products(limit) for limit in (5, 6, 7, 8)]
+
+    results = anyio.run(api.batch.run_batch, items)
+
+    assert all(json.loads(body)["success"] for body in results)
+    assert units.max_running == 1
+    assert heavy.in_flight == 0
+
+def test_batch_unit_refused_a_slot_gets_overloaded(monkeypatch, units):
+    """Reports whose class is saturated fail alone; reports of other classes still run."""
+    heavy = set_class(monkeypatch, HEAVY, concurrency=1, max_queue=0)
+    set_class(monkeypatch, LIGHT, concurrency=10, max_queue=10)
+    items = [
+        top_products(5),
+        BatchReportRequest(type="channel_detections", channel="CheMed123", params={"limit": 10}),
+    ]
+
+    async def run_with_heavy_slot_taken():
+        assert await heavy.acquire() is None
+        try:
+            return await api.batch.run_batch(items)
+        finally:
+            heavy.release()
+
+    top, detections = [json.loads(body) for body in anyio.run(run_with_heavy_slot_taken)]
+    assert top["error_code"] == "OVERLOADED"
+    assert detections["success"]
+    assert heavy.rejected["queue_full"] == 1
+
+def test_detection_units_honour_fields(monkeypatch):
+    """`fields` trims batch detection payloads like the single endpoint; unknown fields fail the item."""
+    set_class(monkeypatch, LIGHT, concurrency=10, max_queue=10)
+    monkeypatch.setattr(api.batch, "_current_version", lambda: 1)
+    monkeypatch.setattr(api.batch, "SessionLocal", contextlib.nullcontext)
+    calls = []
+
+    def get_detections_by_channel(db, channel, limit, include_message, fields=None):
+        calls.append((channel, limit, include_message, fields))
+        return [{field: f"{channel}-{field}" for field in fields}]
+    monkeypatch.setattr(api.batch.DetectionCRUD, "get_detections_by_channel", get_detections_by_channel)
+
+    items = [
+        BatchReportRequest(type="channel_detections", channel="CheMed123",
+                           params={"fields": "id, object_count"}),
+        BatchReportRequest(type="channel_detections", channel="CheMed123",
+                           params={"include_message": True, "fields": "id,views"}),
+        BatchReportRequest(type="channel_detections", channel="CheMed123", params={"fields": "views"}),
+    ]
+    trimmed, with_message, invalid = [json.loads(body) for body in anyio.run(api.batch.run_batch, items)]
+
+    assert trimmed["data"] == [{"id": "CheMed123-id", "object_count": "CheMed123-object_count"}]
+    assert with_message["data"] == [{"id": "CheMed123-id", "views": "CheMed123-views"}]
+    assert invalid["error_code"] == "BAD_REQUEST"
+    assert "views" in invalid["message"]
+    assert calls == [("CheMed123", 50, False, ["id", "object_count"]), ("CheMed123", 50, True, ["id", "views"])]
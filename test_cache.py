@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for the analytics response cache (api/cache.py).
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from datetime import date, datetime, timezone
+
+import pytest
+from starlette.requests import Request
+
+import api.cache
+from api.cache import CacheBackend, LRUCache, ResponseCache, _etag_matches
+
+class FakeTracker:
+    """Data version without a database."""
+
+    def __init__(self, version=1, updated_at=None):
+        self.version = version
+        self.updated_at = updated_at
+
+    def current(self, db):
+        return self.version, self.updated_at
+
+def make_request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+def set_today(monkeypatch, today):
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return today
+    monkeypatch.setattr(api.cache, "date", FixedDate)
+
+def test_etag_changes_when_the_day_rolls_over(monkeypatch):
+    """A client revalidating yesterday's ETag gets the report for today's window."""
+    cache = ResponseCache(tracker=FakeTracker(version=7))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"window_days": 7}
+
+    set_today(monkeypatch, date(2025, 7, 19))
+    first = cache.respond(make_request(), None, "dashboard", {"days": 7}, compute)
+    etag = first.headers["ETag"]
+    assert cache.respond(make_request(if_none_match=etag), None, "dashboard", {"days": 7}, compute).status_code == 304
+
+    set_today(monkeypatch, date(2025, 7, 20))
+    second = cache.respond(make_request(if_none_match=etag), None, "dashboard", {"days": 7}, compute)
+    assert second.status_code == 200
+    assert second.headers["ETag"] != etag
+    assert second.headers["X-Cache"] == "MISS"
+    assert len(calls) == 2
+
+def test_last_modified_not_before_the_window_day(monkeypatch):
+    """If-Modified-Since from before midnight no longer matches once the window has moved."""
+    loaded_at = datetime(2025, 7, 18, 12, 0, tzinfo=timezone.utc)
+    cache = ResponseCache(tracker=FakeTracker(version=7, updated_at=loaded_at))
+    since = "Fri, 18 Jul 2025 23:00:00 GMT"
+
+    set_today(monkeypatch, date(2025, 7, 20))
+    response = cache.respond(make_request(if_modified_since=since), None, "dashboard", {"days": 7}, dict)
+    assert response.status_code == 200
+    assert response.headers["Last-Modified"] != "Fri, 18 Jul 2025 12:00:00 GMT"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_backend_is_abstract():
+    """Backends must implement get/set/clear."""
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class Incomplete(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_lru_evicts_least_recently_used():
+    """Past `max_entries`, the entry read or written longest ago goes first."""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3, ttl=60)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_lru_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(api.cache.time, "monotonic", clock)
+    cache = LRUCache(max_entries=10)
+    cache.set("short", "value", ttl=5)
+    cache.set("long", "value", ttl=60)
+
+    clock.now += 4
+    assert cache.get("short") == "value"
+    clock.now += 2
+    assert cache.get("short") is None
+    assert cache.get("long") == "value"
+    assert len(cache) == 1
+
+    cache.clear()
+    assert cache.get("long") is None
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    ('"7-abc"', True),
+    ('W/"7-abc"', True),
+    ('"6-abc", "7-abc"', True),
+    ('"6-abc",W/"7-abc"', True),
+    ("*", True),
+    ('"6-abc"', False),
+    ('"7-abd", "6-abc"', False),
+    ("7-abc", False),
+    ("", False),
+])
+def test_etag_matches(if_none_match, expected):
+    """If-None-Match: exact, weak (W/), list and wildcard forms."""
+    assert _etag_matches(if_none_match, '"7-abc"') is expected
+
+def test_not_modified_and_cache_hits():
+    """Unchanged data: 304 for a matching ETag, cached body otherwise; a version bump recomputes."""
+    tracker = FakeTracker(version=1, updated_at=datetime(2025, 7, 19, 12, 0, tzinfo=timezone.utc))
+    cache = ResponseCache(backend=LRUCache(max_entries=10), tracker=tracker)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"total": len(calls)}
+
+    first = cache.respond(make_request(), None, "top-products", {"days": 30, "channel": None}, compute)
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+    etag = first.headers["ETag"]
+
+    not_modified = cache.respond(make_request(if_none_match=etag), None, "top-products", {"days": 30}, compute)
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    assert not_modified.headers["ETag"] == etag
+
+    weak = cache.respond(make_request(if_none_match=f"W/{etag}"), None, "top-products", {"days": 30}, compute)
+    assert weak.status_code == 304
+
+    hit = cache.respond(make_request(if_none_match='"0-stale"'), None, "top-products", {"days": 30}, compute)
+    assert hit.status_code == 200
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.body == first.body
+    assert len(calls) == 1
+
+    tracker.version = 2
+    bumped = cache.respond(make_request(if_none_match=etag), None, "top-products", {"days": 30}, compute)
+    assert bumped.status_code == 200
+    assert bumped.headers["X-Cache"] == "MISS"
+    assert bumped.headers["ETag"] != etag
+    assert len(calls) == 2
+
+def test_not_modified_since():
+    tracker = FakeTracker(version=1, updated_at=datetime.now(timezone.utc).replace(microsecond=0))
+    cache = ResponseCache(tracker=tracker)
+    last_modified = cache.respond(make_request(), None, "dashboard", {"days": 7}, dict).headers["Last-Modified"]
+
+    assert cache.respond(make_request(if_modified_since=last_modified), None, "dashboard", {"days": 7},
+                         dict).status_code == 304
+    assert cache.respond(make_request(if_modified_since="Mon, 01 Jan 2024 00:00:00 GMT"), None, "dashboard",
+                         {"days": 7}, dict).status_code == 200
+    assert cache.respond(make_request(if_modified_since="not a date"), None, "dashboard", {"days": 7},
+                         dict).status_code == 200
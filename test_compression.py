@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tests for response compression (api/compression.py).
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import gzip
+import json
+import zlib
+
+import anyio
+import pytest
+
+import api.compression
+from api.compression import CompressionMiddleware, negotiate_encoding
+
+@pytest.fixture
+def gzip_only(monkeypatch):
+    monkeypatch.setattr(api.compression, "brotli", None)
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("deflate, identity", None),
+    ("", None),
+    ("*", "gzip"),
+    ("*;q=0", None),
+    ("gzip;q=0, *", None),
+    ("gzip;q=abc", None),
+])
+def test_negotiate_gzip(gzip_only, accept_encoding, expected):
+    """Without brotli installed only gzip is offered; q=0 and bad q-values refuse it."""
+    assert negotiate_encoding(accept_encoding) == expected
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip;q=1.0", "gzip"),
+    ("br;q=0.9, gzip;q=0.8", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("gzip;q=0.2, *;q=0.5", "br"),
+])
+def test_negotiate_prefers_the_highest_q_value(accept_encoding, expected):
+    """The supported coding with the highest q-value wins, brotli on a tie."""
+    pytest.importorskip("brotli")
+    assert negotiate_encoding(accept_encoding) == expected
+
+def make_app(chunks, content_type=b"application/json", headers=(), status=200):
+    """ASGI app sending `chunks` as the response body, streamed when there are several."""
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), *headers],
+        })
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+    return app
+
+def call(app, accept_encoding="gzip"):
+    """Run one GET through `app`; returns (status, headers, body messages)."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    anyio.run(app, scope, receive, send)
+    start = messages[0]
+    headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    return start["status"], headers, [message for message in messages[1:] if message["type"] == "http.response.body"]
+
+def body_of(messages):
+    return b"".join(message["body"] for message in messages)
+
+def test_small_bodies_are_not_compressed(gzip_only):
+    body = json.dumps({"success": True}).encode()
+    status, headers, messages = call(CompressionMiddleware(make_app([body]), minimum_size=1024))
+
+    assert status == 200
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert body_of(messages) == body
+
+def test_large_bodies_are_gzipped_with_content_length(gzip_only):
+    body = json.dumps({"data": ["paracetamol"] * 500}).encode()
+    app = make_app([body], headers=[(b"content-length", str(len(body)).encode())])
+    status, headers, messages = call(CompressionMiddleware(app, minimum_size=1024))
+
+    assert headers["content-encoding"] == "gzip"
+    payload = body_of(messages)
+    assert headers["content-length"] == str(len(payload))
+    assert gzip.decompress(payload) == body
+
+def test_no_compression_without_accept_encoding(gzip_only):
+    body = b"x" * 5000
+    _, headers, messages = call(CompressionMiddleware(make_app([body]), minimum_size=10), accept_encoding="")
+    assert "content-encoding" not in headers
+    assert body_of(messages) == body
+
+def test_streamed_ndjson_is_compressed_chunk_by_chunk(gzip_only):
+    """Once past the threshold, every streamed chunk is flushed and decodable as it arrives."""
+    rows = [json.dumps({"id": number, "channel": "CheMed123"}).encode() + b"\n" for number in range(300)]
+    chunks = [b"".join(rows[start:start + 50]) for start in range(0, 300, 50)]
+    app = make_app(chunks, content_type=b"application/x-ndjson")
+    _, headers, messages = call(CompressionMiddleware(app, minimum_size=len(chunks[0]) + 1))
+
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    # The first chunk was buffered below the threshold, then sent with the second
+    assert len(messages) == len(chunks) - 1
+    assert [message["more_body"] for message in messages] == [True] * (len(messages) - 1) + [False]
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    received = b""
+    for index, message in enumerate(messages):
+        received += decompressor.decompress(message["body"])
+        # Sync-flushed: everything sent so far decodes before the stream ends
+        assert received == b"".join(chunks[:index + 2])
+    assert decompressor.eof
+
+def test_compressed_responses_get_a_weak_etag(gzip_only):
+    body = b"[" + b"1," * 2000 + b"1]"
+    app = make_app([body], headers=[(b"etag", b'"7-abc"')])
+    _, headers, _ = call(CompressionMiddleware(app, minimum_size=1024))
+    assert headers["etag"] == 'W/"7-abc"'
+
+    already_weak = make_app([body], headers=[(b"etag", b'W/"7-abc"')])
+    _, headers, _ = call(CompressionMiddleware(already_weak, minimum_size=1024))
+    assert headers["etag"] == 'W/"7-abc"'
+
+    small = make_app([b"[]"], headers=[(b"etag", b'"7-abc"')])
+    _, headers, _ = call(CompressionMiddleware(small, minimum_size=1024))
+    assert headers["etag"] == '"7-abc"'
+
+@pytest.mark.parametrize("content_type, headers, status", [
+    (b"application/vnd.apache.parquet", [], 200),
+    (b"application/json", [(b"content-encoding", b"br")], 200),
+    (b"application/json", [], 304),
+])
+def test_passthrough_responses(gzip_only, content_type, headers, status):
+    """Binary formats, pre-encoded bodies and 304s are sent untouched."""
+    body = b"PAR1" + b"\0" * 4000
+    _, response_headers, messages = call(
+        CompressionMiddleware(make_app([body], content_type, headers, status), minimum_size=10)
+    )
+    assert response_headers.get("content-encoding") != "gzip"
+    assert body_of(messages) == body
+
+def test_brotli_round_trip():
+    brotli = pytest.importorskip("brotli")
+    body = json.dumps({"data": ["paracetamol"] * 500}).encode()
+    _, headers, messages = call(CompressionMiddleware(make_app([body]), minimum_size=1024), accept_encoding="br, gzip")
+    assert headers["content-encoding"] == "br"
+    assert brotli.decompress(body_of(messages)) == body
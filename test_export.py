@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk message export (api/export.py, MessageCRUD export query).
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import anyio
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from api.crud import MessageCRUD, parse_export_cursor
+from api.export import encode_csv, encode_ndjson, encode_parquet
+from api.schemas import MessageExportParams, MessageSearchParams
+
+def message(message_id, channel="CheMed123", day=19):
+    return {
+        "id": message_id, "message_date": datetime(2025, 7, day, 10, 30, tzinfo=timezone.utc),
+        "channel": channel, "message_text": "paracetamol", "views": 10, "has_media": False,
+        "message_length": 11, "engagement_level": "Medium",
+        "loaded_at": datetime(2025, 7, day, 11, 0, tzinfo=timezone.utc),
+    }
+
+async def chunks_of(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+def collect(encoder, chunks, cursor=None):
+    async def run():
+        return b"".join([part async for part in encoder(chunks, cursor)])
+    return anyio.run(run)
+
+def sql(query):
+    return str(query.statement.compile(dialect=postgresql.dialect()))
+
+def test_ndjson_ends_with_the_cursor_of_the_last_row():
+    """The trailing cursor record parses back to the keys of the last exported row."""
+    body = collect(encode_ndjson, chunks_of([message(1), message(2)], [message(7, "tikvahpharma", day=20)]))
+    lines = [json.loads(line) for line in body.splitlines()]
+
+    assert [line["id"] for line in lines[:-1]] == [1, 2, 7]
+    cursor = lines[-1]["cursor"]
+    assert parse_export_cursor(cursor) == (
+        datetime(2025, 7, 20, 10, 30, tzinfo=timezone.utc), "tikvahpharma", 7
+    )
+
+def test_empty_export_returns_the_request_cursor():
+    """With no rows after the cursor, the same cursor comes back (the export is complete)."""
+    cursor = "2025-07-20T10:30:00+00:00,tikvahpharma,7"
+    body = collect(encode_ndjson, chunks_of(), cursor)
+    assert json.loads(body) == {"cursor": cursor}
+
+def test_resuming_from_the_cursor_continues_after_the_last_row():
+    """The emitted cursor becomes the keyset predicate of the next export."""
+    body = collect(encode_ndjson, chunks_of([message(1), message(2)]))
+    cursor = json.loads(body.splitlines()[-1])["cursor"]
+    query = MessageCRUD._export_query(Session(), MessageExportParams(cursor=cursor))
+
+    compiled = query.statement.compile(dialect=postgresql.dialect())
+    assert "fct_messages.message_id) > (" in str(compiled)
+    assert (datetime(2025, 7, 19, 10, 30, tzinfo=timezone.utc), "CheMed123", 2) == tuple(
+        value for key, value in compiled.params.items() if key.startswith("param_")
+    )
+
+def test_export_query_applies_the_search_filters():
+    """Export filters are the search filters, so the two cannot drift apart."""
+    filters = dict(query="paracetamol", channel="CheMed123", start_date=datetime(2025, 7, 1),
+                   end_date=datetime(2025, 7, 31), has_media=True, min_views=100)
+    search = sql(MessageCRUD._search_query(Session(), MessageSearchParams(**filters)))
+    export = sql(MessageCRUD._export_query(Session(), MessageExportParams(**filters)))
+
+    assert export.startswith(search)
+
+def test_parquet_carries_the_cursor_in_its_metadata():
+    pq = pytest.importorskip("pyarrow.parquet")
+    body = collect(encode_parquet, chunks_of([message(1)], [message(3)]))
+
+    parquet = pq.ParquetFile(io.BytesIO(body))
+    assert parquet.read().column("id").to_pylist() == [1, 3]
+    cursor = parquet.metadata.metadata[b"export_cursor"].decode()
+    assert parse_export_cursor(cursor)[1:] == ("CheMed123", 3)
+
+def test_csv_ends_with_a_cursor_comment():
+    """CSV rows are followed by a `# cursor=` comment line that parses back to the last row."""
+    body = collect(encode_csv, chunks_of([message(1), message(2)], [message(7, "tikvahpharma", day=20)]))
+    lines = body.decode("utf-8").splitlines()
+
+    rows = list(csv.DictReader(line for line in lines if not line.startswith("#")))
+    assert [row["id"] for row in rows] == ["1", "2", "7"]
+    assert lines[-1].startswith("# cursor=")
+    assert parse_export_cursor(lines[-1][len("# cursor="):]) == (
+        datetime(2025, 7, 20, 10, 30, tzinfo=timezone.utc), "tikvahpharma", 7
+    )
+
+    empty = collect(encode_csv, chunks_of(), "2025-07-20T10:30:00+00:00,tikvahpharma,7")
+    assert empty.decode("utf-8").splitlines()[1] == "# cursor=2025-07-20T10:30:00+00:00,tikvahpharma,7"
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the slow-query log (api/metrics.py).
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import logging
+from types import SimpleNamespace
+
+import api.metrics
+
+STATEMENT = "SELECT id FROM fct_messages WHERE message_text ILIKE %(pattern)s AND channel = %(channel)s"
+PARAMETERS = {"pattern": "%patient 0912345678%", "channel": "CheMed123"}
+
+def log_slow_query(monkeypatch, caplog, parameters=PARAMETERS):
+    monkeypatch.setattr(api.metrics, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(api.metrics, "SLOW_QUERY_EXPLAIN", False)
+    conn = SimpleNamespace(info={})
+    with caplog.at_level(logging.WARNING, logger="api.slow_queries"):
+        api.metrics._before_cursor_execute(conn, None, STATEMENT, parameters, None, False)
+        api.metrics._after_cursor_execute(conn, None, STATEMENT, parameters, None, False)
+    return caplog.text
+
+def test_slow_query_parameters_are_redacted_by_default(monkeypatch, caplog):
+    """Search text and other bound values stay out of the log; parameter names remain."""
+    monkeypatch.setattr(api.metrics, "SLOW_QUERY_LOG_PARAMS", False)
+    text = log_slow_query(monkeypatch, caplog)
+
+    assert "Slow query" in text
+    assert "0912345678" not in text
+    assert "CheMed123" not in text
+    assert "'pattern': <redacted>" in text
+
+def test_positional_parameters_are_redacted(monkeypatch, caplog):
+    monkeypatch.setattr(api.metrics, "SLOW_QUERY_LOG_PARAMS", False)
+    text = log_slow_query(monkeypatch, caplog, parameters=("secret", 3))
+    assert "secret" not in text
+    assert "<2 redacted>" in text
+
+def test_slow_query_parameters_logged_when_enabled(monkeypatch, caplog):
+    monkeypatch.setattr(api.metrics, "SLOW_QUERY_LOG_PARAMS", True)
+    assert "0912345678" in log_slow_query(monkeypatch, caplog)
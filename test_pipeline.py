@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for the pipeline dependency-graph runner (pipeline/runner.py).
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import asyncio
+import threading
+import time
+
+from pipeline.runner import COMPLETED, FAILED, PipelineState, Stage, run_pipeline
+from pipeline.stages import with_event_loop
+
+def telethon_style_stage(partition):
+    """Drives a coroutine on the thread's current loop, like telethon.sync does."""
+    async def fetch():
+        await asyncio.sleep(0)
+        return {"records_out": 1}
+    return asyncio.get_event_loop().run_until_complete(fetch())
+
+def test_telethon_style_stage_runs_in_worker_threads(tmp_path):
+    """Stages using a synchronous asyncio client get an event loop in the runner's worker threads."""
+    state = PipelineState(str(tmp_path / "state.json"))
+    stages = [Stage("scrape", with_event_loop(telethon_style_stage), concurrency=1)]
+    partitions = ["2025-07-19/CheMed123", "2025-07-19/tikvahpharma"]
+
+    assert run_pipeline(stages, partitions, state, max_workers=2)
+    assert all(state.status("scrape", partition) == COMPLETED for partition in partitions)
+
+def test_telethon_style_stage_fails_without_event_loop(tmp_path):
+    """Without `with_event_loop` the same stage has no event loop in a worker thread."""
+    state = PipelineState(str(tmp_path / "state.json"))
+    stages = [Stage("scrape", telethon_style_stage)]
+
+    assert not run_pipeline(stages, ["2025-07-19/CheMed123"], state)
+    assert state.status("scrape", "2025-07-19/CheMed123") == FAILED
+
+class Recorder:
+    """Fake stages recording the order they ran in and how many ran at once."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+        self.running = {}
+        self.max_running = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name, deps=(), concurrency=None, delay=0.0):
+        def func(partition):
+            with self._lock:
+                self.calls.append((name, partition))
+                self.running[name] = self.running.get(name, 0) + 1
+                self.max_running[name] = max(self.max_running.get(name, 0), self.running[name])
+            time.sleep(delay)
+            with self._lock:
+                self.running[name] -= 1
+            if (name, partition) in self.fail:
+                raise RuntimeError(f"{name} failed")
+            return {"records_out": 1}
+        return Stage(name, func, deps=deps, concurrency=concurrency)
+
+PARTITIONS = ["2025-07-19/CheMed123", "2025-07-19/tikvahpharma", "2025-07-19/lobelia4cosmetics"]
+
+def test_stages_run_after_their_dependencies(tmp_path):
+    """Each task starts only after the same partition of every upstream stage."""
+    recorder = Recorder()
+    stages = [
+        recorder.stage("scrape", delay=0.01),
+        recorder.stage("extract_images", deps=["scrape"]),
+        recorder.stage("detect_objects", deps=["extract_images"]),
+        recorder.stage("load", deps=["scrape"]),
+    ]
+    state = PipelineState(str(tmp_path / "state.json"))
+
+    assert run_pipeline(stages, PARTITIONS, state, max_workers=4)
+    assert len(recorder.calls) == len(stages) * len(PARTITIONS)
+    order = {call: position for position, call in enumerate(recorder.calls)}
+    for stage in stages:
+        for dep in stage.deps:
+            for partition in PARTITIONS:
+                assert order[(dep, partition)] < order[(stage.name, partition)]
+
+def test_failure_blocks_only_its_partition(tmp_path):
+    """A failed task blocks its downstream tasks for that partition; other partitions finish."""
+    failing = PARTITIONS[0]
+    recorder = Recorder(fail=[("scrape", failing)])
+    stages = [
+        recorder.stage("scrape"),
+        recorder.stage("load", deps=["scrape"]),
+        recorder.stage("archive", deps=["load"]),
+    ]
+    state = PipelineState(str(tmp_path / "state.json"))
+
+    assert not run_pipeline(stages, PARTITIONS, state, max_workers=2)
+    assert state.status("scrape", failing) == FAILED
+    assert "scrape failed" in state.tasks["scrape"][failing]["error"]
+    assert ("load", failing) not in recorder.calls
+    assert ("archive", failing) not in recorder.calls
+    assert state.status("load", failing) is None
+    for partition in PARTITIONS[1:]:
+        assert all(state.status(stage.name, partition) == COMPLETED for stage in stages)
+
+def test_stage_concurrency_cap(tmp_path):
+    """No more than `concurrency` partitions of a stage run at once, even with spare workers."""
+    recorder = Recorder()
+    stages = [
+        recorder.stage("scrape", concurrency=1, delay=0.02),
+        recorder.stage("extract_images", deps=["scrape"], concurrency=2, delay=0.02),
+        recorder.stage("archive", deps=["scrape"], delay=0.05),
+    ]
+    partitions = [f"2025-07-19/channel{number}" for number in range(6)]
+    state = PipelineState(str(tmp_path / "state.json"))
+
+    assert run_pipeline(stages, partitions, state, max_workers=6)
+    assert recorder.max_running["scrape"] == 1
+    assert recorder.max_running["extract_images"] <= 2
+    assert recorder.max_running["archive"] > 1
+
+def test_resume_skips_completed_tasks(tmp_path):
+    """A rerun with the same state file only runs failed tasks and what they blocked."""
+    state_path = str(tmp_path / "state.json")
+    failing = PARTITIONS[1]
+    first = Recorder(fail=[("load", failing)])
+    stages = [first.stage("scrape"), first.stage("load", deps=["scrape"]),
+              first.stage("archive", deps=["load"])]
+    assert not run_pipeline(stages, PARTITIONS, PipelineState(state_path))
+
+    second = Recorder()
+    stages = [second.stage("scrape"), second.stage("load", deps=["scrape"]),
+              second.stage("archive", deps=["load"])]
+    state = PipelineState(state_path)  # reloaded from disk
+    assert run_pipeline(stages, PARTITIONS, state)
+    assert sorted(second.calls) == [("archive", failing), ("load", failing)]
+    assert all(state.status(stage.name, partition) == COMPLETED
+               for stage in stages for partition in PARTITIONS)
+
+def test_reset_runs_tasks_again(tmp_path):
+    """`PipelineState.reset` forgets completed tasks so they are rerun."""
+    state = PipelineState(str(tmp_path / "state.json"))
+    recorder = Recorder()
+    stages = [recorder.stage("scrape"), recorder.stage("load", deps=["scrape"])]
+    assert run_pipeline(stages, PARTITIONS, state)
+
+    state.reset(["load"], PARTITIONS[:1])
+    recorder.calls.clear()
+    assert run_pipeline(stages, PARTITIONS, state)
+    assert recorder.calls == [("load", PARTITIONS[0])]
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for the Telegram request scheduler (ingestion/rate_limit.py).
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import asyncio
+
+import pytest
+from telethon.errors import FloodWaitError, ServerError
+
+import ingestion.rate_limit
+from ingestion.rate_limit import RequestScheduler
+
+class FakeClock:
+    """Stands in for the `time` module: sleeping advances the clock instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds:
+            self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ingestion.rate_limit, "time", clock)
+    monkeypatch.setattr(ingestion.rate_limit.random, "uniform", lambda low, high: high)
+    return clock
+
+def failing(*errors):
+    """A request raising `errors` in turn, then returning the rate it was finally sent at."""
+    errors = list(errors)
+
+    def request(scheduler):
+        if errors:
+            raise errors.pop(0)
+        return scheduler.rate
+    return request
+
+def test_flood_wait_pauses_and_cuts_the_rate(clock):
+    """A flood wait pauses every request for the requested time, then retries at a lower rate."""
+    scheduler = RequestScheduler(initial_rate=10, decrease=0.5, increase=0.5)
+    start = clock.now
+
+    rate_at_retry = scheduler.call("CheMed123", failing(FloodWaitError(request=None, capture=30)), scheduler)
+
+    assert scheduler.paused_until == start + 30
+    assert clock.now >= start + 30
+    assert rate_at_retry == 5.0
+    assert scheduler.stats["CheMed123"]["flood_waits"] == 1
+    assert scheduler.stats["CheMed123"]["flood_wait_s"] == 30
+    assert scheduler.stats["CheMed123"]["requests"] == 1
+
+def test_flood_waits_during_one_pause_cut_the_rate_once(clock):
+    """Requests already in flight hit the same limit; only the first flood wait of a pause backs off."""
+    scheduler = RequestScheduler(initial_rate=10, decrease=0.5)
+    scheduler.in_flight = 2
+
+    scheduler._failed("CheMed123", FloodWaitError(request=None, capture=30), attempt=0)
+    scheduler._failed("tikvahpharma", FloodWaitError(request=None, capture=20), attempt=0)
+
+    assert scheduler.rate == 5.0
+    assert scheduler.paused_until == clock.now + 30
+
+def test_successes_increase_the_rate_additively_up_to_the_cap(clock):
+    """Slow start adds `increase` per success; after a flood wait each success adds `increase / rate`."""
+    scheduler = RequestScheduler(initial_rate=4, max_rate=8, increase=0.5, decrease=0.5)
+    scheduler.call("CheMed123", failing(), scheduler)
+    assert scheduler.rate == 4.5
+
+    scheduler.call("CheMed123", failing(FloodWaitError(request=None, capture=1)), scheduler)
+    # Cut to 2.25 by the flood wait, then one additive step
+    assert scheduler.rate == pytest.approx(2.25 + 0.5 / 2.25)
+
+    rates = [scheduler.rate]
+    for _ in range(200):
+        scheduler.call("CheMed123", failing(), scheduler)
+        rates.append(scheduler.rate)
+    steps = [after - before for before, after in zip(rates, rates[1:])]
+    assert all(step <= 0.5 / 2.25 for step in steps)
+    assert rates[-1] == 8
+    assert scheduler.concurrency <= scheduler.max_concurrency
+
+def test_transient_errors_back_off_exponentially(clock):
+    """Server errors and dropped connections are retried after 1x, 2x, 4x... `backoff_base`."""
+    scheduler = RequestScheduler(initial_rate=10, burst=100, increase=0.5, backoff_base=1.0)
+    request = failing(ServerError(request=None, message="RPC_CALL_FAIL"), ConnectionResetError(), OSError())
+
+    scheduler.call("CheMed123", request, scheduler)
+
+    assert clock.sleeps == [1.0, 2.0, 4.0]
+    assert scheduler.stats["CheMed123"]["retries"] == 3
+    assert scheduler.stats["CheMed123"]["backoff_s"] == 7.0
+    assert scheduler.rate == 10.5  # one success; backoff leaves the rate alone
+
+def test_transient_errors_give_up_after_max_retries(clock):
+    scheduler = RequestScheduler(max_retries=2)
+    with pytest.raises(OSError):
+        scheduler.call("CheMed123", failing(OSError(), OSError(), OSError()), scheduler)
+    assert scheduler.stats["CheMed123"]["failures"] == 1
+    assert scheduler.in_flight == 0
+
+def test_other_errors_fail_at_once(clock):
+    scheduler = RequestScheduler()
+    with pytest.raises(ValueError):
+        scheduler.call("CheMed123", failing(ValueError("bad peer")), scheduler)
+    assert clock.sleeps == []
+    assert scheduler.stats["CheMed123"]["retries"] == 0
+
+def test_acall_waits_out_flood_waits(clock, monkeypatch):
+    """The coroutine path shares the same pause and rate."""
+    async def fake_sleep(seconds):
+        clock.sleep(seconds)
+    monkeypatch.setattr(ingestion.rate_limit.asyncio, "sleep", fake_sleep)
+    scheduler = RequestScheduler(initial_rate=10, decrease=0.5)
+    request = failing(FloodWaitError(request=None, capture=12))
+
+    async def arequest():
+        return request(scheduler)
+
+    start = clock.now
+    assert asyncio.run(scheduler.acall("CheMed123", arequest)) == 5.0
+    assert clock.now >= start + 12
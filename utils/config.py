@@ -1,6 +1,5 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
 
 # Load environment variables from .env
 load_dotenv()
@@ -18,7 +17,64 @@ PG_CONFIG = {
     "database": os.getenv("PGDATABASE"),
 }
 
+# Optional read replica for API reads (same credentials/database as primary)
+PG_READ_CONFIG = {
+    **PG_CONFIG,
+    "host": os.getenv("PGREADHOST"),
+    "port": int(os.getenv("PGREADPORT", PG_CONFIG["port"])),
+}
+
 def get_db_connection():
-    url = f"postgresql+psycopg2://{PG_CONFIG['user']}:{PG_CONFIG['password']}@{PG_CONFIG['host']}:{PG_CONFIG['port']}/{PG_CONFIG['database']}"
-    engine = create_engine(url)
-    return engine.connect()
+    # A pooled connection: close it (or use it as a context manager) to return it to the pool.
+    # Imported lazily: utils.db reads its settings from this module
+    from utils.db import get_engine
+    return get_engine().connect()
+
+# API response cache
+API_CACHE_TTL = int(os.getenv("API_CACHE_TTL", 300))
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", 1024))
+DATA_VERSION_CHECK_INTERVAL = float(os.getenv("DATA_VERSION_CHECK_INTERVAL", 5))
+
+# Database connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+# Query instrumentation
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 500))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+# Bound parameters hold user input (search text, channel names); they are only
+# logged with slow queries when explicitly enabled. EXPLAIN plans show them too.
+SLOW_QUERY_LOG_PARAMS = os.getenv("SLOW_QUERY_LOG_PARAMS", "false").lower() in ("1", "true", "yes")
+
+# API admission control (see api/admission.py). Heavy reports get at most half
+# of the DB worker threads by default so cheap lookups always find one free.
+ADMISSION_HEAVY_CONCURRENCY = int(os.getenv(
+    "ADMISSION_HEAVY_CONCURRENCY", max(1, (DB_POOL_SIZE + DB_MAX_OVERFLOW) // 2)
+))
+ADMISSION_HEAVY_QUEUE = int(os.getenv("ADMISSION_HEAVY_QUEUE", 20))
+ADMISSION_LIGHT_CONCURRENCY = int(os.getenv("ADMISSION_LIGHT_CONCURRENCY", DB_POOL_SIZE + DB_MAX_OVERFLOW))
+ADMISSION_LIGHT_QUEUE = int(os.getenv("ADMISSION_LIGHT_QUEUE", 100))
+# Long-running bulk requests (exports, batches) get their own, smaller budget
+ADMISSION_BULK_CONCURRENCY = int(os.getenv(
+    "ADMISSION_BULK_CONCURRENCY", max(1, (DB_POOL_SIZE + DB_MAX_OVERFLOW) // 5)
+))
+ADMISSION_BULK_QUEUE = int(os.getenv("ADMISSION_BULK_QUEUE", 5))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", 2))
+
+# Response compression (see api/compression.py)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+
+# Batch report endpoint: work units run concurrently per batch request
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 4))
+
+# Telegram request scheduler (see ingestion/rate_limit.py): upper bounds the
+# adaptive rate and concurrency probe towards
+SCRAPER_MAX_RATE = float(os.getenv("SCRAPER_MAX_RATE", 20))
+SCRAPER_MAX_CONCURRENCY = int(os.getenv("SCRAPER_MAX_CONCURRENCY", 8))
+SCRAPER_MAX_RETRIES = int(os.getenv("SCRAPER_MAX_RETRIES", 5))
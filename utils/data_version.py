@@ -0,0 +1,49 @@
+"""
+Data-version stamp shared by the pipeline and the API.
+
+Every step that changes the data the API serves (dbt runs, through their
+on-run-end hook, and benchmarks/generate_data.py) bumps a single row in
+`raw.data_version`. The API compares the stamp against its cached
+responses, so cached analytics stay valid until new data actually lands.
+"""
+
+from sqlalchemy import text
+
+CREATE_DATA_VERSION_TABLE = text("""
+    CREATE TABLE IF NOT EXISTS raw.data_version (
+        id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+        version BIGINT NOT NULL,
+        source TEXT,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+""")
+
+BUMP_DATA_VERSION = text("""
+    INSERT INTO raw.data_version (id, version, source, updated_at)
+    VALUES (1, 1, :source, now())
+    ON CONFLICT (id) DO UPDATE
+    SET version = raw.data_version.version + 1,
+        source = EXCLUDED.source,
+        updated_at = EXCLUDED.updated_at
+    RETURNING version
+""")
+
+SELECT_DATA_VERSION = text("""
+    SELECT version, updated_at FROM raw.data_version WHERE id = 1
+""")
+
+def ensure_data_version_table(conn):
+    conn.execute(text("CREATE SCHEMA IF NOT EXISTS raw"))
+    conn.execute(CREATE_DATA_VERSION_TABLE)
+
+def bump_data_version(conn, source: str) -> int:
+    """Increment the data version; returns the new version number."""
+    ensure_data_version_table(conn)
+    return conn.execute(BUMP_DATA_VERSION, {"source": source}).scalar()
+
+def get_data_version(conn):
+    """Return (version, updated_at); (0, None) if nothing has been loaded yet."""
+    row = conn.execute(SELECT_DATA_VERSION).first()
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at
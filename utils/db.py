@@ -0,0 +1,122 @@
+"""
+Process-wide registry of pooled SQLAlchemy engines.
+
+Every component (API, loader, enrichment scripts) asks this module for an
+engine instead of calling `create_engine` itself, so each process holds one
+connection pool per database role, tuned from the environment:
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS
+
+Roles:
+    primary  read/write database (PGHOST)
+    read     read replica for API queries (PGREADHOST); falls back to primary
+             when no replica is configured
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Any, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from utils.config import (
+    PG_CONFIG, PG_READ_CONFIG, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS
+)
+
+PRIMARY = "primary"
+READ = "read"
+
+_engines: Dict[str, Engine] = {}
+_lock = threading.Lock()
+
+# Called with (role, seconds) after every pool checkout
+_checkout_listeners: List[Callable[[str, float], None]] = []
+
+def on_pool_checkout(listener: Callable[[str, float], None]) -> None:
+    """Register a callback receiving the time each checkout waited for a connection."""
+    _checkout_listeners.append(listener)
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each connection checkout took."""
+
+    role = PRIMARY
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            elapsed = time.perf_counter() - start
+            for listener in _checkout_listeners:
+                listener(self.role, elapsed)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.role = self.role
+        return pool
+
+def build_database_url(config: Dict[str, Any] = PG_CONFIG) -> str:
+    return (
+        f"postgresql+psycopg2://{config['user']}:{config['password']}@"
+        f"{config['host']}:{config['port']}/{config['database']}"
+    )
+
+def _create_engine(config: Dict[str, Any], role: str) -> Engine:
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    engine = create_engine(
+        build_database_url(config),
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args
+    )
+    engine.pool.role = role
+    return engine
+
+def get_engine(role: str = PRIMARY) -> Engine:
+    """Return the shared engine for a database role, creating it on first use."""
+    if role not in (PRIMARY, READ):
+        raise ValueError(f"Unknown database role '{role}'")
+    if role == READ and not PG_READ_CONFIG["host"]:
+        role = PRIMARY
+
+    engine = _engines.get(role)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(role)
+            if engine is None:
+                engine = _create_engine(PG_CONFIG if role == PRIMARY else PG_READ_CONFIG, role)
+                _engines[role] = engine
+    return engine
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Connection pool usage per engine role, for health checks and metrics."""
+    stats = {}
+    for role, engine in list(_engines.items()):
+        pool = engine.pool
+        stats[role] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # QueuePool counts overflow from -pool_size until the pool fills
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": DB_MAX_OVERFLOW,
+        }
+    return stats
+
+def dispose_engines():
+    """Close every pooled connection (e.g. after forking worker processes)."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
@@ -1,6 +1,17 @@
 import os
+import re
 import logging
 from datetime import datetime
+from glob import glob
+
+# Medical/pharmaceutical keywords counted as product mentions (API top products,
+# offline analytics)
+MEDICAL_KEYWORDS = [
+    "paracetamol", "ibuprofen", "aspirin", "amoxicillin", "omeprazole",
+    "metformin", "insulin", "vitamin", "antibiotic", "painkiller",
+    "medicine", "tablet", "capsule", "syrup", "injection", "vaccine",
+    "pharmacy", "prescription", "dosage", "treatment", "therapy"
+]
 
 def setup_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
@@ -19,3 +30,34 @@ def ensure_dir(path: str):
 def timestamped_filename(prefix: str, ext: str = "json") -> str:
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     return f"{prefix}_{timestamp}.{ext}"
+
+def parse_media_filename(filename: str):
+    """Split a scraper media filename (`<channel>_<message_id>.jpg`) into (channel, message_id).
+
+    Channel names may themselves contain underscores, so the message id is
+    taken from the last segment. Returns (None, None) when the name does not
+    follow the convention.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    channel, sep, message_id = stem.rpartition("_")
+    if not sep or not channel or not message_id.isdigit():
+        return None, None
+    return channel, int(message_id)
+
+def raw_file_channel(path: str) -> str:
+    """Channel of a raw messages file.
+
+    Scrapes are stored as `<run date>/<channel>.json` and backfill chunks as
+    `<run date>/<channel>/<first id>-<last id>.json`.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if re.fullmatch(r"\d+-\d+", stem):
+        return os.path.basename(os.path.dirname(path))
+    return stem
+
+def raw_message_files(raw_dir: str, run_date: str = "*", channel: str = "*"):
+    """Raw messages files (scrapes and backfill chunks) under `raw_dir`, oldest run date first."""
+    return sorted(
+        glob(os.path.join(raw_dir, run_date, f"{channel}.json"))
+        + glob(os.path.join(raw_dir, run_date, channel, "*.json"))
+    )